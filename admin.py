@@ -3,8 +3,14 @@ import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
 from groq import Groq
-import json
+import random
+import threading
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from data_access import publish_frames
+from data_store import normalize_admin_frame
+from llm_json import parse_records, ALERT_SCHEMA, RESOURCE_SCHEMA, UPDATE_SCHEMA
 
 # Must be the first Streamlit command
 st.set_page_config(
@@ -38,7 +44,67 @@ except Exception as e:
     st.error(f"Failed to initialize Groq client: {str(e)}")
     st.stop()
 
-def generate_disaster_data(groq_client, scenario_prompt):
+# Per-call timeout (seconds) and retry policy for scenario generation
+GENERATION_TIMEOUT = 60
+GENERATION_RETRIES = 3
+GENERATION_BACKOFF = 1.0
+
+class GenerationCancelled(Exception):
+    pass
+
+def call_with_retries(fn, retries=GENERATION_RETRIES, backoff=GENERATION_BACKOFF, cancel_event=None):
+    """Call fn(), retrying failures with jittered exponential backoff"""
+    for attempt in range(retries):
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled()
+        try:
+            return fn()
+        except GenerationCancelled:
+            raise
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            delay = backoff * 2 ** attempt * (0.5 + random.random())
+            if cancel_event is None:
+                time.sleep(delay)
+            # Waiting on the event lets a cancellation cut the backoff short
+            elif cancel_event.wait(delay):
+                raise GenerationCancelled()
+
+def stream_completion(groq_client, messages, timeout=GENERATION_TIMEOUT, cancel_event=None, **params):
+    """Yield the text of a streamed chat completion chunk by chunk"""
+    response = groq_client.chat.completions.create(messages=messages, stream=True, timeout=timeout, **params)
+    for chunk in response:
+        if cancel_event is not None and cancel_event.is_set():
+            response.close()
+            raise GenerationCancelled()
+        if chunk.choices:
+            yield chunk.choices[0].delta.content or ""
+
+def generate_records(groq_client, messages, schema, timeout=GENERATION_TIMEOUT, cancel_event=None):
+    """
+    Stream a completion, parsing and validating records as they arrive.
+    Invalid records are dropped (and listed in df.attrs['rejected']);
+    the call is only retried when nothing valid came back.
+    """
+    def attempt():
+        chunks = stream_completion(
+            groq_client,
+            messages,
+            timeout=timeout,
+            cancel_event=cancel_event,
+            model="mixtral-8x7b-32768",
+            temperature=0.7,
+            max_tokens=1000
+        )
+        df, rejected = parse_records(chunks, schema)
+        if df.empty:
+            raise ValueError(f"no valid records in response ({len(rejected)} rejected)")
+        df.attrs['rejected'] = rejected
+        return df
+    return call_with_retries(attempt, cancel_event=cancel_event)
+
+def generate_disaster_data(groq_client, scenario_prompt, timeout=GENERATION_TIMEOUT, cancel_event=None):
     """Generate structured disaster alerts data"""
     messages = [
         {"role": "system", "content": """You are a disaster data generator for Qatar's emergency management system. 
@@ -53,20 +119,9 @@ def generate_disaster_data(groq_client, scenario_prompt):
         {"role": "user", "content": f"Generate 10 structured alerts for: {scenario_prompt}"}
     ]
     
-    try:
-        response = groq_client.chat.completions.create(
-            messages=messages,
-            model="mixtral-8x7b-32768",
-            temperature=0.7,
-            max_tokens=1000
-        )
-        alerts = json.loads(response.choices[0].message.content)
-        return pd.DataFrame(alerts)
-    except Exception as e:
-        st.error(f"Error generating disaster data: {str(e)}")
-        return pd.DataFrame()
+    return generate_records(groq_client, messages, ALERT_SCHEMA, timeout=timeout, cancel_event=cancel_event)
 
-def generate_resource_data(groq_client, scenario_prompt):
+def generate_resource_data(groq_client, scenario_prompt, timeout=GENERATION_TIMEOUT, cancel_event=None):
     """Generate structured facility resource data"""
     messages = [
         {"role": "system", "content": """You are a facility resource manager for Qatar's emergency management system. 
@@ -83,20 +138,9 @@ def generate_resource_data(groq_client, scenario_prompt):
         {"role": "user", "content": f"Generate 10 structured facility reports for: {scenario_prompt}"}
     ]
     
-    try:
-        response = groq_client.chat.completions.create(
-            messages=messages,
-            model="mixtral-8x7b-32768",
-            temperature=0.7,
-            max_tokens=1000
-        )
-        resources = json.loads(response.choices[0].message.content)
-        return pd.DataFrame(resources)
-    except Exception as e:
-        st.error(f"Error generating resource data: {str(e)}")
-        return pd.DataFrame()
+    return generate_records(groq_client, messages, RESOURCE_SCHEMA, timeout=timeout, cancel_event=cancel_event)
 
-def generate_social_updates(groq_client, scenario_prompt):
+def generate_social_updates(groq_client, scenario_prompt, timeout=GENERATION_TIMEOUT, cancel_event=None):
     """Generate structured social media updates"""
     messages = [
         {"role": "system", "content": """You are a social media feed generator for Qatar's emergency management system. 
@@ -114,48 +158,73 @@ def generate_social_updates(groq_client, scenario_prompt):
         {"role": "user", "content": f"Generate 10 structured social updates for: {scenario_prompt}"}
     ]
     
-    try:
-        response = groq_client.chat.completions.create(
-            messages=messages,
-            model="mixtral-8x7b-32768",
-            temperature=0.7,
-            max_tokens=1000
-        )
-        updates = json.loads(response.choices[0].message.content)
-        return pd.DataFrame(updates)
-    except Exception as e:
-        st.error(f"Error generating social updates: {str(e)}")
-        return pd.DataFrame()
+    return generate_records(groq_client, messages, UPDATE_SCHEMA, timeout=timeout, cancel_event=cancel_event)
+
+def publish_scenario():
+    """Publish the generated frames to the shared store read by every ANTNA session"""
+    frames = {
+        name: normalize_admin_frame(name, df)
+        for name, df in [
+            ('alerts', st.session_state.disasters),
+            ('resources', st.session_state.resources),
+            ('updates', st.session_state.updates)
+        ]
+        if not df.empty
+    }
+    if frames:
+        version = publish_frames(**frames)
+        st.success(f"📡 Published to ANTNA (data version {version})")
+
+# Session state key, generator and label for each generated table
+GENERATORS = {
+    'disasters': (generate_disaster_data, "Disaster alerts"),
+    'resources': (generate_resource_data, "Resource data"),
+    'updates': (generate_social_updates, "Social updates")
+}
+
+def process_scenario(prompt, groq_client, on_result=None, timeout=GENERATION_TIMEOUT):
+    """
+    Generate all data with the three generators running concurrently.
+    Each table is stored (and passed to on_result) as soon as it finishes.
+    """
+    st.session_state.disasters = pd.DataFrame()
+    st.session_state.resources = pd.DataFrame()
+    st.session_state.updates = pd.DataFrame()
 
-def process_scenario(prompt, groq_client):
-    """Process scenario and generate all data"""
+    cancel_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(GENERATORS))
     try:
-        st.session_state.disasters = pd.DataFrame()
-        st.session_state.resources = pd.DataFrame()
-        st.session_state.updates = pd.DataFrame()
-
-        with st.spinner("Generating disaster alerts..."):
-            disasters_df = generate_disaster_data(groq_client, prompt)
-            if not disasters_df.empty:
-                st.session_state.disasters = disasters_df
-                st.success("✅ Disaster alerts generated!")
-        
-        with st.spinner("Generating resource data..."):
-            resources_df = generate_resource_data(groq_client, prompt)
-            if not resources_df.empty:
-                st.session_state.resources = resources_df
-                st.success("✅ Resource data generated!")
-        
-        with st.spinner("Generating social updates..."):
-            updates_df = generate_social_updates(groq_client, prompt)
-            if not updates_df.empty:
-                st.session_state.updates = updates_df
-                st.success("✅ Social updates generated!")
-        
+        futures = {
+            executor.submit(generator, groq_client, prompt, timeout, cancel_event): key
+            for key, (generator, _) in GENERATORS.items()
+        }
+        with st.spinner("Generating disaster alerts, resource data and social updates..."):
+            for future in as_completed(futures):
+                key = futures[future]
+                label = GENERATORS[key][1]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    st.error(f"Error generating {label.lower()}: {str(e)}")
+                    continue
+                if not df.empty:
+                    st.session_state[key] = df
+                    st.success(f"✅ {label} generated!")
+                    rejected = df.attrs.get('rejected')
+                    if rejected:
+                        st.warning(f"{label}: skipped {len(rejected)} invalid record(s)")
+                    if on_result is not None:
+                        on_result(key, df)
+
+        publish_scenario()
         return True
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return False
+    finally:
+        # Runs on a Streamlit stop/rerun too, so abandoned generations stop retrying
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 # Initialize session state with empty DataFrames
 if 'disasters' not in st.session_state:
@@ -184,6 +253,33 @@ st.markdown("""
 # Create tabs
 tab1, tab2 = st.tabs(["💭 Scenario Generator", "📊 Current Data"])
 
+# Data Viewer Tab (laid out first so generated tables can fill in while tab1 is still running)
+TABLE_HEADINGS = {
+    'disasters': "🚨 Active Disasters",
+    'resources': "🏥 Resource Levels",
+    'updates': "📱 Social Updates"
+}
+
+with tab2:
+    st.markdown("<h2>📊 Current Simulation Data</h2>", unsafe_allow_html=True)
+    table_slots = {key: st.empty() for key in TABLE_HEADINGS}
+    info_slot = st.empty()
+
+def render_table(key, df):
+    with table_slots[key].container():
+        st.markdown(f"<h3>{TABLE_HEADINGS[key]}</h3>", unsafe_allow_html=True)
+        st.dataframe(df, use_container_width=True)
+    info_slot.empty()
+
+for key in TABLE_HEADINGS:
+    if not st.session_state[key].empty:
+        render_table(key, st.session_state[key])
+
+if (st.session_state.disasters.empty and 
+    st.session_state.resources.empty and 
+    st.session_state.updates.empty):
+    info_slot.info("No simulation data available. Generate a scenario to see data here.")
+
 # Scenario Generator Tab
 with tab1:
     st.markdown("<h2>💭 Generate Emergency Scenario</h2>", unsafe_allow_html=True)
@@ -210,29 +306,10 @@ with tab1:
     
     if st.button("Generate Scenario", type="primary"):
         if prompt:
-            success = process_scenario(prompt, groq_client)
+            for slot in table_slots.values():
+                slot.empty()
+            success = process_scenario(prompt, groq_client, on_result=render_table)
             if success:
                 st.balloons()
         else:
             st.warning("Please enter a scenario description")
-
-# Data Viewer Tab
-with tab2:
-    st.markdown("<h2>📊 Current Simulation Data</h2>", unsafe_allow_html=True)
-    
-    if not st.session_state.disasters.empty:
-        st.markdown("<h3>🚨 Active Disasters</h3>", unsafe_allow_html=True)
-        st.dataframe(st.session_state.disasters, use_container_width=True)
-    
-    if not st.session_state.resources.empty:
-        st.markdown("<h3>🏥 Resource Levels</h3>", unsafe_allow_html=True)
-        st.dataframe(st.session_state.resources, use_container_width=True)
-    
-    if not st.session_state.updates.empty:
-        st.markdown("<h3>📱 Social Updates</h3>", unsafe_allow_html=True)
-        st.dataframe(st.session_state.updates, use_container_width=True)
-    
-    if (st.session_state.disasters.empty and 
-        st.session_state.resources.empty and 
-        st.session_state.updates.empty):
-        st.info("No simulation data available. Generate a scenario to see data here.")
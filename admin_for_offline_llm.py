@@ -1,15 +1,62 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 import subprocess
 import socket
 import json
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from offline_scheduler import FairScheduler, QueueFull
+from ollama_monitor import OllamaMonitor
+from offline_context import OfflineKnowledge
+from device_registry import DeviceRegistry
 
 app = Flask(__name__)
 CORS(app)
 
-# Global variables
-connected_devices = set()
-ollama_running = False
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
+OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', 'mistral')
+# Worker threads; each streaming chat holds one for the length of its generation
+SERVER_THREADS = int(os.environ.get('OFFLINE_HUB_THREADS', 64))
+
+# Most concurrent generations sent to Ollama (match OLLAMA_NUM_PARALLEL) and waiting-room size;
+# fewer slots are opened while fewer devices are connected, see size_scheduler()
+OLLAMA_PARALLELISM = int(os.environ.get('OFFLINE_HUB_PARALLELISM', 2))
+MAX_QUEUE = int(os.environ.get('OFFLINE_HUB_MAX_QUEUE', 32))
+MAX_QUEUE_PER_DEVICE = int(os.environ.get('OFFLINE_HUB_MAX_QUEUE_PER_DEVICE', 2))
+# Seconds a request may wait for a slot before giving up
+QUEUE_TIMEOUT = float(os.environ.get('OFFLINE_HUB_QUEUE_TIMEOUT', 120))
+
+scheduler = FairScheduler(parallelism=OLLAMA_PARALLELISM, max_queue=MAX_QUEUE, max_per_device=MAX_QUEUE_PER_DEVICE)
+
+# One pooled HTTP session to Ollama, shared by every request thread
+ollama_session = requests.Session()
+ollama_session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=SERVER_THREADS))
+
+# Ollama health is probed in the background; handlers only read the cached state
+ollama_monitor = OllamaMonitor(
+    ollama_session,
+    OLLAMA_URL,
+    OLLAMA_MODEL,
+    interval=float(os.environ.get('OLLAMA_HEALTH_INTERVAL', 10)),
+    keep_alive=os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+).start()
+# Seconds /start-ollama waits for the server to answer
+OLLAMA_START_TIMEOUT = 30
+
+# Prompts are grounded in the local data snapshot and kept short so local inference stays fast
+OFFLINE_PROMPT_TOKENS = int(os.environ.get('OFFLINE_HUB_PROMPT_TOKENS', 900))
+OFFLINE_ANSWER_TOKENS = int(os.environ.get('OFFLINE_HUB_ANSWER_TOKENS', 200))
+knowledge = OfflineKnowledge(token_budget=OFFLINE_PROMPT_TOKENS)
+
+# Devices silent for longer than this (seconds) are dropped; clients heartbeat every 30 s
+DEVICE_TTL = float(os.environ.get('OFFLINE_HUB_DEVICE_TTL', 120))
+devices = DeviceRegistry(ttl=DEVICE_TTL)
+
+def size_scheduler():
+    """One slot per active device, up to OLLAMA_PARALLELISM, so a lone phone gets the whole GPU"""
+    scheduler.resize(min(OLLAMA_PARALLELISM, devices.count()))
 
 def get_local_ip():
     try:
@@ -22,22 +69,52 @@ def get_local_ip():
         return '127.0.0.1'
 
 def check_ollama_status():
-    try:
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-        return result.returncode == 0
-    except Exception:
-        return False
+    return ollama_monitor.running
+
+def stream_ollama(prompt, system=None):
+    """Yield response text as Ollama streams it (NDJSON, one object per line)"""
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True,
+        "options": {"num_predict": OFFLINE_ANSWER_TOKENS}
+    }
+    if system:
+        # Kept identical between questions so Ollama can reuse the cached prefix
+        payload["system"] = system
+    with ollama_session.post(f'{OLLAMA_URL}/api/generate',
+                             json=payload,
+                             stream=True,
+                             timeout=(5, 300)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            try:
+                response_data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if response_data.get('error'):
+                raise RuntimeError(response_data['error'])
+            if response_data.get('response'):
+                yield response_data['response']
+            if response_data.get('done'):
+                return
+
+def sse_event(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
+def wants_stream(data):
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
 
 def start_ollama():
-    global ollama_running
+    """Start the Ollama server if needed and wait until it answers; the monitor then warms the model"""
     try:
         if check_ollama_status():
-            ollama_running = True
             return True
-            
-        subprocess.Popen(['ollama', 'run', 'mistral'])
-        ollama_running = True
-        return True
+
+        subprocess.Popen(['ollama', 'serve'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return ollama_monitor.wait_until_running(OLLAMA_START_TIMEOUT)
     except Exception as e:
         print(f"Error starting Ollama: {e}")
         return False
@@ -45,79 +122,127 @@ def start_ollama():
 @app.route('/')
 def home():
     local_ip = get_local_ip()
-    global ollama_running
-    ollama_running = check_ollama_status()
     
     return render_template('index.html', 
                          ip_address=local_ip,
-                         connected_devices=list(connected_devices),
-                         ollama_status=ollama_running)
+                         connected_devices=devices.device_ids(),
+                         ollama_status=check_ollama_status())
 
 @app.route('/start-ollama', methods=['POST'])
 def trigger_ollama():
     success = start_ollama()
     return jsonify({"success": success})
 
+@app.route('/ollama-status')
+def ollama_status():
+    return jsonify(ollama_monitor.status())
+
 @app.route('/chat', methods=['POST'])
 def chat():
-    global ollama_running
-    if not ollama_running:
-        ollama_running = check_ollama_status()
-    
-    if not ollama_running:
+    if not check_ollama_status():
+        ollama_monitor.wake()
         return jsonify({"error": "Ollama is not running"}), 400
     
-    data = request.json
+    data = request.json or {}
     message = data.get('message', '')
-    
+    device_id = data.get('device_id')
+    system, prompt = knowledge.build_prompt(message)
+    started = time.perf_counter()
+    size_scheduler()
+
+    try:
+        ticket = scheduler.submit(device_id)
+    except QueueFull:
+        devices.record_request(device_id, time.perf_counter() - started, error=True)
+        response = jsonify({"error": "The hub is busy, please try again shortly", "queue": scheduler.snapshot()})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+
+    # Streaming clients get their queue position, then each chunk as a server-sent event
+    if wants_stream(data):
+        def events():
+            failed = True
+            try:
+                waited = 0.0
+                while not scheduler.wait(ticket, timeout=1.0):
+                    waited += 1.0
+                    if waited >= QUEUE_TIMEOUT:
+                        yield sse_event({"error": "Timed out waiting in the queue"})
+                        return
+                    yield sse_event({"queued": scheduler.position(ticket) + 1})
+                for token in stream_ollama(prompt, system):
+                    yield sse_event({"token": token})
+                yield sse_event({"done": True})
+                failed = False
+            except Exception as e:
+                print(f"Error in chat stream: {str(e)}")
+                yield sse_event({"error": str(e)})
+            finally:
+                # Also runs when the client disconnects mid-answer
+                scheduler.release(ticket)
+                devices.record_request(device_id, time.perf_counter() - started, error=failed)
+
+        response = Response(stream_with_context(events()),
+                            mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        # release() is idempotent; this covers a client that leaves before the stream starts
+        response.call_on_close(lambda: scheduler.release(ticket))
+        return response
+
+    failed = True
     try:
-        import requests
-        
-        # Send request to Ollama
-        response = requests.post('http://localhost:11434/api/generate', 
-                               json={
-                                   "model": "mistral",
-                                   "prompt": message
-                               },
-                               stream=False)  # Disable streaming
-        
-        # Check if the response is valid
-        if response.status_code == 200:
-            # Get the last response in case of streaming
-            full_response = ""
-            for line in response.text.strip().split('\n'):
-                if line:
-                    try:
-                        response_data = json.loads(line)
-                        if 'response' in response_data:
-                            full_response += response_data['response']
-                    except json.JSONDecodeError:
-                        continue
-            
-            return jsonify({"response": full_response})
-        else:
-            return jsonify({"error": "Failed to get response from Ollama"}), 500
-            
+        if not scheduler.wait(ticket, timeout=QUEUE_TIMEOUT):
+            return jsonify({"error": "Timed out waiting in the queue"}), 503
+        response_text = "".join(stream_ollama(prompt, system))
+        failed = False
+        return jsonify({"response": response_text})
     except Exception as e:
         print(f"Error in chat endpoint: {str(e)}")
         return jsonify({"error": str(e)}), 500
+    finally:
+        scheduler.release(ticket)
+        devices.record_request(device_id, time.perf_counter() - started, error=failed)
+
+@app.route('/queue-status')
+def queue_status():
+    return jsonify(scheduler.snapshot())
 
 @app.route('/register-device', methods=['POST'])
 def register_device():
     device_id = request.json.get('device_id')
     if device_id:
-        connected_devices.add(device_id)
-        return jsonify({"success": True})
+        devices.register(device_id, address=request.remote_addr)
+        size_scheduler()
+        return jsonify({"success": True, "heartbeat_interval": DEVICE_TTL / 4})
     return jsonify({"success": False})
 
+@app.route('/heartbeat', methods=['POST'])
+def heartbeat():
+    # An unknown device (e.g. expired while the phone slept) is told to register again
+    success = devices.heartbeat(request.json.get('device_id'))
+    size_scheduler()
+    return jsonify({"success": success})
+
 @app.route('/unregister-device', methods=['POST'])
 def unregister_device():
-    device_id = request.json.get('device_id')
-    if device_id in connected_devices:
-        connected_devices.remove(device_id)
-        return jsonify({"success": True})
-    return jsonify({"success": False})
+    success = devices.unregister(request.json.get('device_id'))
+    size_scheduler()
+    return jsonify({"success": success})
+
+@app.route('/devices')
+def list_devices():
+    active = devices.snapshot()
+    return jsonify({"count": len(active), "devices": active, "queue": scheduler.snapshot()})
+
+def serve(host='0.0.0.0', port=5000):
+    """Serve the hub on a production WSGI server (waitress), or Flask's threaded server without it"""
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        print("waitress not installed; using Flask's threaded server")
+        app.run(host=host, port=port, threaded=True)
+    else:
+        waitress_serve(app, host=host, port=port, threads=SERVER_THREADS)
 
 if __name__ == '__main__':
-    ollama_running = check_ollama_status()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    serve()
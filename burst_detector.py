@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from schema import LOCAL_TZ, to_local_datetime
+
+ALERT_COLUMNS = ['type', 'severity', 'location', 'time', 'description']
+
+# Fast-to-baseline rate ratio at or above which a burst gets each severity (else Low)
+SEVERITY_RATIOS = (('High', 12.0), ('Medium', 6.0))
+SEVERITY_RANK = {'Low': 0, 'Medium': 1, 'High': 2}
+
+EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+class _PairState:
+    __slots__ = ('fast', 'slow', 'reports', 'updated', 'raised_at', 'raised_severity', 'sample', 'sample_trust')
+
+    def __init__(self, now):
+        self.fast = self.slow = self.reports = 0.0
+        self.updated = now
+        self.raised_at = None
+        self.raised_severity = None
+        self.sample = None
+        self.sample_trust = -1.0
+
+
+class BurstDetector:
+    """
+    Raises alerts when updates about one (location, emergency_type) pair
+    arrive much faster than that pair's own baseline.
+
+    Each pair keeps two exponentially decayed, trust-weighted counts: a fast
+    one (half-life `fast_minutes`) and a baseline (half-life
+    `baseline_minutes`). Both are updated in O(1) per update, so an alert is
+    raised by the update that crosses the threshold. A burst needs a fast
+    weighted count of at least `min_count` and a fast rate `ratio` times the
+    baseline rate (never below `baseline_floor_per_hour`, so a pair seen for
+    the first time needs a real spike). Pairs are re-alerted after
+    `cooldown_minutes`, or sooner if the severity goes up. At most `max_keys`
+    pairs are tracked; the least recently updated are forgotten first.
+    """
+
+    def __init__(self, fast_minutes=5, baseline_minutes=120, min_count=5.0, ratio=4.0,
+                 baseline_floor_per_hour=2.0, cooldown_minutes=30, max_keys=10_000, max_alerts=200):
+        self.fast_half_life = fast_minutes * 60
+        self.slow_half_life = baseline_minutes * 60
+        self.min_count = min_count
+        self.ratio = ratio
+        self.baseline_floor = baseline_floor_per_hour / 3600
+        self.cooldown = cooldown_minutes * 60
+        self.max_keys = max_keys
+        self.max_alerts = max_alerts
+        self._pairs = OrderedDict()
+        self._alerts = []
+        self._lock = threading.Lock()
+        self.stats = {'observed': 0, 'alerts': 0, 'evicted': 0}
+
+    def _rate(self, count, half_life):
+        # A decayed count settles at rate * half_life / ln 2 under a steady rate
+        return count * math.log(2) / half_life
+
+    def observe(self, location, emergency_type, trust=1.0, message=None, now=None):
+        """Count one update; returns an alert dict (alerts_df columns) if it completes a burst, else None"""
+        now = time.time() if now is None else now
+        key = (location, emergency_type)
+        with self._lock:
+            self.stats['observed'] += 1
+            state = self._pairs.get(key)
+            if state is None:
+                state = self._pairs[key] = _PairState(now)
+                if len(self._pairs) > self.max_keys:
+                    self._pairs.popitem(last=False)
+                    self.stats['evicted'] += 1
+            else:
+                self._pairs.move_to_end(key)
+                elapsed = max(now - state.updated, 0.0)
+                decay = 0.5 ** (elapsed / self.fast_half_life)
+                state.fast *= decay
+                state.reports *= decay
+                state.slow *= 0.5 ** (elapsed / self.slow_half_life)
+                state.updated = max(now, state.updated)
+                if state.fast < 1.0:
+                    # The previous burst has died down; pick a fresh example message
+                    state.sample, state.sample_trust = None, -1.0
+            state.fast += trust
+            state.slow += trust
+            state.reports += 1
+            if message and trust >= state.sample_trust:
+                state.sample, state.sample_trust = message, trust
+            return self._check(key, state, now)
+
+    def _check(self, key, state, now):
+        if state.fast < self.min_count:
+            return None
+        ratio = self._rate(state.fast, self.fast_half_life) / max(
+            self._rate(state.slow, self.slow_half_life), self.baseline_floor)
+        if ratio < self.ratio:
+            return None
+        severity = next((name for name, threshold in SEVERITY_RATIOS if ratio >= threshold), 'Low')
+        cooling = state.raised_at is not None and now - state.raised_at < self.cooldown
+        if cooling and SEVERITY_RANK[severity] <= SEVERITY_RANK[state.raised_severity]:
+            return None
+        state.raised_at, state.raised_severity = now, severity
+
+        location, emergency_type = key
+        description = (f"Sudden rise in reports: about {state.reports:.0f} recent reports, "
+                       f"{ratio:.0f}x the usual rate"
+                       + (f'. Latest from a trusted source: "{state.sample}"' if state.sample else ''))
+        alert = {
+            'type': emergency_type,
+            'severity': severity,
+            'location': location,
+            'time': datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M'),
+            'description': description,
+        }
+        self._alerts.append(alert)
+        del self._alerts[:-self.max_alerts]
+        self.stats['alerts'] += 1
+        return alert
+
+    def observe_frame(self, df, now=None):
+        """
+        Feed a frame of updates (in arrival order); returns the alerts raised.
+        Updates are counted at their own timestamp when the frame has one
+        (missing or unparseable ones at `now`), so a replayed backlog is not
+        mistaken for a burst.
+        """
+        trust = pd.to_numeric(df['trust_score'], errors='coerce').fillna(0.5) if 'trust_score' in df else [1.0] * len(df)
+        if 'timestamp' in df:
+            local = to_local_datetime(df['timestamp']).dt.tz_localize(LOCAL_TZ)
+            seconds = (local - EPOCH).dt.total_seconds()
+            times = seconds.fillna(time.time() if now is None else now).tolist()
+        else:
+            times = [now] * len(df)
+        alerts = []
+        for location, emergency_type, weight, message, at in zip(
+                df['location'].astype(str), df['emergency_type'].astype(str), trust, df['message'], times):
+            alert = self.observe(location, emergency_type, float(weight), message, at)
+            if alert is not None:
+                alerts.append(alert)
+        return alerts
+
+    def alerts_frame(self):
+        """Alerts raised so far (newest last, at most max_alerts) in the alerts_df schema"""
+        with self._lock:
+            return pd.DataFrame(list(self._alerts), columns=ALERT_COLUMNS)
@@ -1,6 +1,31 @@
 import pandas as pd
 from datetime import datetime, timedelta
 
+# Common locations in Doha used as route origins
+DOHA_LOCATIONS = {
+    "Doha City Center": [25.3548, 51.1839],
+    "West Bay": [25.3287, 51.5309],
+    "The Pearl": [25.3741, 51.5503],
+    "Katara Cultural Village": [25.3594, 51.5277],
+    "Hamad International Airport": [25.2608, 51.6138],
+    "Education City": [25.3149, 51.4400],
+    "Souq Waqif": [25.2867, 51.5333],
+    "Aspire Zone": [25.2684, 51.4481],
+    "Msheireb Downtown": [25.2897, 51.5335],
+    "Al Waab": [25.2590, 51.4782]
+}
+
+# Approximate centres of the places named in alerts and updates
+PLACE_COORDINATES = {
+    "Al Wakrah": [25.1659, 51.5976],
+    "Doha": [25.2854, 51.5310],
+    "Al Khor": [25.6839, 51.4969],
+    "Al Rayyan": [25.2919, 51.4244],
+    "Lusail": [25.4200, 51.4900],
+    "Mesaieed": [24.9909, 51.5493],
+    "Dukhan": [25.4250, 50.7850]
+}
+
 def generate_data():
     # Alerts data
     alerts_data = {
@@ -77,4 +102,22 @@ def generate_data():
     }
     social_updates_df = pd.DataFrame(social_updates_data)
 
-    return alerts_df, shelters_df, resources_df, social_updates_df
\ No newline at end of file
+    return alerts_df, shelters_df, resources_df, social_updates_df
+
+
+def generate_preparedness_guidance():
+    # Preparedness guidance shown in the Prep tab, as plain sentences for retrieval
+    return [
+        'Store water: 5 litres per person per day.',
+        'Keep non-perishable food and a first aid kit ready.',
+        'Portable fans and cooling devices help during extreme heat.',
+        'Wear dust masks during sandstorms and dust storms.',
+        'Keep an emergency contact list, a portable radio and a charged power bank.',
+        'Keep important documents in a waterproof container.',
+        'Protect electronics from sand and dust.',
+        'Police, Ambulance and Civil Defence: call 999. Hamad Hospital: 4439 5777. Kahramaa (Utilities): 991.',
+        'Before an emergency: maintain emergency supplies and learn evacuation routes.',
+        'During an emergency: stay informed through official channels, follow evacuation orders immediately, help others if safe to do so.',
+        'After an emergency: check on family and neighbors, document any damage, follow official recovery guidance.',
+        'Avoid driving in low visibility; use hazard lights and follow traffic diversions.'
+    ]
@@ -0,0 +1,176 @@
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from data import generate_data
+from data_store import DataStore, FeedReader, merge_resources
+from schema import ARROW_AVAILABLE, apply_schema, load_arrow, save_arrow
+
+# Live feeds are re-read at most this often (seconds) even without a version bump
+LIVE_FEED_TTL = int(os.environ.get('ANTNA_LIVE_FEED_TTL', 60))
+
+# Store feeds the ingest pipeline appends to; they move without a data version bump
+LIVE_FEEDS = ('updates', 'derived_alerts')
+
+# Burst alerts derived by the ingest pipeline are shown for this long (hours)
+DERIVED_ALERT_HOURS = float(os.environ.get('ANTNA_DERIVED_ALERT_HOURS', 6))
+
+# When set (and pyarrow is installed), each published version is also kept as
+# typed Arrow files here, so other app processes memory-map it instead of re-reading SQLite
+ARROW_DIR = os.environ.get('ANTNA_ARROW_DIR')
+ARROW_KEEP_VERSIONS = 2
+
+
+@st.cache_resource(show_spinner=False)
+def get_data_store():
+    return DataStore()
+
+
+def data_version():
+    """Version counter of the shared store; bumped by every admin publish"""
+    return get_data_store().version()
+
+
+@st.cache_resource(show_spinner=False)
+def get_feed_reader(name):
+    return FeedReader(get_data_store(), name)
+
+
+def poll_feeds():
+    """Fetch rows appended to the live feeds since the last poll; returns their cursors"""
+    readers = [get_feed_reader(name) for name in LIVE_FEEDS]
+    for reader in readers:
+        reader.poll()
+    return tuple(reader.cursor for reader in readers)
+
+
+def publish_frames(**frames):
+    """Publish frames (alerts=, resources=, updates=) to the shared store and return the new version"""
+    return get_data_store().write_frames(**frames)
+
+
+def _arrow_snapshot(version):
+    directory = os.path.join(ARROW_DIR, f'v{version}')
+    if os.path.isdir(directory):
+        return load_arrow(directory)
+    frames = {name: apply_schema(name, df) for name, df in get_data_store().read_frames(version).items()}
+    save_arrow(frames, directory)
+    for entry in os.listdir(ARROW_DIR):
+        if entry.startswith('v') and entry[1:].isdigit() and int(entry[1:]) <= version - ARROW_KEEP_VERSIONS:
+            shutil.rmtree(os.path.join(ARROW_DIR, entry), ignore_errors=True)
+    return frames
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_published_frames(version):
+    """Typed frames of a published version ({} before the first publish)"""
+    if not version:
+        return {}
+    if ARROW_DIR and ARROW_AVAILABLE:
+        return _arrow_snapshot(version)
+    return {name: apply_schema(name, df) for name, df in get_data_store().read_frames(version).items()}
+
+
+# Process-wide scope: static reference data, shared read-only by every session.
+# cache_resource hands out the same objects instead of copies, so callers must not mutate them.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_reference_data(version):
+    _, shelters_df, resources_df, _ = generate_data()
+    published = load_published_frames(version)
+    if 'resources' in published and not published['resources'].empty:
+        resources_df = merge_resources(apply_schema('resources', resources_df), published['resources'])
+    return apply_schema('shelters', shelters_df), apply_schema('resources', resources_df)
+
+
+# TTL scope: live feeds, refreshed on a timer, a version bump or new feed rows.
+# Feed rows always come after the published ones, so the frames only grow between publishes.
+@st.cache_resource(show_spinner=False, ttl=LIVE_FEED_TTL, max_entries=4)
+def load_live_feeds(version, feed_cursors):
+    alerts_df, _, _, social_updates_df = generate_data()
+    published = load_published_frames(version)
+    if not published.get('alerts', pd.DataFrame()).empty:
+        alerts_df = published['alerts']
+    ingested = get_feed_reader('updates').frame
+    if not published.get('updates', pd.DataFrame()).empty:
+        social_updates_df = published['updates']
+    elif not ingested.empty:
+        # Live ingest replaces the generated demo updates
+        social_updates_df = social_updates_df.iloc[:0]
+    if not ingested.empty:
+        social_updates_df = pd.concat([social_updates_df, ingested], ignore_index=True)
+    derived = get_feed_reader('derived_alerts').frame
+    if not derived.empty:
+        derived = apply_schema('derived_alerts', derived)
+        derived = derived[derived['time'] >= pd.Timestamp.now() - pd.Timedelta(hours=DERIVED_ALERT_HOURS)]
+        # A pair re-alerted at higher severity shows only its latest alert. Derived alerts go
+        # after the published ones, so a new burst extends alerts_df rather than shifting it.
+        derived = derived.drop_duplicates(['type', 'location'], keep='last')
+        alerts_df = pd.concat([apply_schema('alerts', alerts_df), derived], ignore_index=True)
+    return apply_schema('alerts', alerts_df), apply_schema('updates', social_updates_df)
+
+
+@st.cache_resource(show_spinner=False)
+def read_text_file(file_name, mtime):
+    with open(file_name) as f:
+        return f.read()
+
+
+def load_css(file_name):
+    css = read_text_file(file_name, os.path.getmtime(file_name))
+    st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
+
+
+def get_frames():
+    """Return (alerts_df, shelters_df, resources_df, social_updates_df) for the current data version"""
+    version = data_version()
+    shelters_df, resources_df = load_reference_data(version)
+    alerts_df, social_updates_df = load_live_feeds(version, poll_feeds())
+    return alerts_df, shelters_df, resources_df, social_updates_df
+
+
+# Session scope: per-user state kept in st.session_state
+def session_value(key, default=None):
+    if key not in st.session_state:
+        st.session_state[key] = default() if callable(default) else default
+    return st.session_state[key]
+
+
+class RerunTimer:
+    """Records how long each named section of a Streamlit rerun takes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.notes = {}
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0.0) + time.perf_counter() - start
+
+    def note(self, name, value):
+        """Attach an extra measurement (e.g. LLM latency) to this rerun's debug panel"""
+        self.notes[name] = value
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def render_debug_panel(self):
+        """Show the timings in the sidebar when debugging is on (?debug=1 or ANTNA_DEBUG=1)"""
+        if st.query_params.get('debug') != '1' and os.environ.get('ANTNA_DEBUG') != '1':
+            return
+        with st.sidebar.expander("⏱️ Rerun timings", expanded=True):
+            for name, seconds in self.sections.items():
+                st.text(f"{name:<16}{seconds * 1000:8.1f} ms")
+            st.text(f"{'total':<16}{self.total * 1000:8.1f} ms")
+            for name, value in self.notes.items():
+                st.text(f"{name:<16}{value:>11}")
+            st.caption(f"Data version: {data_version()}")
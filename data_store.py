@@ -0,0 +1,265 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DATA_STORE_PATH = os.environ.get('ANTNA_DATA_STORE', 'antna_data.sqlite')
+
+FRAMES = ('alerts', 'resources', 'updates')
+
+# Column names the admin generators use, mapped onto the schema main.py reads
+ADMIN_COLUMN_MAP = {
+    'resources': {
+        'facility': 'location',
+        'water': 'water_supply',
+        'food': 'food_supply',
+        'medical': 'medical_kits',
+    },
+    'updates': {
+        'source_type': 'account_type',
+    },
+}
+
+
+def normalize_admin_frame(name, df):
+    """Rename admin-generated columns to the main app schema and fill the columns it expects"""
+    df = df.rename(columns=ADMIN_COLUMN_MAP.get(name, {})).copy()
+    if name == 'updates':
+        if 'source' not in df:
+            df['source'] = 'Twitter'
+        if 'emergency_type' not in df:
+            df['emergency_type'] = 'Multiple'
+        if 'verified' in df and not pd.api.types.is_bool_dtype(df['verified']):
+            df['verified'] = df['verified'].astype(str).str.lower().isin(['true', '1', 'yes'])
+        for column in ('trust_score', 'engagement'):
+            if column in df:
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+    if name == 'resources':
+        for column in ('water_supply', 'food_supply', 'medical_kits', 'beds', 'current_occupancy', 'generators'):
+            if column in df:
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def merge_resources(generated, published):
+    """Published resource rows, plus generated rows for shelters the published snapshot does not cover"""
+    published = published[published['location'].notna()]
+    missing = generated[~generated['location'].isin(published['location'])]
+    return pd.concat([published.reindex(columns=generated.columns), missing], ignore_index=True)
+
+
+def _column_type(series):
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _column_values(series):
+    """Values of one column as Python objects sqlite3 can bind (NULL for missing)"""
+    if pd.api.types.is_bool_dtype(series) and not series.isna().any():
+        return series.astype(int).tolist()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(v) else str(v) for v in series]
+    values = series.astype(object).where(series.notna(), None).tolist()
+    return [int(v) if isinstance(v, (bool, np.bool_)) else v for v in values]
+
+
+def _rows(df):
+    return zip(*(_column_values(df[column]) for column in df.columns))
+
+
+def _create_table(db, table_name, df):
+    """Create and fill a table inside the caller's transaction (to_sql would commit it)"""
+    columns = ', '.join(f'"{column}" {_column_type(df[column])}' for column in df.columns)
+    # A name for an unpublished version can only be left over from a failed publish
+    db.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    db.execute(f'CREATE TABLE "{table_name}" ({columns})')
+    _insert_rows(db, table_name, df)
+
+
+def _insert_rows(db, table_name, df):
+    if not len(df.columns):
+        return
+    placeholders = ', '.join('?' * len(df.columns))
+    names = ', '.join(f'"{column}"' for column in df.columns)
+    db.executemany(f'INSERT INTO "{table_name}" ({names}) VALUES ({placeholders})', _rows(df))
+
+
+class DataStore:
+    """
+    Shared SQLite store (WAL mode) that the admin app publishes to and every
+    main.py session reads from.
+
+    Each publish writes new tables suffixed with the next version and then
+    flips the version row in one transaction, so readers always see a
+    complete snapshot and never block the writer. Readers poll version(),
+    which is a single-row lookup, and only reload frames when it changes.
+
+    Streamed rows (ingested updates, derived alerts) go to append-only feeds
+    beside the versioned frames instead. append_frame() adds rows to a feed
+    and advances its cursor (the last rowid) without bumping version(), so
+    caches keyed on the version survive a busy feed; readers poll
+    feed_cursor() and fetch only the rows past the cursor they last saw.
+    Each feed keeps its newest `feed_rows` rows.
+    """
+
+    def __init__(self, path=DATA_STORE_PATH, keep_versions=2, feed_rows=200_000):
+        self.path = path
+        self.keep_versions = keep_versions
+        self.feed_rows = feed_rows
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER, updated REAL)')
+            db.execute('CREATE TABLE IF NOT EXISTS frames (version INTEGER, name TEXT, table_name TEXT, PRIMARY KEY (version, name))')
+            db.execute('CREATE TABLE IF NOT EXISTS feeds (name TEXT PRIMARY KEY, table_name TEXT, cursor INTEGER)')
+            db.execute('INSERT OR IGNORE INTO meta VALUES (0, 0, 0)')
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def version(self):
+        return self._connect().execute('SELECT version FROM meta WHERE id = 0').fetchone()[0]
+
+    def write_frames(self, **frames):
+        """Publish any of alerts=, resources=, updates= (or other named frames); frames not given carry over"""
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            current = db.execute('SELECT version FROM meta WHERE id = 0').fetchone()[0]
+            new_version = current + 1
+            carried = self._carried(db, current)
+            # Every frame of the previous version carries over, not only the admin FRAMES
+            for name in sorted(set(FRAMES) | set(carried) | set(frames)):
+                df = frames.get(name)
+                if df is None:
+                    if name in carried:
+                        db.execute('INSERT INTO frames (version, name, table_name) VALUES (?, ?, ?)',
+                                   (new_version, name, carried[name]))
+                    continue
+                table_name = f'{name}_v{new_version}'
+                _create_table(db, table_name, df)
+                db.execute('INSERT INTO frames (version, name, table_name) VALUES (?, ?, ?)',
+                           (new_version, name, table_name))
+            db.execute('UPDATE meta SET version = ?, updated = ? WHERE id = 0', (new_version, time.time()))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._prune(new_version)
+        return new_version
+
+    def _carried(self, db, version):
+        return dict(db.execute('SELECT name, table_name FROM frames WHERE version = ?', (version,)))
+
+    def append_frame(self, name, df):
+        """Append the rows of df to the `name` feed in one transaction; returns the feed's new cursor"""
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT table_name FROM feeds WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                table_name = f'feed_{name}'
+                _create_table(db, table_name, df)
+            else:
+                table_name = row[0]
+                columns = [column[1] for column in db.execute(f'PRAGMA table_info("{table_name}")')]
+                _insert_rows(db, table_name, df.reindex(columns=columns))
+            cursor = db.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+            # The newest row is always kept, so rowids (and cursors) never go back
+            db.execute(f'DELETE FROM "{table_name}" WHERE rowid <= ?', (cursor - self.feed_rows,))
+            db.execute('INSERT OR REPLACE INTO feeds VALUES (?, ?, ?)', (name, table_name, cursor))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return cursor
+
+    def feed_cursor(self, name):
+        """Last rowid appended to the `name` feed (0 before the first append); a single-row lookup"""
+        row = self._connect().execute('SELECT cursor FROM feeds WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def read_feed(self, name, after=0):
+        """Return (rows appended to the `name` feed after cursor `after`, the current cursor)"""
+        db = self._connect()
+        db.execute('BEGIN')
+        try:
+            row = db.execute('SELECT table_name, cursor FROM feeds WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                return pd.DataFrame(), 0
+            table_name, cursor = row
+            df = pd.read_sql_query(
+                f'SELECT * FROM "{table_name}" WHERE rowid > ? AND rowid <= ? ORDER BY rowid', db, params=(after, cursor)
+            )
+            return df, cursor
+        finally:
+            db.commit()
+
+    def _prune(self, version):
+        # Drop tables no longer referenced by the last keep_versions versions
+        db = self._connect()
+        oldest = version - self.keep_versions + 1
+        live = {row[0] for row in db.execute('SELECT table_name FROM frames WHERE version >= ?', (oldest,))}
+        stale = {row[0] for row in db.execute('SELECT table_name FROM frames WHERE version < ?', (oldest,))}
+        with db:
+            for table_name in stale - live:
+                db.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            db.execute('DELETE FROM frames WHERE version < ?', (oldest,))
+
+    def read_frames(self, version=None):
+        """Return {name: DataFrame} for the given (default: current) version"""
+        db = self._connect()
+        # One read transaction, so a concurrent publish cannot prune tables mid-read
+        db.execute('BEGIN')
+        try:
+            if version is None:
+                version = self.version()
+            return {
+                name: pd.read_sql_query(f'SELECT * FROM "{table_name}"', db)
+                for name, table_name in self._carried(db, version).items()
+            }
+        finally:
+            db.commit()
+
+
+class FeedReader:
+    """
+    In-memory copy of one store feed, brought up to date by fetching only the
+    rows past the last cursor seen. Rows are only ever appended to `frame`
+    (count-based consumers such as the retrievers stay incremental) until it
+    holds twice `max_rows`, when the oldest rows are dropped in one go.
+    """
+
+    def __init__(self, store, name, max_rows=100_000):
+        self.store = store
+        self.name = name
+        self.max_rows = max_rows
+        self.cursor = 0
+        self.frame = pd.DataFrame()
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Fetch new rows if the feed moved on; returns the (possibly unchanged) frame"""
+        with self._lock:
+            cursor = self.store.feed_cursor(self.name)
+            if cursor < self.cursor:
+                # The store was recreated; start over
+                self.cursor, self.frame = 0, pd.DataFrame()
+            if cursor > self.cursor:
+                rows, self.cursor = self.store.read_feed(self.name, after=self.cursor)
+                frame = pd.concat([self.frame, rows], ignore_index=True) if len(self.frame) else rows
+                if len(frame) > 2 * self.max_rows:
+                    frame = frame.iloc[-self.max_rows:].reset_index(drop=True)
+                self.frame = frame
+            return self.frame
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class DeviceRegistry:
+    """
+    Devices connected to the offline hub, kept in last-seen order.
+
+    Every register, heartbeat or chat request refreshes a device; devices
+    silent for longer than `ttl` seconds (dead battery, dropped Wi-Fi) are
+    evicted from the front of the order on the next access, so listing and
+    counting never scan stale entries.
+    """
+
+    def __init__(self, ttl=120.0):
+        self.ttl = ttl
+        self._devices = OrderedDict()  # device_id -> stats, least recently seen first
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._devices:
+            device_id, device = next(iter(self._devices.items()))
+            if now - device['last_seen'] <= self.ttl:
+                break
+            del self._devices[device_id]
+
+    def _touch(self, device_id, now, address=None):
+        device = self._devices.get(device_id)
+        if device is None:
+            device = self._devices[device_id] = {
+                'device_id': device_id,
+                'address': address,
+                'connected_at': now,
+                'last_seen': now,
+                'requests': 0,
+                'errors': 0,
+                'total_latency': 0.0,
+                'max_latency': 0.0,
+            }
+        else:
+            self._devices.move_to_end(device_id)
+            device['last_seen'] = now
+            if address:
+                device['address'] = address
+        return device
+
+    def register(self, device_id, address=None):
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            self._touch(device_id, now, address)
+
+    def heartbeat(self, device_id):
+        """Refresh a device; False if it is unknown (expired or never registered)"""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if device_id not in self._devices:
+                return False
+            self._touch(device_id, now)
+            return True
+
+    def unregister(self, device_id):
+        with self._lock:
+            return self._devices.pop(device_id, None) is not None
+
+    def record_request(self, device_id, latency, error=False):
+        """Count a finished chat request (and treat it as a heartbeat)"""
+        if not device_id:
+            return
+        now = time.time()
+        with self._lock:
+            device = self._touch(device_id, now)
+            device['requests'] += 1
+            device['errors'] += int(error)
+            device['total_latency'] += latency
+            device['max_latency'] = max(device['max_latency'], latency)
+
+    def count(self):
+        with self._lock:
+            self._evict(time.time())
+            return len(self._devices)
+
+    def device_ids(self):
+        with self._lock:
+            self._evict(time.time())
+            return list(self._devices)
+
+    def snapshot(self):
+        """Active devices, most recently seen first, with their request stats"""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            devices = [dict(device) for device in reversed(self._devices.values())]
+        for device in devices:
+            device['idle_s'] = round(now - device['last_seen'], 1)
+            device['avg_latency'] = device['total_latency'] / device['requests'] if device['requests'] else None
+        return devices
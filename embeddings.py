@@ -0,0 +1,272 @@
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from retriever import tokenize
+
+# Small crisis-domain lexicon so the hashing encoder can bridge common paraphrases
+# ("drive south" -> traffic on Al Wakrah Road) without a neural model.
+CONCEPTS = {
+    'travel': {'drive', 'driving', 'road', 'traffic', 'route', 'highway', 'car', 'diverted', 'commute', 'travel'},
+    'south': {'south', 'southern', 'wakrah', 'wakra', 'mesaieed', 'airport'},
+    'north': {'north', 'northern', 'khor', 'lusail', 'bayt', 'shamal'},
+    'visibility': {'visibility', 'visible', 'sand', 'sandstorm', 'dust', 'fog'},
+    'safety': {'safe', 'danger', 'dangerous', 'warning', 'alert', 'risk', 'avoid'},
+    'heat': {'heat', 'hot', 'temperature', 'exhaustion', 'cooling', 'fan'},
+    'flood': {'flood', 'flooding', 'rain', 'rainfall', 'drain', 'water'},
+    'medical': {'medical', 'hospital', 'ambulance', 'injury', 'first', 'aid', 'kit', 'health'},
+    'shelter': {'shelter', 'evacuation', 'evacuate', 'stadium', 'arena', 'center'},
+}
+_TERM_CONCEPTS = {}
+for _concept, _terms in CONCEPTS.items():
+    for _term in _terms:
+        _TERM_CONCEPTS.setdefault(_term, []).append(_concept)
+
+
+def _bucket(feature, dim):
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+
+class HashingEncoder:
+    """
+    Air-gapped fallback encoder: signed feature hashing of words, concepts and
+    character trigrams into a fixed-size, L2-normalized vector.
+    """
+
+    def __init__(self, dim=512, concept_weight=2.0, trigram_weight=0.3):
+        self.dim = dim
+        self.concept_weight = concept_weight
+        self.trigram_weight = trigram_weight
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            row = vectors[i]
+            for token in tokenize(text):
+                idx, sign = _bucket('w:' + token, self.dim)
+                row[idx] += sign
+                for concept in _TERM_CONCEPTS.get(token, ()):
+                    idx, sign = _bucket('c:' + concept, self.dim)
+                    row[idx] += sign * self.concept_weight
+                padded = f'#{token}#'
+                for j in range(len(padded) - 2):
+                    idx, sign = _bucket('t:' + padded[j:j + 3], self.dim)
+                    row[idx] += sign * self.trigram_weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class SentenceTransformerEncoder:
+    """Local sentence-transformers model loaded from disk (no network needed once cached)"""
+
+    def __init__(self, model_name_or_path='all-MiniLM-L6-v2'):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name_or_path)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        vectors = self.model.encode(list(texts), batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def load_encoder(model_name_or_path=None):
+    """Return a local neural encoder if one is available, else the hashing fallback"""
+    if model_name_or_path:
+        try:
+            return SentenceTransformerEncoder(model_name_or_path)
+        except Exception as e:
+            print(f"Falling back to hashing encoder: {e}")
+    return HashingEncoder()
+
+
+class IVFIndex:
+    """Inverted-file index with int8 scalar-quantized vectors for approximate search"""
+
+    def __init__(self, vectors, n_lists=64, iterations=10, seed=0):
+        n_lists = max(1, min(n_lists, len(vectors)))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = vectors[assign == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        self.centroids = centroids
+        self.assign = np.argmax(vectors @ centroids.T, axis=1)
+        self.codes = np.clip(np.round(vectors * 127), -127, 127).astype(np.int8)
+        self.lists = [np.flatnonzero(self.assign == c) for c in range(n_lists)]
+        self.size = len(vectors)
+
+    def search(self, queries, k=5, n_probe=4):
+        results = []
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :n_probe]
+        for query, lists in zip(queries, probes):
+            ids = np.concatenate([self.lists[c] for c in lists])
+            if not len(ids):
+                results.append((ids, np.array([], dtype=np.float32)))
+                continue
+            scores = (self.codes[ids].astype(np.float32) @ query) / 127
+            top = np.argsort(-scores)[:k]
+            results.append((ids[top], scores[top]))
+        return results
+
+
+class EmbeddingIndex:
+    """
+    Matrix of document embeddings with per-document metadata, appended to per
+    source; a source whose text list was replaced rather than extended is
+    dropped and re-embedded by sync().
+
+    With a path the matrix lives in a memory-mapped .npy file that grows by
+    doubling, and metadata is kept in a JSON sidecar; without one it is in memory.
+    """
+
+    def __init__(self, encoder=None, path=None, initial_capacity=1024):
+        self.encoder = encoder or HashingEncoder()
+        self.path = path
+        self.meta = []
+        self._counts = {}
+        self._ends = {}  # source -> (first text, last text) of what was indexed
+        self._ivf = None
+        self._lock = threading.Lock()
+        self._vectors = self._allocate(initial_capacity)
+
+    def __len__(self):
+        return len(self.meta)
+
+    @property
+    def vectors(self):
+        return self._vectors[:len(self.meta)]
+
+    def _allocate(self, capacity):
+        shape = (capacity, self.encoder.dim)
+        if self.path is None:
+            return np.zeros(shape, dtype=np.float32)
+        tmp_path = self.path + '.tmp.npy'
+        vectors = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+        os.replace(tmp_path, self.path)
+        return vectors
+
+    def _grow(self, needed):
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        old = np.array(self.vectors)
+        self._vectors = self._allocate(capacity)
+        self._vectors[:len(old)] = old
+
+    def add(self, texts, source, batch_size=256):
+        """Embed texts in batches and append them under the given source label"""
+        texts = [str(t) for t in texts]
+        if not texts:
+            return
+        start = len(self.meta)
+        self._grow(start + len(texts))
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i:i + batch_size]
+            self._vectors[start + i:start + i + len(batch)] = self.encoder.encode(batch)
+        self.meta.extend({'source': source, 'text': t} for t in texts)
+        self._counts[source] = self._counts.get(source, 0) + len(texts)
+        first = self._ends.get(source, (texts[0], None))[0]
+        self._ends[source] = (first, texts[-1])
+        self._ivf = None
+
+    def remove(self, source):
+        """Drop every document of the given source, compacting the matrix"""
+        keep = [i for i, m in enumerate(self.meta) if m['source'] != source]
+        if len(keep) == len(self.meta):
+            return
+        self._vectors[:len(keep)] = self._vectors[keep]
+        self.meta = [self.meta[i] for i in keep]
+        self._counts.pop(source, None)
+        self._ends.pop(source, None)
+        self._ivf = None
+
+    def sync(self, source, texts):
+        """
+        Embed only the texts beyond those already indexed for source; if the
+        list no longer starts with the indexed texts, re-embed the source.
+        """
+        texts = [str(t) for t in texts]
+        with self._lock:
+            done = self._counts.get(source, 0)
+            if done and (len(texts) < done or (texts[0], texts[done - 1]) != self._ends.get(source)):
+                # Replaced, shrunk or prepended to rather than appended to
+                self.remove(source)
+                done = 0
+            if len(texts) > done:
+                self.add(texts[done:], source)
+
+    def build_ivf(self, n_lists=64, iterations=10):
+        with self._lock:
+            self._ivf = IVFIndex(self.vectors, n_lists=n_lists, iterations=iterations)
+            return self._ivf
+
+    def search(self, queries, k=5, sources=None, n_probe=4):
+        """
+        Batched cosine search. Returns one list of (score, meta) per query.
+        Uses the IVF index when one has been built and is still current.
+        """
+        single = isinstance(queries, str)
+        if single:
+            queries = [queries]
+        query_vectors = self.encoder.encode(queries)
+        with self._lock:
+            return self._search(query_vectors, single, k, sources, n_probe)
+
+    def _search(self, query_vectors, single, k, sources, n_probe):
+        if not len(self.meta):
+            return [] if single else [[] for _ in query_vectors]
+        if self._ivf is not None and self._ivf.size == len(self.meta) and sources is None:
+            candidates = self._ivf.search(query_vectors, k=k, n_probe=n_probe)
+        else:
+            scores = query_vectors @ self.vectors.T
+            if sources is not None:
+                mask = np.array([m['source'] in sources for m in self.meta])
+                scores[:, ~mask] = -np.inf
+            kk = min(k, scores.shape[1])
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            candidates = []
+            for row, ids in zip(scores, top):
+                ids = ids[np.argsort(-row[ids])]
+                candidates.append((ids, row[ids]))
+
+        results = [
+            [(float(s), self.meta[i]) for i, s in zip(ids, row_scores) if np.isfinite(s)]
+            for ids, row_scores in candidates
+        ]
+        return results[0] if single else results
+
+    def save(self):
+        if self.path is None:
+            return
+        self._vectors.flush()
+        with open(self.path + '.meta.json', 'w') as f:
+            json.dump({'counts': self._counts, 'meta': self.meta}, f)
+
+    @classmethod
+    def load(cls, path, encoder=None):
+        index = cls.__new__(cls)
+        index.encoder = encoder or HashingEncoder()
+        index.path = path
+        index._ivf = None
+        index._lock = threading.Lock()
+        index._vectors = np.load(path, mmap_mode='r+')
+        with open(path + '.meta.json') as f:
+            saved = json.load(f)
+        index.meta = saved['meta']
+        index._counts = saved['counts']
+        index._ends = {}
+        for m in index.meta:
+            first = index._ends.get(m['source'], (m['text'], None))[0]
+            index._ends[m['source']] = (first, m['text'])
+        return index
@@ -0,0 +1,78 @@
+import threading
+
+import numpy as np
+
+RESOURCE_COLUMNS = ['water_supply', 'food_supply', 'medical_kits', 'generators', 'beds', 'last_updated']
+
+
+def status_class(occupancy_pct):
+    """CSS status class per facility: active below 60% occupancy, busy below 90%, else full"""
+    return np.select(
+        [occupancy_pct < 60, occupancy_pct < 90],
+        ['status-active', 'status-busy'],
+        default='status-full'
+    )
+
+
+def add_derived_columns(df):
+    df['occupancy_pct'] = df['current'] / df['capacity'] * 100
+    df['remaining_capacity'] = (df['capacity'] - df['current']).clip(lower=0)
+    df['status_class'] = status_class(df['occupancy_pct'].to_numpy())
+    return df
+
+
+class FacilityTable:
+    """
+    Shelters joined with their resources, indexed by facility name, with
+    occupancy %, remaining capacity and status class precomputed.
+
+    sync() rebuilds the table only when the shelter list changes; a new
+    resources frame (an admin publish) just rewrites the rows whose resource
+    values changed. The table is shared between sessions, so readers get it
+    through sync() and must treat it as read-only.
+    """
+
+    def __init__(self):
+        self.table = None
+        self._shelters = None
+        self._resources = None
+        self._lock = threading.Lock()
+        self.stats = {'rebuilds': 0, 'rows_updated': 0}
+
+    def _resource_frame(self, resources_df):
+        resources = resources_df.drop_duplicates('location', keep='last').set_index('location')
+        return resources.reindex(columns=RESOURCE_COLUMNS)
+
+    def _rebuild(self, shelters_df, resources_df):
+        table = shelters_df.set_index('name', drop=False).rename_axis('facility')
+        table = table.join(self._resource_frame(resources_df), how='left')
+        self.table = add_derived_columns(table)
+        self.stats['rebuilds'] += 1
+
+    def _update_resources(self, resources_df):
+        resources = self._resource_frame(resources_df).reindex(self.table.index)
+        current = self.table[RESOURCE_COLUMNS]
+        changed = ~((current == resources) | (current.isna() & resources.isna())).all(axis=1)
+        if changed.any():
+            table = self.table.copy()
+            table.loc[changed, RESOURCE_COLUMNS] = resources.loc[changed]
+            self.table = table
+            self.stats['rows_updated'] += int(changed.sum())
+
+    def sync(self, shelters_df, resources_df):
+        """Bring the table up to date with the given frames and return it"""
+        with self._lock:
+            if shelters_df is not self._shelters:
+                if self.table is None or not shelters_df.equals(self._shelters):
+                    self._rebuild(shelters_df, resources_df)
+                    self._resources = resources_df
+                self._shelters = shelters_df
+            if resources_df is not self._resources:
+                self._update_resources(resources_df)
+                self._resources = resources_df
+            return self.table
+
+    def get(self, name):
+        """Row for one facility, or None"""
+        table = self.table
+        return table.loc[name] if table is not None and name in table.index else None
@@ -0,0 +1,75 @@
+"""
+Minimal stand-in for the Ollama HTTP API, for load-testing the offline hub
+without a GPU or model download:
+
+    python fake_ollama.py --port 11435 --delay 0.05
+    OLLAMA_URL=http://localhost:11435 python admin_for_offline_llm.py
+
+Serves /api/generate (streamed NDJSON or a single JSON object) and /api/tags.
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL = 'mistral'
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    token_delay = 0.05
+    tokens = 40
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': f'{MODEL}:latest', 'model': f'{MODEL}:latest'}]})
+        elif self.path == '/api/ps':
+            self._send_json({'models': [{'name': f'{MODEL}:latest', 'model': f'{MODEL}:latest'}]})
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        if self.path != '/api/generate':
+            self._send_json({'error': 'not found'}, 404)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        prompt = request.get('prompt', '')
+        words = [f"echo{i}" for i in range(self.tokens)] if prompt else []
+
+        if not request.get('stream', True):
+            time.sleep(self.token_delay * len(words))
+            self._send_json({'model': MODEL, 'response': ' '.join(words), 'done': True})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        for word in words:
+            time.sleep(self.token_delay)
+            self.wfile.write(json.dumps({'model': MODEL, 'response': word + ' ', 'done': False}).encode() + b'\n')
+            self.wfile.flush()
+        self.wfile.write(json.dumps({'model': MODEL, 'response': '', 'done': True}).encode() + b'\n')
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fake Ollama server for testing the offline hub")
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--delay', type=float, default=FakeOllamaHandler.token_delay, help="seconds per token")
+    parser.add_argument('--tokens', type=int, default=FakeOllamaHandler.tokens, help="tokens per answer")
+    args = parser.parse_args()
+    FakeOllamaHandler.token_delay = args.delay
+    FakeOllamaHandler.tokens = args.tokens
+    print(f"Fake Ollama listening on http://localhost:{args.port}")
+    ThreadingHTTPServer(('0.0.0.0', args.port), FakeOllamaHandler).serve_forever()
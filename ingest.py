@@ -0,0 +1,424 @@
+import argparse
+import itertools
+import json
+import os
+import queue
+import re
+import socketserver
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from burst_detector import BurstDetector
+from data_store import DataStore
+
+UPDATE_COLUMNS = [
+    'timestamp', 'source', 'account_type', 'username', 'message', 'location',
+    'trust_score', 'verified', 'engagement', 'emergency_type'
+]
+
+# Accepted spellings for each column in incoming records, first match wins
+FIELD_ALIASES = {
+    'timestamp': ('timestamp', 'time', 'created_at'),
+    'source': ('source', 'platform'),
+    'account_type': ('account_type', 'source_type'),
+    'username': ('username', 'user', 'author'),
+    'message': ('message', 'text', 'body', 'content'),
+    'location': ('location', 'place'),
+    'verified': ('verified',),
+    'engagement': ('engagement', 'likes'),
+    'emergency_type': ('emergency_type', 'type'),
+}
+
+ACCOUNT_TRUST = {'Official': 0.9, 'Emergency': 0.85, 'Healthcare': 0.85, 'Media': 0.7, 'Citizen': 0.5}
+
+EMERGENCY_KEYWORDS = {
+    'Sandstorm': ('sandstorm', 'sand', 'dust', 'visibility'),
+    'Heat Wave': ('heat', 'temperature', 'hot', 'cooling'),
+    'Flash Flood': ('flood', 'flooding', 'rain', 'rainfall', 'water level'),
+    'Strong Winds': ('wind', 'winds', 'gust'),
+    'Thunderstorm': ('thunder', 'lightning', 'thunderstorm'),
+}
+
+_WORD = re.compile(r'\w+')
+
+
+def infer_emergency_type(message):
+    text = message.lower()
+    for emergency_type, words in EMERGENCY_KEYWORDS.items():
+        if any(word in text for word in words):
+            return emergency_type
+    return 'Multiple'
+
+
+def parse_line(line):
+    # Malformed lines come through as strings, which the pipeline counts as rejected
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return line
+
+
+# Sources: each read(stop_event) yields raw records (dicts), or None while idle
+# so the pipeline can still flush on its interval.
+
+class JsonlTailSource:
+    """Follow a JSON-lines file as it grows (tail -f), reopening it if rotated or truncated"""
+
+    def __init__(self, path, from_start=False, poll_interval=0.2):
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+
+    def read(self, stop_event):
+        f, inode, pending = None, None, ''
+        try:
+            while not stop_event.is_set():
+                if f is None:
+                    try:
+                        f = open(self.path, encoding='utf-8')
+                    except FileNotFoundError:
+                        self.from_start = True  # everything in a file created later is new
+                        yield None
+                        stop_event.wait(self.poll_interval)
+                        continue
+                    inode = os.fstat(f.fileno()).st_ino
+                    if not self.from_start:
+                        f.seek(0, os.SEEK_END)
+                    self.from_start = True  # later reopens (rotation) read the new file from the top
+                chunk = f.read(1 << 20)
+                if chunk:
+                    lines = (pending + chunk).split('\n')
+                    pending = lines.pop()
+                    for line in lines:
+                        if line.strip():
+                            yield parse_line(line)
+                    continue
+                yield None
+                stop_event.wait(self.poll_interval)
+                try:
+                    stat = os.stat(self.path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_ino != inode or stat.st_size < f.tell():
+                    f.close()
+                    f, pending = None, ''
+        finally:
+            if f is not None:
+                f.close()
+
+
+class SocketSource:
+    """Accept JSON lines over TCP (e.g. from a scraper on the same machine)"""
+
+    def __init__(self, host='127.0.0.1', port=9099, max_pending=100_000):
+        self.address = (host, port)
+        self.records = queue.Queue(maxsize=max_pending)
+
+    def read(self, stop_event):
+        records = self.records
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        # Blocks the sender when the pipeline falls behind (backpressure)
+                        records.put(parse_line(line))
+
+        server = socketserver.ThreadingTCPServer(self.address, Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            while not stop_event.is_set():
+                try:
+                    yield records.get(timeout=0.2)
+                except queue.Empty:
+                    yield None
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class ReplaySource:
+    """Replay recorded JSON-lines files, as fast as possible or at `rate` records per second"""
+
+    def __init__(self, paths, rate=None, loop=False):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.rate = rate
+        self.loop = loop
+
+    def read(self, stop_event):
+        started, sent = time.monotonic(), 0
+        while True:
+            for path in self.paths:
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        if stop_event.is_set():
+                            return
+                        if not line.strip():
+                            continue
+                        if self.rate:
+                            delay = started + sent / self.rate - time.monotonic()
+                            if delay > 0:
+                                yield None
+                                stop_event.wait(delay)
+                        sent += 1
+                        yield parse_line(line)
+            if not self.loop:
+                return
+
+
+class ColumnBuffer:
+    """Incoming records normalized straight into per-column lists"""
+
+    def __init__(self):
+        self.columns = {column: [] for column in FIELD_ALIASES}
+
+    def __len__(self):
+        return len(self.columns['message'])
+
+    def append(self, record):
+        message = next((record[key] for key in FIELD_ALIASES['message'] if record.get(key)), None)
+        if not message:
+            return False
+        for column, aliases in FIELD_ALIASES.items():
+            self.columns[column].append(next((record[key] for key in aliases if key in record), None))
+        self.columns['message'][-1] = str(message)
+        return True
+
+    def drain(self):
+        """Return the buffered rows as a typed DataFrame and empty the buffer"""
+        df = pd.DataFrame(self.columns)
+        self.columns = {column: [] for column in FIELD_ALIASES}
+        now = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+        df['timestamp'] = df['timestamp'].fillna(now).astype(str)
+        df['source'] = df['source'].fillna('Twitter')
+        df['account_type'] = df['account_type'].where(df['account_type'].isin(list(ACCOUNT_TRUST)), 'Citizen')
+        df['username'] = df['username'].fillna('@unknown').astype(str)
+        df['location'] = df['location'].fillna('Qatar').astype(str)
+        df['verified'] = df['verified'].map(lambda v: str(v).lower() in ('true', '1', 'yes'))
+        df['engagement'] = pd.to_numeric(df['engagement'], errors='coerce').fillna(0).clip(lower=0).astype('int64')
+        missing_type = df['emergency_type'].isna()
+        if missing_type.any():
+            df.loc[missing_type, 'emergency_type'] = df.loc[missing_type, 'message'].map(infer_emergency_type)
+        return df
+
+
+def simhashes(messages):
+    """64-bit SimHash of each message's words, computed for the whole batch at once"""
+    tokens, lengths = [], []
+    for message in messages:
+        words = _WORD.findall(message.lower())
+        tokens.extend(words)
+        lengths.append(len(words))
+    if not tokens:
+        return np.zeros(len(lengths), dtype=np.uint64)
+    hashes = np.fromiter((hash(token) for token in tokens), dtype=np.int64, count=len(tokens))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    lengths = np.asarray(lengths)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    # Sum over the messages that have words only: their offsets are strictly increasing
+    # and in range, so each reduceat segment is exactly one message's words
+    wordful = lengths > 0
+    ones = np.zeros((len(lengths), 64), dtype=np.int16)
+    ones[wordful] = np.add.reduceat(bits, offsets[wordful], axis=0, dtype=np.int16)
+    # A bit is set when most of the message's words have it set
+    signs = np.packbits(2 * ones > lengths[:, None], axis=1, bitorder='little')
+    return signs.view(np.uint64).ravel()
+
+
+class NearDuplicateFilter:
+    """
+    Drops messages within `max_distance` bits (Hamming) of one seen recently.
+
+    The 64-bit SimHash is cut into max_distance + 2 blocks. Hashes that close
+    differ in at most max_distance blocks, so they agree exactly on at least
+    two; one table per pair of blocks maps the pair's bits to the hashes that
+    have them, and only those few candidates are compared. Only the last
+    `window` accepted messages are kept.
+    """
+
+    def __init__(self, max_distance=3, window=100_000):
+        self.max_distance = max_distance
+        self.window = window
+        blocks = max_distance + 2
+        edges = [64 * i // blocks for i in range(blocks + 1)]
+        block_masks = [((1 << (hi - lo)) - 1) << lo for lo, hi in zip(edges, edges[1:])]
+        self._masks = [a | b for a, b in itertools.combinations(block_masks, 2)]
+        self._tables = [dict() for _ in self._masks]
+        self._counts = {}  # exact hash -> copies in the window
+        self._recent = deque()
+
+    def seen(self, simhash):
+        """True if a near-duplicate was seen; otherwise remember this hash and return False"""
+        if simhash in self._counts:
+            return True
+        keys = [simhash & mask for mask in self._masks]
+        for table, key in zip(self._tables, keys):
+            for other in table.get(key, ()):
+                if (simhash ^ other).bit_count() <= self.max_distance:
+                    return True
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, []).append(simhash)
+        self._counts[simhash] = 1
+        self._recent.append(simhash)
+        if len(self._recent) > self.window:
+            self._forget(self._recent.popleft())
+        return False
+
+    def _forget(self, simhash):
+        del self._counts[simhash]
+        for table, mask in zip(self._tables, self._masks):
+            key = simhash & mask
+            members = table[key]
+            members.remove(simhash)
+            if not members:
+                del table[key]
+
+
+class TrustScorer:
+    """
+    trust_score from account type and verification, adjusted by engagement
+    relative to the running distribution of engagement seen so far
+    (Welford mean/variance of log engagement, updated per batch).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _update(self, values):
+        for value in values:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+
+    def score(self, df):
+        log_engagement = np.log1p(df['engagement'].to_numpy(dtype=float))
+        self._update(log_engagement.tolist())
+        std = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 1.0
+        z = (log_engagement - self.mean) / (std or 1.0)
+        trust = (
+            df['account_type'].map(ACCOUNT_TRUST).fillna(0.5).to_numpy()
+            + np.where(df['verified'].to_numpy(dtype=bool), 0.05, 0.0)
+            + 0.1 * np.tanh(z / 2)
+        )
+        return np.round(np.clip(trust, 0.0, 1.0), 2)
+
+
+class IngestPipeline:
+    """
+    Source -> columnar buffer -> near-duplicate filter -> trust scoring ->
+    micro-batch appended to the shared data store (every batch_size records
+    or flush_interval seconds, whichever comes first).
+
+    With a detector, each published batch is also counted, after
+    deduplication so reposts do not make a burst, and at each update's own
+    timestamp so replayed history keeps its pacing; the burst alerts it raises
+    are appended to the store's derived_alerts feed.
+    """
+
+    def __init__(self, source, store=None, batch_size=5000, flush_interval=2.0, dedup_window=100_000,
+                 detector=None):
+        self.source = source
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = ColumnBuffer()
+        self.dedup = NearDuplicateFilter(window=dedup_window)
+        self.trust = TrustScorer()
+        self.detector = detector
+        self.stats = {'received': 0, 'rejected': 0, 'duplicates': 0, 'published': 0, 'batches': 0, 'alerts': 0}
+
+    def detect(self, batch):
+        """Count a deduplicated batch in the burst detector; publish and return the alerts it raises"""
+        alerts = self.detector.observe_frame(batch)
+        if alerts:
+            if self.store is not None:
+                self.store.append_frame('derived_alerts', pd.DataFrame(alerts))
+            self.stats['alerts'] += len(alerts)
+        return alerts
+
+    def process(self, df):
+        """Deduplicate and score a drained batch; returns the rows to publish"""
+        keep = np.fromiter(
+            (not self.dedup.seen(int(h)) for h in simhashes(df['message'].tolist())),
+            dtype=bool, count=len(df)
+        )
+        self.stats['duplicates'] += int((~keep).sum())
+        df = df[keep].reset_index(drop=True)
+        df['trust_score'] = self.trust.score(df) if len(df) else pd.Series(dtype=float)
+        return df[UPDATE_COLUMNS]
+
+    def flush(self):
+        if not len(self.buffer):
+            return None
+        batch = self.process(self.buffer.drain())
+        if len(batch):
+            if self.store is not None:
+                self.store.append_frame('updates', batch)
+            self.stats['published'] += len(batch)
+            self.stats['batches'] += 1
+            if self.detector is not None:
+                self.detect(batch)
+        return batch
+
+    def run(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        last_flush = time.monotonic()
+        for record in self.source.read(stop_event):
+            if record is not None:
+                self.stats['received'] += 1
+                if not (isinstance(record, dict) and self.buffer.append(record)):
+                    self.stats['rejected'] += 1
+            now = time.monotonic()
+            if len(self.buffer) >= self.batch_size or (len(self.buffer) and now - last_flush >= self.flush_interval):
+                self.flush()
+                last_flush = now
+        self.flush()
+        return self.stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingest social updates into the ANTNA data store")
+    subparsers = parser.add_subparsers(dest='source', required=True)
+    tail = subparsers.add_parser('tail', help="follow a JSON-lines file")
+    tail.add_argument('path')
+    tail.add_argument('--from-start', action='store_true')
+    sock = subparsers.add_parser('socket', help="accept JSON lines over TCP")
+    sock.add_argument('--host', default='127.0.0.1')
+    sock.add_argument('--port', type=int, default=9099)
+    replay = subparsers.add_parser('replay', help="replay recorded JSON-lines files")
+    replay.add_argument('paths', nargs='+')
+    replay.add_argument('--rate', type=float, help="records per second (default: as fast as possible)")
+    replay.add_argument('--loop', action='store_true')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--flush-interval', type=float, default=2.0)
+    parser.add_argument('--no-alerts', action='store_true', help="don't derive burst alerts from the feed")
+    parser.add_argument('--burst-ratio', type=float, default=4.0,
+                        help="how many times its usual rate a location/type must reach to raise an alert")
+    args = parser.parse_args()
+
+    if args.source == 'tail':
+        source = JsonlTailSource(args.path, from_start=args.from_start)
+    elif args.source == 'socket':
+        source = SocketSource(args.host, args.port)
+    else:
+        source = ReplaySource(args.paths, rate=args.rate, loop=args.loop)
+
+    detector = None if args.no_alerts else BurstDetector(ratio=args.burst_ratio)
+    pipeline = IngestPipeline(source, DataStore(), batch_size=args.batch_size, flush_interval=args.flush_interval,
+                              detector=detector)
+    started = time.monotonic()
+    try:
+        pipeline.run()
+    except KeyboardInterrupt:
+        pipeline.flush()
+    elapsed = time.monotonic() - started
+    print(f"{pipeline.stats} in {elapsed:.1f} s ({pipeline.stats['received'] / max(elapsed, 1e-9):.0f} records/s)")
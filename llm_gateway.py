@@ -0,0 +1,302 @@
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+
+from retriever import tokenize
+
+# Queue priorities: lower runs first
+PRIORITY_ALERT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+ALERT_TERMS = {
+    'alert', 'warning', 'emergency', 'urgent', 'evacuate', 'evacuation', 'flood', 'flooding',
+    'sandstorm', 'storm', 'fire', 'injured', 'injury', 'ambulance', 'trapped', 'help', 'danger',
+    'shelter', 'تحذير', 'طوارئ', 'اخلاء', 'سيول', 'عاصفه', 'اسعاف', 'ملجا'
+}
+
+
+def classify_priority(query):
+    """Alert-related questions jump the queue"""
+    return PRIORITY_ALERT if ALERT_TERMS & set(tokenize(query)) else PRIORITY_NORMAL
+
+
+def is_retryable(error):
+    status = getattr(error, 'status_code', None)
+    return status == 429 or (status is not None and status >= 500) or 'rate limit' in str(error).lower()
+
+
+def retry_after(error):
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount=1):
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount=1):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SharedStream:
+    """Token buffer that one upstream stream fills and any number of readers replay"""
+
+    def __init__(self):
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def append(self, token):
+        with self.cond:
+            self.tokens.append(token)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self.cond:
+                while index >= len(self.tokens) and not self.done:
+                    self.cond.wait()
+                pending = self.tokens[index:]
+                done, error = self.done, self.error
+            for token in pending:
+                yield token
+            index += len(pending)
+            if done and index >= len(self.tokens):
+                if error is not None:
+                    raise error
+                return
+
+
+class LLMGateway:
+    """
+    Single entry point for Groq calls from every Streamlit session.
+
+    - identical in-flight requests are coalesced (single-flight), for both
+      blocking and streaming calls
+    - a priority queue admits requests, alert-related ones first, subject to
+      a concurrency limit and request/token buckets sized to the Groq quota
+    - 429s and 5xx responses are retried with jittered exponential backoff,
+      honouring Retry-After
+    """
+
+    def __init__(self, client, max_concurrency=8, requests_per_minute=30, tokens_per_minute=None,
+                 max_retries=4, backoff=1.0):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._calls = {}
+        self._streams = {}
+        self._calls_lock = threading.Lock()
+        self.stats = {'requests': 0, 'coalesced': 0, 'retries': 0, 'rate_limited': 0, 'errors': 0}
+
+    # Admission control
+
+    def _acquire(self, priority, cost, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiting[0] == entry and self._in_flight < self.max_concurrency:
+                        wait = self._requests.wait_time(1)
+                        if self._tokens is not None:
+                            wait = max(wait, self._tokens.wait_time(cost))
+                        if wait <= 0:
+                            heapq.heappop(self._waiting)
+                            self._requests.consume(1)
+                            if self._tokens is not None:
+                                self._tokens.consume(cost)
+                            self._in_flight += 1
+                            self._cond.notify_all()
+                            return
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("LLM queue wait timed out")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _count(self, name):
+        with self._cond:
+            self.stats[name] += 1
+
+    def _run(self, fn, priority, cost, timeout=None, hold=False):
+        """
+        Admit, call fn, and retry rate-limited or server errors with backoff.
+        With hold=True a successful call keeps its concurrency slot and the
+        caller must _release() it (streams hold it until fully read).
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire(priority, cost, timeout)
+            held = False
+            try:
+                self._count('requests')
+                result = fn()
+                held = hold
+                return result
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self._count('errors')
+                    raise
+                if getattr(e, 'status_code', None) == 429:
+                    self._count('rate_limited')
+                self._count('retries')
+                delay = retry_after(e) or self.backoff * 2 ** attempt
+                error = e
+            finally:
+                if not held:
+                    self._release()
+            time.sleep(delay * (0.5 + random.random()))
+        raise error
+
+    @staticmethod
+    def _key(params):
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _cost(params):
+        # Rough token estimate: ~4 characters per token plus the completion budget
+        prompt = sum(len(str(m.get('content', ''))) for m in params.get('messages', []))
+        return prompt // 4 + params.get('max_tokens', 256)
+
+    # Public API
+
+    def chat(self, priority=PRIORITY_NORMAL, timeout=None, **params):
+        """Blocking chat completion; returns the response object"""
+        key = self._key(params)
+        with self._calls_lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            self._count('coalesced')
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = self._run(lambda: self.client.chat.completions.create(**params),
+                                    priority, self._cost(params), timeout)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._calls_lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def chat_stream(self, priority=PRIORITY_NORMAL, timeout=None, **params):
+        """Streaming chat completion; returns an iterator of text tokens"""
+        params = dict(params, stream=True)
+        key = self._key(params)
+        with self._calls_lock:
+            shared = self._streams.get(key)
+            coalesced = shared is not None
+            if not coalesced:
+                shared = self._streams[key] = _SharedStream()
+        if coalesced:
+            self._count('coalesced')
+            return iter(shared)
+        threading.Thread(target=self._pump, args=(key, shared, params, priority, timeout), daemon=True).start()
+        return iter(shared)
+
+    def _pump(self, key, shared, params, priority, timeout):
+        # Only the connection is retried; once tokens flow the stream is not restarted
+        error = None
+        try:
+            response = self._run(lambda: self.client.chat.completions.create(**params),
+                                 priority, self._cost(params), timeout, hold=True)
+            try:
+                for chunk in response:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        shared.append(token)
+            finally:
+                close = getattr(response, 'close', None)
+                if close is not None:
+                    close()
+                self._release()
+        except Exception as e:
+            error = e
+        finally:
+            with self._calls_lock:
+                self._streams.pop(key, None)
+            shared.finish(error)
+
+    def transcribe(self, priority=PRIORITY_NORMAL, timeout=None, **params):
+        """Audio transcription through the same queue (never coalesced)"""
+        file = params.get('file')
+        start = file.tell() if hasattr(file, 'seek') else None
+
+        def create():
+            # A failed attempt may have read the upload; every retry sends it from the start
+            if start is not None:
+                file.seek(start)
+            return self.client.audio.transcriptions.create(**params)
+
+        return self._run(create, priority, 0, timeout)
+
+    def metrics(self):
+        with self._cond:
+            return dict(self.stats, queue_depth=len(self._waiting), in_flight=self._in_flight)
@@ -0,0 +1,198 @@
+import json
+import re
+from datetime import datetime
+
+import pandas as pd
+
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+# A hyphen between two numbers is a range ("1000-10000"), not a minus sign
+_RANGE_HYPHEN = re.compile(r'(?<=\d)\s*-\s*(?=\d)')
+_TRUE = {'true', 'yes', 'y', '1', 'verified'}
+_FALSE = {'false', 'no', 'n', '0', 'unverified'}
+
+
+def iter_json_objects(chunks):
+    """
+    Incrementally extract JSON objects from a stream of text chunks.
+
+    Prose and markdown fences around the JSON are skipped. Objects that are
+    elements of an array are yielded as soon as their closing brace arrives,
+    so {"alerts": [...]} wrappers and bare arrays both work; if the response
+    holds no array, each top-level object is yielded instead. Objects that
+    fail to parse are yielded as JSONDecodeError instances so callers can
+    count them without losing the rest of the stream.
+    """
+    buffer = ''
+    scan = 0
+    stack = []  # open containers: ('[', None) or ('{', start offset)
+    in_string = escaped = False
+    yielded_from_array = False
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        while scan < len(buffer):
+            ch = buffer[scan]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = bool(stack)
+            elif ch == '[':
+                stack.append(('[', None))
+            elif ch == '{':
+                stack.append(('{', scan))
+            elif ch in ']}' and stack:
+                kind, start = stack.pop()
+                if ch == '}' and kind == '{':
+                    parent = stack[-1][0] if stack else None
+                    if parent == '[' or (parent is None and not yielded_from_array):
+                        try:
+                            yield json.loads(buffer[start:scan + 1])
+                        except json.JSONDecodeError as e:
+                            yield e
+                        yielded_from_array = yielded_from_array or parent == '['
+                if not stack:
+                    # Nothing open any more: drop consumed text to keep the buffer small
+                    buffer = buffer[scan + 1:]
+                    scan = -1
+            scan += 1
+
+
+def coerce_number(value, minimum=None, maximum=None, integer=False):
+    """Coerce LLM output like 5, "5", "1,200 units", "0.0 to 1.0" or "1000-10000" (range -> midpoint)"""
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = _RANGE_HYPHEN.sub(' to ', str(value).replace(',', ''))
+        numbers = [float(n) for n in _NUMBER.findall(text)]
+        if not numbers:
+            raise ValueError(f"not a number: {value!r}")
+        number = sum(numbers) / len(numbers)
+    if minimum is not None:
+        number = max(minimum, number)
+    if maximum is not None:
+        number = min(maximum, number)
+    return int(round(number)) if integer else number
+
+
+def coerce_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def coerce_choice(value, choices):
+    text = str(value).strip().lower()
+    for choice in choices:
+        if text == choice.lower():
+            return choice
+    for choice in choices:
+        if choice.lower() in text:
+            return choice
+    raise ValueError(f"{value!r} is not one of {choices}")
+
+
+def coerce_field(value, spec):
+    kind = spec['type']
+    if kind == 'str':
+        text = str(value).strip() if value is not None else ''
+        if not text:
+            raise ValueError("empty string")
+        return text
+    if kind in ('int', 'float'):
+        return coerce_number(value, spec.get('min'), spec.get('max'), integer=kind == 'int')
+    if kind == 'bool':
+        return coerce_bool(value)
+    if kind == 'choice':
+        return coerce_choice(value, spec['choices'])
+    if kind == 'datetime':
+        parsed = pd.to_datetime(value, errors='coerce')
+        if pd.isna(parsed):
+            raise ValueError(f"not a timestamp: {value!r}")
+        return parsed.strftime(spec.get('format', '%Y-%m-%d %H:%M'))
+    raise ValueError(f"unknown field type {kind}")
+
+
+def validate_record(record, schema):
+    """Return (clean record, None) or (None, error message)"""
+    if not isinstance(record, dict):
+        return None, f"expected an object, got {type(record).__name__}"
+    clean = {}
+    for field, spec in schema.items():
+        try:
+            if field not in record or record[field] in (None, ''):
+                raise KeyError(field)
+            clean[field] = coerce_field(record[field], spec)
+        except (KeyError, ValueError) as e:
+            if 'default' not in spec:
+                return None, f"missing field {field!r}" if isinstance(e, KeyError) else f"{field}: {e}"
+            default = spec['default']
+            # 'now' stamps time fields with the current time in the field's format
+            clean[field] = datetime.now().strftime(spec['format']) if default == 'now' else default
+    return clean, None
+
+
+def parse_records(chunks, schema):
+    """
+    Parse a (streamed) LLM response into a typed DataFrame, keeping every
+    record that validates. Returns (DataFrame, list of rejection messages).
+    """
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    rows, errors = [], []
+    for item in iter_json_objects(chunks):
+        if isinstance(item, json.JSONDecodeError):
+            errors.append(f"invalid JSON: {item}")
+            continue
+        clean, error = validate_record(item, schema)
+        if error:
+            errors.append(error)
+        else:
+            rows.append(clean)
+    df = pd.DataFrame(rows, columns=list(schema))
+    dtypes = {'int': 'int64', 'float': 'float64', 'bool': 'bool'}
+    return df.astype({f: dtypes[s['type']] for f, s in schema.items() if s['type'] in dtypes}), errors
+
+
+# Schemas for the admin generators' output
+ALERT_SCHEMA = {
+    'type': {'type': 'choice', 'choices': ['Sandstorm', 'Heat Wave', 'Flash Flood', 'Dust Storm', 'Strong Winds', 'Thunderstorm']},
+    'severity': {'type': 'choice', 'choices': ['Low', 'Medium', 'High']},
+    'location': {'type': 'str'},
+    'time': {'type': 'datetime', 'format': '%Y-%m-%d %H:%M', 'default': 'now'},
+    'description': {'type': 'str'},
+}
+
+RESOURCE_SCHEMA = {
+    'facility': {'type': 'str'},
+    'water': {'type': 'int', 'min': 0},
+    'food': {'type': 'int', 'min': 0},
+    'medical': {'type': 'int', 'min': 0},
+    'beds': {'type': 'int', 'min': 0},
+    'current_occupancy': {'type': 'int', 'min': 0, 'default': 0},
+    'last_updated': {'type': 'datetime', 'format': '%Y-%m-%d %H:%M', 'default': 'now'},
+}
+
+UPDATE_SCHEMA = {
+    'source_type': {'type': 'choice', 'choices': ['Official', 'Healthcare', 'Emergency', 'Media', 'Citizen'], 'default': 'Citizen'},
+    'username': {'type': 'str'},
+    'message': {'type': 'str'},
+    'location': {'type': 'str', 'default': 'Qatar'},
+    'verified': {'type': 'bool', 'default': False},
+    'trust_score': {'type': 'float', 'min': 0.0, 'max': 1.0, 'default': 0.5},
+    'timestamp': {'type': 'datetime', 'format': '%Y-%m-%dT%H:%M:%S', 'default': 'now'},
+    'engagement': {'type': 'int', 'min': 0, 'default': 0},
+}
@@ -1,17 +1,33 @@
 # app.py
 import streamlit as st
 import pandas as pd
-import folium
-from streamlit_folium import st_folium
+import streamlit.components.v1 as components
 from datetime import datetime, timedelta
 from groq import Groq
 import numpy as np
 from audio_recorder_streamlit import audio_recorder
+import html
+import itertools
 import tempfile
 import os
+import time
 import warnings
 import openrouteservice
-from data import generate_data
+from data import generate_preparedness_guidance, DOHA_LOCATIONS, PLACE_COORDINATES
+from data_access import get_frames, load_css, session_value, data_version, RerunTimer
+from schema import format_timestamp
+from retriever import UpdateRetriever
+from embeddings import EmbeddingIndex, load_encoder
+from spatial_index import ShelterIndex, QUERY_REQUIREMENTS
+from route_cache import RouteCache, cached_directions, ROAD_CLOSURE_PATTERN
+from route_matrix import RouteMatrixJob, ThrottledClient
+from response_cache import ResponseCache
+from offline_router import RoadGraph
+from llm_gateway import LLMGateway, classify_priority
+from map_layer import facility_points, build_facility_map, render_map_html
+from facilities import FacilityTable
+from update_feed import UpdateFeed
+from update_windows import UpdateWindowStore
 warnings.filterwarnings('ignore')
 
 
@@ -28,66 +44,288 @@ st.set_page_config(
     }
 )
 
-# Near the top of your app.py, after the imports
-def load_css(file_name):
-    with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+# Times each rerun; shown in the sidebar with ?debug=1
+rerun_timer = RerunTimer()
+
 load_css('styles.css')
 
 # Initialize keys
 GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
 ORS_API_KEY = st.secrets["ORS_API_KEY"]
-ors_client = openrouteservice.Client(key=ORS_API_KEY)  # Initialize ORS client
+
+# One rate-limited ORS client for every session and the route matrix job, so together they stay inside the quota
+@st.cache_resource
+def get_ors_client():
+    interval = float(os.environ.get('ANTNA_ORS_REQUEST_INTERVAL', 1.6))
+    return ThrottledClient(openrouteservice.Client(key=ORS_API_KEY), interval)
+
+ors_client = get_ors_client()
 groq_client = Groq(api_key=GROQ_API_KEY)
 
+# Every Groq call from every session goes through one gateway: identical in-flight
+# requests are coalesced, and a priority queue keeps within the account's rate limits
+@st.cache_resource
+def get_llm_gateway():
+    return LLMGateway(
+        groq_client,
+        max_concurrency=int(os.environ.get('ANTNA_LLM_CONCURRENCY', 8)),
+        requests_per_minute=int(os.environ.get('ANTNA_LLM_RPM', 30)),
+        tokens_per_minute=int(os.environ.get('ANTNA_LLM_TPM', 0)) or None
+    )
+
+llm_gateway = get_llm_gateway()
+
+
+
+# Get all dataframes (cached across reruns, refreshed when the data version changes)
+with rerun_timer.section('load data'):
+    alerts_df, shelters_df, resources_df, social_updates_df = get_frames()
+
+# Shelters joined with resources and indexed by name; every tab reads facilities from here
+@st.cache_resource
+def get_facility_table():
+    return FacilityTable()
+
+facility_table = get_facility_table()
+facilities_df = facility_table.sync(shelters_df, resources_df)
+
+# Social updates partitioned by time: recent rows stay hot, older ones live on
+# only as rolling per-location / per-emergency-type aggregates
+@st.cache_resource
+def get_update_windows():
+    return UpdateWindowStore(
+        hot_hours=float(os.environ.get('ANTNA_UPDATES_HOT_HOURS', 6)),
+        retention_hours=float(os.environ.get('ANTNA_UPDATES_RETENTION_HOURS', 48))
+    )
+
+update_windows = get_update_windows()
+social_updates_df = update_windows.sync(social_updates_df)
+
+# Newest-first, keyset-paginated view of the updates feed, shared across sessions
+FEED_PAGE_SIZE = 20
+
+@st.cache_resource
+def get_update_feed():
+    return UpdateFeed()
+
+update_feed = get_update_feed()
+
+# Inverted index over social updates, shared across reruns and synced incrementally on each query
+@st.cache_resource
+def get_update_retriever():
+    return UpdateRetriever()
+
+update_retriever = get_update_retriever()
+
+# Offline semantic index over updates, alerts and preparedness guidance
+@st.cache_resource
+def get_semantic_index():
+    index = EmbeddingIndex(encoder=load_encoder(os.environ.get('ANTNA_EMBEDDING_MODEL')))
+    index.sync('guidance', generate_preparedness_guidance())
+    return index
+
+semantic_index = get_semantic_index()
+
+
+def build_rag_context(query, social_updates_df, k=10):
+    """
+    Combine keyword (BM25) and semantic matches into a de-duplicated context block.
+    This is the answer cache key, so it holds only retrieved documents; the
+    activity lines, which change with every update, are added in rag_messages().
+    """
+    keyword_hits = update_retriever.search(social_updates_df, query, k=k)['message'].tolist()
+
+    semantic_index.sync('update', social_updates_df['message'].tolist())
+    semantic_index.sync('alert', (alerts_df['type'].astype(str) + ' in ' + alerts_df['location'].astype(str) + ': ' + alerts_df['description']).tolist())
+    semantic_hits = [meta['text'] for score, meta in semantic_index.search(query, k=k) if score > 0.2]
+
+    lines = list(dict.fromkeys(keyword_hits + semantic_hits))
+    return "\n".join(lines[:k])
+
+
+def velocity_window_label():
+    return f"last {int(update_windows.velocity.total_seconds() // 60)} min"
+
+
+def activity_lines(n=3):
+    """One line per most active (location, emergency type) pair, from the rolling aggregates"""
+    return [
+        f"Activity: {row.emergency_type} in {row.location}: {row.recent_count} updates in the "
+        f"{velocity_window_label()}, {row.count} retained, mean trust {row.mean_trust:.2f}"
+        for row in update_windows.summaries().head(n).itertuples()
+        if row.recent_count
+    ]
+
+
+
+# Spatial index over shelters; the tree is only rebuilt when shelter locations change
+@st.cache_resource
+def get_shelter_index():
+    return ShelterIndex()
 
+shelter_index = get_shelter_index()
 
-# Get all dataframes
-alerts_df, shelters_df, resources_df, social_updates_df = generate_data()
+# Persistent ORS route cache shared by all sessions
+@st.cache_resource
+def get_route_cache():
+    return RouteCache(ttl=int(os.environ.get('ANTNA_ROUTE_CACHE_TTL', 6 * 3600)))
 
+route_cache = get_route_cache()
 
+# Origin x shelter travel-time matrix, refreshed in the background and used offline
+@st.cache_resource
+def get_route_matrix_job():
+    job = RouteMatrixJob(ors_client, DOHA_LOCATIONS, shelters_df, route_cache=route_cache)
+    job.start()
+    return job
 
-def find_nearest_shelter(shelters_df, user_location, query_type="medical supplies"):
+route_matrix_job = get_route_matrix_job()
+# Recomputed in the background when the shelters change (e.g. after an admin publish)
+route_matrix_job.sync(shelters_df)
+
+
+# Local road graph for routing during network outages (optional OSM extract)
+@st.cache_resource
+def get_road_graph():
+    path = os.environ.get('ANTNA_ROAD_GRAPH', 'qatar_roads.osm')
+    if not os.path.exists(path):
+        return None
+    try:
+        return RoadGraph.load(path)
+    except Exception as e:
+        print(f"Error loading road graph: {e}")
+        return None
+
+road_graph = get_road_graph()
+
+
+def offline_directions(coordinates, alerts_df, social_updates_df):
     """
-    Find the nearest shelter to the user's location based on query type.
+    Route on the local road graph, penalizing areas under alert and roads
+    reported as closed or diverted. The graph is shared between sessions, so
+    penalties go into a per-call array rather than onto the graph.
     """
-    # Simulate finding the nearest shelter by calculating distances
-    shelters_df["distance"] = shelters_df.apply(
-        lambda row: np.sqrt((row["lat"] - user_location[0])**2 + (row["lon"] - user_location[1])**2),
-        axis=1
+    penalties = road_graph.new_penalties()
+    road_graph.apply_alerts(alerts_df, PLACE_COORDINATES, penalties=penalties)
+    messages = social_updates_df['message'].fillna('')
+    for message in messages[messages.str.contains(ROAD_CLOSURE_PATTERN)]:
+        road_graph.penalize_roads(message, 10.0, penalties)
+    return road_graph.directions(coordinates, penalties=penalties)
+
+
+def get_route(coordinates, origin, destination_name, profile='driving-car'):
+    """
+    Route via the cached ORS client. When ORS is unreachable fall back to the
+    offline road graph, then to the precomputed route matrix.
+    """
+    try:
+        return cached_directions(ors_client, route_cache, coordinates=coordinates, profile=profile, format='geojson')
+    except Exception:
+        if road_graph is not None:
+            try:
+                return offline_directions(coordinates, alerts_df, social_updates_df)
+            except Exception as e:
+                print(f"Offline routing failed: {e}")
+        matrix = route_matrix_job.matrix
+        route = matrix.directions(origin, destination_name) if matrix is not None else None
+        if route is None:
+            raise
+        return route
+
+# Answers to near-identical questions over the same context, shared by all sessions
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(max_entries=int(os.environ.get('ANTNA_RESPONSE_CACHE_SIZE', 1000)))
+
+response_cache = get_response_cache()
+
+
+def report_response_cache():
+    rerun_timer.note('answer cache', f"{response_cache.hit_rate():.0%} hits")
+    rerun_timer.note('time saved', f"{response_cache.stats['saved_seconds']:.1f} s")
+
+
+def report_llm_gateway():
+    metrics = llm_gateway.metrics()
+    rerun_timer.note('llm queue', f"{metrics['queue_depth']} waiting")
+    rerun_timer.note('llm in flight', metrics['in_flight'])
+    rerun_timer.note('coalesced', metrics['coalesced'])
+    rerun_timer.note('rate limited', metrics['rate_limited'])
+
+
+# Serialized Centers map, cached per data version, type filter, origin and route
+@st.cache_data(show_spinner=False, max_entries=64)
+def facility_map_html(version, location_type, current_location, show_route=False, route_coords=None):
+    filtered_df = facilities_df if location_type == 'All' else facilities_df[facilities_df['type'] == location_type]
+    m = build_facility_map(
+        facility_points(filtered_df),
+        center=DOHA_LOCATIONS[current_location],  # Center map on selected current location
+        route=[list(coord) for coord in route_coords] if route_coords else None,
+        user_location=DOHA_LOCATIONS[current_location] if show_route else None,
+        user_label=f"Your Location ({current_location})"
     )
-    nearest_shelter = shelters_df.loc[shelters_df["distance"].idxmin()]
-    return nearest_shelter
+    return render_map_html(m)
+
+
+def find_nearest_shelter(shelters_df, user_location, query_type="medical supplies", k=1):
+    """
+    Find the nearest shelters to the user's location that have space and stock
+    the resources needed for the query type.
+    """
+    shelter_index.sync(shelters_df, resources_df)
+    nearest = shelter_index.nearest(user_location, k=max(k, 10), require=QUERY_REQUIREMENTS.get(query_type))
+    if nearest.empty:
+        return None
+
+    # Prefer real travel time over straight-line distance when it has been precomputed
+    matrix = route_matrix_job.matrix
+    travel_times = matrix.travel_times(user_location) if matrix is not None else {}
+    if travel_times:
+        nearest['duration_s'] = nearest['name'].map(travel_times)
+        nearest = nearest.sort_values(['duration_s', 'distance_km'], na_position='last')
+    nearest = nearest.head(k)
+    return nearest.iloc[0] if k == 1 else nearest
+
+ANSWER_SYSTEM_PROMPT = """You are ANTNA, an AI assistant for emergency management in Qatar. 
+Provide clear, accurate information based on available data and social media updates."""
+ANSWER_PARAMS = {'model': "llama3-8b-8192", 'temperature': 0.7, 'max_tokens': 500, 'top_p': 0.9}
+
+
+def rag_messages(query, context):
+    context = "\n".join([context] + activity_lines())
+    return [
+        {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context from verified social media:\n{context}\n\nUser Question: {query}"}
+    ]
+
 
-def process_query_with_rag_and_map(query, social_updates_df, shelters_df):
+def render_shelter_route(query_type="medical supplies"):
+    """Nearest shelter stocking what the query asks for, with the route from the user's location on the map"""
+    origin = st.session_state.get('current_location_select', "Doha City Center")
+    user_location = DOHA_LOCATIONS[origin]
+    shelter = find_nearest_shelter(shelters_df, user_location, query_type=query_type)
+    if shelter is None:
+        st.info("No shelter with available capacity stocks what you asked for.")
+        return
+    route_coords = None
     try:
-        relevant_updates = social_updates_df[
-            social_updates_df['message'].str.contains('|'.join(query.split()), case=False, na=False)
-        ]
-        context = "\n".join(relevant_updates['message'].tolist())
-        
-        messages = [
-            {"role": "system", "content": """You are ANTNA, an AI assistant for emergency management in Qatar. 
-            Provide clear, accurate information based on available data and social media updates."""},
-            {"role": "user", "content": f"Context from verified social media:\n{context}\n\nUser Question: {query}"}
-        ]
-        
-        response_text = ""
-        try:
-            response = groq_client.chat.completions.create(
-                messages=messages,
-                model= "llama3-8b-8192",
-                temperature=0.7,
-                max_tokens=500,
-                top_p=0.9
-            )
-            response_text = response.choices[0].message.content
-        except Exception as e:
-            response_text = f"AI processing error: {str(e)}"
-        
-        return response_text
+        coordinates = [[user_location[1], user_location[0]], [shelter['lon'], shelter['lat']]]
+        route_cache.note_road_closures(social_updates_df, PLACE_COORDINATES)
+        route = get_route(coordinates, origin, shelter['name'])
+        route_coords = tuple((coord[1], coord[0]) for coord in route['features'][0]['geometry']['coordinates'])
+        segment = route['features'][0]['properties']['segments'][0]
+        st.markdown(f"""
+            <div class="route-info">
+                <h4>🚗 Nearest shelter for {query_type}:</h4>
+                <p>📍 From: {origin}</p>
+                <p>🎯 To: {shelter['name']}</p>
+                <p>⏱️ Estimated Time: {segment['duration'] / 60:.1f} minutes</p>
+                <p>📏 Distance: {segment['distance'] / 1000:.1f} km</p>
+            </div>
+        """, unsafe_allow_html=True)
     except Exception as e:
-        return f"Error processing query: {str(e)}"
+        st.error(f"Error calculating route: {str(e)}")
+    components.html(facility_map_html(data_version(), 'All', origin, True, route_coords), height=500)
 
 
 # Voice transcription function
@@ -101,7 +339,7 @@ def process_voice_input(audio_bytes):
             temp_audio_path = temp_audio.name
             
             with open(temp_audio_path, 'rb') as audio_file:
-                response = groq_client.audio.transcriptions.create(
+                response = llm_gateway.transcribe(
                     file=audio_file,
                     model="whisper-large-v3"
                 )
@@ -118,35 +356,89 @@ def process_voice_input(audio_bytes):
 # RAG simulation
 def process_query_with_rag(query, social_updates_df):
     try:
-        relevant_updates = social_updates_df[
-            social_updates_df['message'].str.contains('|'.join(query.split()), case=False, na=False)
-        ]
-        
-        context = "\n".join(relevant_updates['message'].tolist())
-        
-        messages = [
-            {"role": "system", "content": """You are ANTNA, an AI assistant for emergency management in Qatar. 
-             Provide clear, accurate information based on available data and social media updates."""},
-            {"role": "user", "content": f"Context from verified social media:\n{context}\n\nUser Question: {query}"}
-        ]
-        
+        context = build_rag_context(query, social_updates_df)
+        cached = response_cache.get(query, context)
+        if cached is not None:
+            return cached
         try:
-            response = groq_client.chat.completions.create(
-                messages=messages,
-                model="llama3-8b-8192",
-                temperature=0.7,
-                max_tokens=500,
-                top_p=0.9
+            start = time.perf_counter()
+            response = llm_gateway.chat(
+                priority=classify_priority(query),
+                messages=rag_messages(query, context),
+                **ANSWER_PARAMS
             )
-            return response.choices[0].message.content
+            response_text = response.choices[0].message.content
+            response_cache.put(query, context, response_text, time.perf_counter() - start)
+            return response_text
         except Exception as e:
             return f"AI processing error: {str(e)}"
             
     except Exception as e:
         return f"Error processing query: {str(e)}"
 
+# Streaming RAG: yields tokens as they arrive so the answer renders incrementally
+STREAM_RESPONSES = os.environ.get('ANTNA_STREAM_RESPONSES', '1') == '1'
+
+def stream_query_with_rag(query, social_updates_df):
+    start = time.perf_counter()
+    first_token_at = None
+    token_count = 0
+    try:
+        context = build_rag_context(query, social_updates_df)
+        cached = response_cache.get(query, context)
+        if cached is not None:
+            first_token_at = time.perf_counter()
+            yield cached
+            return
+
+        tokens = llm_gateway.chat_stream(
+            priority=classify_priority(query),
+            messages=rag_messages(query, context),
+            **ANSWER_PARAMS
+        )
+        answer = []
+        for token in tokens:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            token_count += 1
+            answer.append(token)
+            yield token
+        response_cache.put(query, context, "".join(answer), time.perf_counter() - start)
+    except Exception as e:
+        yield f"AI processing error: {str(e)}"
+    finally:
+        record_llm_metrics(start, first_token_at, token_count)
+        report_response_cache()
+
+
+def record_llm_metrics(start, first_token_at, token_count):
+    """Keep time-to-first-token and tokens/sec for this session's requests"""
+    end = time.perf_counter()
+    metrics = {
+        'ttft_s': (first_token_at - start) if first_token_at else None,
+        'tokens': token_count,
+        'tokens_per_s': token_count / (end - first_token_at) if first_token_at and end > first_token_at else None,
+        'total_s': end - start
+    }
+    session_value('llm_metrics', list).append(metrics)
+    if metrics['ttft_s'] is not None:
+        rerun_timer.note('first token', f"{metrics['ttft_s'] * 1000:.0f} ms")
+    if metrics['tokens_per_s'] is not None:
+        rerun_timer.note('tokens/s', f"{metrics['tokens_per_s']:.1f}")
+    return metrics
+
+
+def render_ai_response(placeholder, text):
+    placeholder.markdown(f"""
+        <div class="ai-response">
+            <strong>ANTNA:</strong><br>{text}
+        </div>
+    """, unsafe_allow_html=True)
+
 def main():
-    alerts_df, shelters_df, resources_df, social_updates_df = generate_data()
+    alerts_df, shelters_df, resources_df, social_updates_df = get_frames()
+    social_updates_df = update_windows.sync(social_updates_df)
+    facilities_df = facility_table.sync(shelters_df, resources_df)
 
   
         
@@ -160,26 +452,24 @@ def main():
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["Home", "⚠️ Alerts", "🏥 Centers", "📱 Updates", "✅ Prep"])
     
     
-    with tab1:
+    with tab1, rerun_timer.section('home'):
         
         user_query = st.text_input("💬 Ask ANTNA", placeholder="Type your question...")
-        if user_query:
+        if user_query and STREAM_RESPONSES:
+            # Stream the answer token by token instead of waiting for the full completion
+            st.markdown("**ANTNA:**")
             with st.spinner("Processing..."):
-                # Check if the query mentions medical supplies or something route-related
-                if "medical supplies" in user_query.lower():
-                    # Call the map-generating function for medical supplies
-                    response = process_query_with_rag_and_map(user_query, social_updates_df, shelters_df)
-                else:
-                    # Call the standard RAG function for other queries
-                    response = process_query_with_rag(user_query, social_updates_df)
-                
-                # Display the AI response
-                st.markdown(f"""
-                    <div class="ai-response">
-                        <strong>ANTNA:</strong><br>{response}
-                    </div>
-                """, unsafe_allow_html=True)
-    with tab2:
+                tokens = stream_query_with_rag(user_query, social_updates_df)
+                first = next(tokens, "")
+            st.write_stream(itertools.chain([first], tokens))
+        elif user_query:
+            with st.spinner("Processing..."):
+                response = process_query_with_rag(user_query, social_updates_df)
+            render_ai_response(st.empty(), response)
+        # Queries about medical supplies also get the nearest stocked shelter and a route
+        if user_query and "medical supplies" in user_query.lower():
+            render_shelter_route("medical supplies")
+    with tab2, rerun_timer.section('alerts'):
         st.markdown("<h2>⚠️ Active Alerts</h2>", unsafe_allow_html=True)
         for _, alert in alerts_df.iterrows():
             severity_color = {
@@ -187,38 +477,26 @@ def main():
                 "Medium": "🟡",
                 "Low": "🟢"
             }.get(alert["severity"], "⚪")
-            
+            activity = update_windows.summary(location=str(alert['location']))
+            # Derived alerts quote feed messages, so every field is escaped
             st.markdown(f"""
                 <div class="alert-box">
-                    <h3>{severity_color} {alert['type']} Alert</h3>
-                    <p>📍 <b>Location:</b> {alert['location']}</p>
-                    <p>🕒 <b>Time:</b> {alert['time']}</p>
-                    <p>⚠️ <b>Severity:</b> {alert['severity']}</p>
-                    <p>ℹ️ <b>Details:</b> {alert['description']}</p>
+                    <h3>{severity_color} {html.escape(str(alert['type']))} Alert</h3>
+                    <p>📍 <b>Location:</b> {html.escape(str(alert['location']))}</p>
+                    <p>🕒 <b>Time:</b> {html.escape(format_timestamp(alert['time']))}</p>
+                    <p>⚠️ <b>Severity:</b> {html.escape(str(alert['severity']))}</p>
+                    <p>ℹ️ <b>Details:</b> {html.escape(str(alert['description']))}</p>
+                    <p>📈 <b>Activity:</b> {activity['recent_count']} updates in the {velocity_window_label()}
+                    ({activity['engagement_velocity']:.0f} engagements/h)</p>
                 </div>
             """, unsafe_allow_html=True)
     
     # Centers Tab
     # Centers Tab
-    with tab3:
+    with tab3, rerun_timer.section('centers'):
         st.markdown("<h2>🏥 Critical Locations</h2>", unsafe_allow_html=True)
         
-        # Get the data
-        _, shelters_df, resources_df, _ = generate_data()
-        
-        # Define common locations in Doha
-        doha_locations = {
-            "Doha City Center": [25.3548, 51.1839],
-            "West Bay": [25.3287, 51.5309],
-            "The Pearl": [25.3741, 51.5503],
-            "Katara Cultural Village": [25.3594, 51.5277],
-            "Hamad International Airport": [25.2608, 51.6138],
-            "Education City": [25.3149, 51.4400],
-            "Souq Waqif": [25.2867, 51.5333],
-            "Aspire Zone": [25.2684, 51.4481],
-            "Msheireb Downtown": [25.2897, 51.5335],
-            "Al Waab": [25.2590, 51.4782]
-        }
+        doha_locations = DOHA_LOCATIONS
         
         # Create subtabs
         list_tab, map_tab = st.tabs(["📋 List View", "🗺️ Map View"])
@@ -227,22 +505,19 @@ def main():
         with list_tab:
             # Create three columns for better spacing
             cols = st.columns(3)
-            for idx, location in shelters_df.iterrows():
+            for idx, location in enumerate(facilities_df.to_dict('records')):
                 with cols[idx % 3]:
-                    resources = resources_df[resources_df['location'] == location['name']].iloc[0]
-                    occupancy = (location['current'] / location['capacity']) * 100
-                    
                     st.markdown(f"""
                         <div class="stats-box">
                             <h3>{location['name']}</h3>
                             <p>🏥 Type: {location['type']}</p>
                             <p>📞 Contact: {location['contact']}</p>
                             <p>👥 Occupancy: {location['current']}/{location['capacity']} 
-                            ({occupancy:.1f}%)</p>
-                            <p>💧 Water: {resources['water_supply']} units</p>
-                            <p>🍲 Food: {resources['food_supply']} units</p>
-                            <p>🏥 Medical: {resources['medical_kits']} kits</p>
-                            <p>🕒 Updated: {resources['last_updated']}</p>
+                            ({location['occupancy_pct']:.1f}%)</p>
+                            <p>💧 Water: {location['water_supply']} units</p>
+                            <p>🍲 Food: {location['food_supply']} units</p>
+                            <p>🏥 Medical: {location['medical_kits']} kits</p>
+                            <p>🕒 Updated: {format_timestamp(location['last_updated'])}</p>
                         </div>
                     """, unsafe_allow_html=True)
         
@@ -257,11 +532,11 @@ def main():
             with col1:
                 location_type = st.selectbox(
                     "Filter by type",
-                    options=['All'] + list(shelters_df['type'].unique()),
+                    options=['All'] + list(facilities_df['type'].unique()),
                     key='map_type_filter'
                 )
             
-            filtered_df = shelters_df if location_type == 'All' else shelters_df[shelters_df['type'] == location_type]
+            filtered_df = facilities_df if location_type == 'All' else facilities_df[facilities_df['type'] == location_type]
             
             with col2:
                 selected_location = st.selectbox(
@@ -281,16 +556,11 @@ def main():
                 show_route = st.checkbox("Show route", value=False)
             
             # Get selected location details
-            location_info = shelters_df[shelters_df['name'] == selected_location].iloc[0]
-            resources_info = resources_df[resources_df['location'] == selected_location].iloc[0]
+            location_info = facility_table.get(selected_location)
             
             # Display compact location details with status
-            occupancy_percentage = (location_info['current'] / location_info['capacity']) * 100
-            status_class = (
-                "status-active" if occupancy_percentage < 60 
-                else "status-busy" if occupancy_percentage < 90 
-                else "status-full"
-            )
+            occupancy_percentage = location_info['occupancy_pct']
+            status_class = location_info['status_class']
             
             st.markdown(f"""
                 <div class="stats-box {status_class}">
@@ -300,65 +570,31 @@ def main():
                             <p>🏥 Type: {location_info['type']} | 📞 {location_info['contact']}</p>
                             <p>👥 Occupancy: {location_info['current']}/{location_info['capacity']} 
                             ({occupancy_percentage:.1f}%)</p>
-                            <p>💧 Water: {resources_info['water_supply']} units | 
-                            🍲 Food: {resources_info['food_supply']} units | 
-                            🏥 Medical: {resources_info['medical_kits']} kits</p>
+                            <p>💧 Water: {location_info['water_supply']} units | 
+                            🍲 Food: {location_info['food_supply']} units | 
+                            🏥 Medical: {location_info['medical_kits']} kits</p>
                         </div>
                     </div>
                 </div>
             """, unsafe_allow_html=True)
             
-            # Map Block (Bottom)
-            m = folium.Map(
-                location=doha_locations[current_location],  # Center map on selected current location
-                zoom_start=12,
-                tiles="cartodbpositron"
-            )
-            
-            # Add markers for all locations
-            for idx, location in filtered_df.iterrows():
-                color = {
-                    'Primary': 'red',
-                    'Secondary': 'blue'
-                }.get(location['type'], 'gray')
-                
-                occupancy = (location['current'] / location['capacity']) * 100
-                resources = resources_df[resources_df['location'] == location['name']].iloc[0]
-                
-                popup_content = f"""
-                    <div style="width: 200px">
-                        <h4>{location['name']}</h4>
-                        <p><b>Type:</b> {location['type']}</p>
-                        <p><b>Contact:</b> {location['contact']}</p>
-                        <p><b>Occupancy:</b> {occupancy:.1f}%</p>
-                        <p><b>Resources:</b></p>
-                        <ul>
-                            <li>Water: {resources['water_supply']} units</li>
-                            <li>Food: {resources['food_supply']} units</li>
-                            <li>Medical: {resources['medical_kits']} kits</li>
-                        </ul>
-                    </div>
-                """
-                
-                marker = folium.Marker(
-                    location=[location['lat'], location['lon']],
-                    popup=folium.Popup(popup_content, max_width=300),
-                    icon=folium.Icon(color=color, icon='info-sign'),
-                )
-                marker.add_to(m)
+            # Rank the filtered facilities by precomputed travel time, when available
+            if route_matrix_job.matrix is not None:
+                travel_times = route_matrix_job.matrix.travel_times(current_location)
+                ranked = sorted(
+                    (travel_times[name], name) for name in filtered_df['name'] if name in travel_times
+                )[:3]
+                if ranked:
+                    st.caption("⏱️ Fastest from " + current_location + ": " + ", ".join(
+                        f"{name} ({duration / 60:.0f} min)" for duration, name in ranked
+                    ))
             
             # Add routing if requested
+            route_coords = None
             if show_route:
                 try:
                     # Get coordinates for selected current location
                     user_location = doha_locations[current_location]
-                    
-                    # Add user location marker
-                    folium.Marker(
-                        location=user_location,
-                        popup=f"Your Location ({current_location})",
-                        icon=folium.Icon(color='green', icon='info-sign')
-                    ).add_to(m)
 
                     # Calculate route using OpenRouteService
                     coordinates = [
@@ -366,26 +602,11 @@ def main():
                         [location_info['lon'], location_info['lat']]  # Destination (lon, lat)
                     ]
                     
-                    route = ors_client.directions(
-                        coordinates=coordinates,
-                        profile='driving-car',
-                        format='geojson'
-                    )
+                    route_cache.note_road_closures(social_updates_df, PLACE_COORDINATES)
+                    route = get_route(coordinates, current_location, location_info['name'])
 
                     # Extract and convert route coordinates
-                    route_coords = [[coord[1], coord[0]] for coord in route['features'][0]['geometry']['coordinates']]
-                    
-                    # Add route to map
-                    folium.PolyLine(
-                        locations=route_coords,
-                        weight=4,
-                        color='green',
-                        opacity=0.8,
-                        tooltip='Route to Location'
-                    ).add_to(m)
-
-                    # Fit map bounds to show route
-                    m.fit_bounds([user_location, [location_info['lat'], location_info['lon']]])
+                    route_coords = tuple((coord[1], coord[0]) for coord in route['features'][0]['geometry']['coordinates'])
                     
                     # Show route details
                     duration_minutes = route['features'][0]['properties']['segments'][0]['duration'] / 60
@@ -400,15 +621,22 @@ def main():
                             <p>📏 Distance: {distance_km:.1f} km</p>
                         </div>
                     """, unsafe_allow_html=True)
+                    st.caption(
+                        f"Route cache: {route_cache.stats['hits']} hits / "
+                        f"{route_cache.stats['misses']} misses ({route_cache.hit_rate():.0%} hit rate)"
+                    )
                     
                 except Exception as e:
                     st.error(f"Error calculating route: {str(e)}")
             
-            # Display the map
-            st_folium(m, height=500)
+            # Display the map (all facilities in one clustered layer)
+            components.html(
+                facility_map_html(data_version(), location_type, current_location, show_route, route_coords),
+                height=500
+            )
 
     # Inside Tab 3 (Social Updates)
-    with tab4:
+    with tab4, rerun_timer.section('updates'):
         st.markdown("<h2>📱 Live Updates</h2>", unsafe_allow_html=True)
         
         col1, col2 = st.columns([2,3])
@@ -417,63 +645,50 @@ def main():
         with col2:
             account_types = st.multiselect(
                 "Source Filter",
-                options=social_updates_df['account_type'].unique(),
-                default=social_updates_df['account_type'].unique()
+                options=list(social_updates_df['account_type'].unique()),
+                default=list(social_updates_df['account_type'].unique())
             )
         
-        # Filter updates
-        filtered_updates = social_updates_df[
-            (social_updates_df['trust_score'] >= min_trust_score) &
-            (social_updates_df['account_type'].isin(account_types))
-        ].sort_values(['timestamp', 'trust_score'], ascending=[False, False])
-        
-        # Display updates
-        for _, update in filtered_updates.iterrows():
-            # Determine trust class and verification status
-            trust_class = {
-                True: "trust-high" if update['trust_score'] >= 0.9 else "trust-medium",
-                False: "trust-low"
-            }[update['trust_score'] >= 0.7]
-            
-            verification_badge = "verified" if update['verified'] else "unverified"
-            
-            # Select badge color based on account type and verification
-            badge_color = {
-                'Official': '#00ff9d',
-                'Healthcare': '#00ff9d',
-                'Emergency': '#00ff9d',
-                'Media': '#ffbe0b',
-                'Citizen': '#888888'
-            }.get(update['account_type'], '#888888')
-            
-            st.markdown(f"""
-                <div class='social-update {trust_class}'>
-                    <div class="update-header">
-                        <div class="account-info">
-                            <strong style="color: {badge_color}">{update['account_type']}</strong>
-                            <span class="username">{update['username']}</span>
-                            <span class="badge {verification_badge}">
-                                {' ✓' if update['verified'] else '✕'}
-                            </span>
-                        </div>
-                    </div>
-                    <div class="update-content">
-                        {update['message']}
-                    </div>
-                    <div class="update-meta">
-                        <span class="meta-item">📍 {update['location']}</span>
-                        <span class="meta-separator">|</span>
-                        <span class="meta-item">💯 Trust: {update['trust_score']:.2f}</span>
-                        <span class="meta-separator">|</span>
-                        <span class="meta-item">👥 {update['engagement']}</span>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
+        trending = [
+            f"{row.location} · {row.emergency_type} ({row.recent_count})"
+            for row in update_windows.summaries().head(3).itertuples() if row.recent_count
+        ]
+        if trending:
+            st.caption(f"🔥 Most active in the {velocity_window_label()}: " + " | ".join(trending))
+
+        # Each reader's view is pinned to the newest update they have seen; newer
+        # ones are offered with "load newer" instead of shifting the pages under them
+        update_feed.sync(social_updates_df)
+        filters = (min_trust_score, tuple(account_types))
+        feed_state = session_value('update_feed', dict)
+        if feed_state.get('filters') != filters:
+            feed_state.update(filters=filters, anchor=update_feed.head(), pages=1)
+
+        newer = update_feed.newer_count(feed_state['anchor'], min_trust_score, account_types)
+        if newer and st.button(f"🔄 Load {newer} newer update{'s' if newer > 1 else ''}"):
+            feed_state['anchor'] = update_feed.head()
+            st.rerun()
+
+        # Display updates, one page of cached cards at a time
+        cursor = None
+        cards = []
+        for _ in range(feed_state['pages']):
+            records, cursor = update_feed.page(
+                cursor, FEED_PAGE_SIZE, min_trust_score, account_types, anchor=feed_state['anchor']
+            )
+            cards.append(update_feed.render(records))
+            if cursor is None:
+                break
+        st.markdown("".join(cards), unsafe_allow_html=True)
+
+        if cursor is not None and st.button("Load older updates"):
+            feed_state['pages'] += 1
+            st.rerun()
 
 
     
     # Preparation Tab
-    with tab5:
+    with tab5, rerun_timer.section('prep'):
         st.markdown("<h2>✅ Emergency Preparedness</h2>", unsafe_allow_html=True)
         
         # Checklist in a clean container
@@ -541,5 +756,8 @@ def main():
                 </div>
             """, unsafe_allow_html=True)
 
+    report_llm_gateway()
+    rerun_timer.render_debug_panel()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,69 @@
+import html
+
+import folium
+from folium.plugins import FastMarkerCluster
+
+MARKER_COLORS = {'Primary': 'red', 'Secondary': 'blue'}
+
+# Builds each marker in the browser from a [lat, lon, color, popup] row,
+# so the page carries one JSON array instead of a script block per marker
+MARKER_CALLBACK = """function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'info-sign', markerColor: row[2], prefix: 'glyphicon'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[3], {maxWidth: 300});
+    return marker;
+}"""
+
+
+def facility_points(facilities):
+    """One [lat, lon, color, popup html] row per facility in the joined facility table"""
+    occupancy = facilities['occupancy_pct']
+    colors = facilities['type'].map(MARKER_COLORS).fillna('gray')
+    popups = [
+        f'<div style="width: 200px"><h4>{html.escape(str(name))}</h4>'
+        f'<p><b>Type:</b> {html.escape(str(kind))}</p>'
+        f'<p><b>Contact:</b> {html.escape(str(contact))}</p>'
+        f'<p><b>Occupancy:</b> {occ:.1f}%</p>'
+        f'<p><b>Resources:</b></p><ul>'
+        f'<li>Water: {water} units</li><li>Food: {food} units</li><li>Medical: {medical} kits</li>'
+        f'</ul></div>'
+        for name, kind, contact, occ, water, food, medical in zip(
+            facilities['name'], facilities['type'], facilities['contact'], occupancy,
+            facilities['water_supply'], facilities['food_supply'], facilities['medical_kits']
+        )
+    ]
+    return [
+        [float(lat), float(lon), color, popup]
+        for lat, lon, color, popup in zip(facilities['lat'], facilities['lon'], colors, popups)
+    ]
+
+
+def build_facility_map(points, center, zoom_start=12, route=None, user_location=None, user_label=None):
+    """
+    Folium map with all facilities in one client-side clustered layer, plus an
+    optional route (list of [lat, lon]) from the user's location.
+    """
+    m = folium.Map(location=center, zoom_start=zoom_start, tiles="cartodbpositron")
+    FastMarkerCluster(points, callback=MARKER_CALLBACK, name='Facilities').add_to(m)
+
+    if user_location is not None:
+        folium.Marker(
+            location=user_location,
+            popup=user_label,
+            icon=folium.Icon(color='green', icon='info-sign')
+        ).add_to(m)
+    if route:
+        folium.PolyLine(
+            locations=route,
+            weight=4,
+            color='green',
+            opacity=0.8,
+            tooltip='Route to Location'
+        ).add_to(m)
+        m.fit_bounds([route[0], route[-1]])
+    return m
+
+
+def render_map_html(m):
+    """Serialize a map to a standalone HTML document"""
+    return m.get_root().render()
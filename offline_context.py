@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from data import generate_data
+from data_store import DataStore, DATA_STORE_PATH, FeedReader, merge_resources
+from retriever import UpdateRetriever
+
+OFFLINE_SYSTEM_PROMPT = (
+    "You are ANTNA, an offline emergency assistant for Qatar. "
+    "Answer in at most three short sentences, using only the data below. "
+    "If the data does not cover the question, say so and give general safety advice."
+)
+
+SEVERITY_ORDER = {'High': 0, 'Medium': 1, 'Low': 2}
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting Mistral/Llama prompts
+    return len(text) // 4 + 1
+
+
+def take_within_budget(lines, budget):
+    """Leading lines whose combined estimated size fits the token budget"""
+    taken, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        taken.append(line)
+        used += cost
+    return taken
+
+
+def format_alerts(alerts_df):
+    alerts = alerts_df.assign(_rank=alerts_df['severity'].map(SEVERITY_ORDER).fillna(3))
+    return [
+        f"- {a.severity} {a.type}, {a.location} ({a.time}): {a.description}"
+        for a in alerts.sort_values('_rank').itertuples()
+    ]
+
+
+def format_shelters(shelters_df, resources_df):
+    shelters = shelters_df.merge(resources_df, left_on='name', right_on='location', how='left')
+    shelters['free'] = shelters['capacity'] - shelters['current']
+    lines = []
+    for s in shelters.sort_values('free', ascending=False).itertuples():
+        supplies = ', '.join(
+            f"{label} {int(value)}"
+            for label, value in (('water', s.water_supply), ('food', s.food_supply), ('medical kits', s.medical_kits))
+            if pd.notna(value)
+        )
+        lines.append(f"- {s.name} ({s.type}): {int(s.free)} of {int(s.capacity)} places free; {supplies}; tel {s.contact}")
+    return lines
+
+
+def format_update(update):
+    verified = ', verified' if update.get('verified') else ''
+    return f"- [{update.get('account_type', 'Citizen')}{verified}] {update['message']} ({update.get('location', 'Qatar')})"
+
+
+class OfflineKnowledge:
+    """
+    Compact local snapshot of the ANTNA frames for grounding the offline LLM.
+
+    The prompt is split so inference can reuse work between questions: the
+    system prompt holds the instructions, alerts and shelters, and only
+    changes when the data version does, so Ollama keeps its KV cache for that
+    prefix; the per-question prompt carries just the best-matching social
+    updates and the question, within a fixed token budget.
+    """
+
+    def __init__(self, store_path=DATA_STORE_PATH, token_budget=900, prefix_share=0.6,
+                 max_updates=6, refresh_interval=30.0):
+        self.store_path = store_path
+        self.token_budget = token_budget
+        self.prefix_share = prefix_share
+        self.max_updates = max_updates
+        self.refresh_interval = refresh_interval
+        self.retriever = UpdateRetriever()
+        self.version = None
+        self.feed_cursor = 0
+        self.updates_df = None
+        self.system_prompt = OFFLINE_SYSTEM_PROMPT
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._store = None
+        self._feed = None
+        self.refresh(force=True)
+
+    def _data_store(self):
+        # One store (and so one SQLite connection per thread) for the hub's lifetime,
+        # opened once the dashboard has created the file
+        if self._store is None and os.path.exists(self.store_path):
+            self._store = DataStore(self.store_path)
+            self._feed = FeedReader(self._store, 'updates')
+        return self._store
+
+    def _store_version(self):
+        """(published version, updates feed cursor); either moving means new data"""
+        store = self._data_store()
+        return (store.version(), store.feed_cursor('updates')) if store is not None else (0, 0)
+
+    def _load(self, version, feed_cursor):
+        alerts_df, shelters_df, resources_df, updates_df = generate_data()
+        published = self._data_store().read_frames(version) if version else {}
+        if not published.get('alerts', pd.DataFrame()).empty:
+            alerts_df = published['alerts']
+        if not published.get('updates', pd.DataFrame()).empty:
+            updates_df = published['updates']
+        elif feed_cursor:
+            # Live ingest replaces the generated demo updates
+            updates_df = updates_df.iloc[:0]
+        if feed_cursor:
+            # Only rows past the reader's cursor are fetched from the store
+            updates_df = pd.concat([updates_df, self._feed.poll()], ignore_index=True)
+        if not published.get('resources', pd.DataFrame()).empty:
+            resources_df = merge_resources(resources_df, published['resources'])
+        return alerts_df, shelters_df, resources_df, updates_df
+
+    def refresh(self, force=False):
+        """Reload the snapshot if the store has a new version or ingested updates (checked at most every refresh_interval)"""
+        now = time.monotonic()
+        if not force and now - self._checked < self.refresh_interval:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                version, feed_cursor = self._store_version()
+            except Exception as e:
+                print(f"Error reading data store: {e}")
+                version, feed_cursor = self.version or 0, self.feed_cursor
+            if not force and (version, feed_cursor) == (self.version, self.feed_cursor):
+                return
+            alerts_df, shelters_df, resources_df, updates_df = self._load(version, feed_cursor)
+
+            # Alerts are the most important grounding, so they get the first share of the prefix budget
+            budget = int(self.token_budget * self.prefix_share) - estimate_tokens(OFFLINE_SYSTEM_PROMPT)
+            alert_lines = take_within_budget(format_alerts(alerts_df), budget // 2)
+            budget -= sum(estimate_tokens(line) for line in alert_lines)
+            shelter_lines = take_within_budget(format_shelters(shelters_df, resources_df), budget)
+            self.system_prompt = "\n".join(
+                [OFFLINE_SYSTEM_PROMPT, "", "Active alerts:"] + alert_lines + ["", "Shelters:"] + shelter_lines
+            )
+            self.updates_df = updates_df.reset_index(drop=True)
+            self.version, self.feed_cursor = version, feed_cursor
+
+    def build_prompt(self, question):
+        """Return (system, prompt) for Ollama's /api/generate"""
+        self.refresh()
+        system, updates_df = self.system_prompt, self.updates_df
+        budget = self.token_budget - estimate_tokens(system) - estimate_tokens(question) - 16
+        hits = self.retriever.search(updates_df, question, k=self.max_updates)
+        update_lines = take_within_budget([format_update(u) for u in hits.to_dict('records')], budget)
+        sections = []
+        if update_lines:
+            sections += ["Recent reports:"] + update_lines + [""]
+        sections += [f"Question: {question}"]
+        return system, "\n".join(sections)
@@ -0,0 +1,268 @@
+import gzip
+import heapq
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from spatial_index import EARTH_RADIUS_KM, to_unit_vectors, chord_to_km
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Default free-flow speeds (km/h) for routable OSM highway types
+HIGHWAY_SPEEDS = {
+    'motorway': 100, 'motorway_link': 60, 'trunk': 80, 'trunk_link': 50,
+    'primary': 60, 'primary_link': 40, 'secondary': 50, 'secondary_link': 35,
+    'tertiary': 40, 'tertiary_link': 30, 'unclassified': 30, 'residential': 25,
+    'living_street': 10, 'service': 15, 'road': 30,
+}
+
+# Travel-time multipliers applied around alert locations, by alert type
+ALERT_PENALTIES = {
+    'Flash Flood': 10.0,
+    'Flood': 10.0,
+    'Sandstorm': 3.0,
+    'Dust Storm': 2.0,
+    'Strong Winds': 1.3,
+    'Thunderstorm': 1.5,
+}
+SEVERITY_SCALE = {'High': 1.0, 'Medium': 0.6, 'Low': 0.3}
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * 1000 * np.arcsin(np.sqrt(a))
+
+
+def _open(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+class RoadGraph:
+    """
+    Directed road graph in CSR form: the edges leaving node u are
+    indices[indptr[u]:indptr[u + 1]], with matching lengths (m), base travel
+    times (s) and way-name ids. Penalties scale travel times without
+    touching the base weights. The penalize_* methods and directions() take
+    an optional per-call `penalties` array (see new_penalties()), so concurrent
+    callers can route with their own penalties on one shared graph.
+    """
+
+    def __init__(self, lat, lon, indptr, indices, lengths, times, name_ids, names):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        self.base_times = np.asarray(times, dtype=np.float32)
+        self.name_ids = np.asarray(name_ids, dtype=np.int32)
+        self.names = list(names)
+        self.penalties = np.ones(len(self.indices), dtype=np.float32)
+        self.max_speed = float(np.max(self.lengths / np.maximum(self.base_times, 1e-3))) if len(self.indices) else 1.0
+        self._points = to_unit_vectors(self.lat, self.lon)
+        self._tree = cKDTree(self._points) if cKDTree is not None and len(self.lat) else None
+
+    @classmethod
+    def from_osm(cls, path):
+        """Build the graph from an OSM XML extract (.osm or .osm.gz)"""
+        node_coords = {}
+        ways = []
+        for _, elem in ET.iterparse(_open(path), events=('end',)):
+            if elem.tag == 'node':
+                node_coords[int(elem.get('id'))] = (float(elem.get('lat')), float(elem.get('lon')))
+                elem.clear()
+            elif elem.tag == 'way':
+                tags = {t.get('k'): t.get('v') for t in elem.iter('tag')}
+                highway = tags.get('highway')
+                if highway in HIGHWAY_SPEEDS:
+                    refs = [int(nd.get('ref')) for nd in elem.iter('nd')]
+                    try:
+                        speed = float(tags.get('maxspeed', '').split()[0])
+                    except (ValueError, IndexError):
+                        speed = HIGHWAY_SPEEDS[highway]
+                    oneway = tags.get('oneway') in ('yes', '1', 'true') or highway.startswith('motorway') \
+                        or tags.get('junction') == 'roundabout'
+                    reverse = tags.get('oneway') == '-1'
+                    ways.append((refs, speed, oneway, reverse, tags.get('name', tags.get('ref', ''))))
+                elem.clear()
+
+        used = sorted({ref for refs, *_ in ways for ref in refs if ref in node_coords})
+        node_index = {ref: i for i, ref in enumerate(used)}
+        lat = np.array([node_coords[ref][0] for ref in used])
+        lon = np.array([node_coords[ref][1] for ref in used])
+
+        names, name_lookup = [''], {'': 0}
+        src, dst, speeds, name_ids = [], [], [], []
+        for refs, speed, oneway, reverse, name in ways:
+            name_id = name_lookup.setdefault(name, len(names))
+            if name_id == len(names):
+                names.append(name)
+            ids = [node_index[ref] for ref in refs if ref in node_index]
+            for a, b in zip(ids, ids[1:]):
+                if reverse:
+                    a, b = b, a
+                src.append(a); dst.append(b); speeds.append(speed); name_ids.append(name_id)
+                if not oneway and not reverse:
+                    src.append(b); dst.append(a); speeds.append(speed); name_ids.append(name_id)
+
+        src, dst = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+        lengths = haversine_m(lat[src], lon[src], lat[dst], lon[dst]) if len(src) else np.array([])
+        times = lengths / (np.array(speeds) / 3.6) if len(src) else np.array([])
+        order = np.argsort(src, kind='stable')
+        indptr = np.zeros(len(used) + 1, dtype=np.int64)
+        np.add.at(indptr, src + 1, 1)
+        return cls(lat, lon, np.cumsum(indptr), dst[order], lengths[order], times[order],
+                   np.array(name_ids, dtype=np.int32)[order], names)
+
+    def save(self, path):
+        np.savez_compressed(path, lat=self.lat, lon=self.lon, indptr=self.indptr, indices=self.indices,
+                            lengths=self.lengths, times=self.base_times, name_ids=self.name_ids,
+                            names=np.array(self.names, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Load a compiled .npz graph, compiling it from the OSM extract next to it if needed"""
+        if path.endswith(('.osm', '.osm.gz')):
+            compiled = path.rsplit('.osm', 1)[0] + '.graph.npz'
+            if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+                return cls.load(compiled)
+            graph = cls.from_osm(path)
+            graph.save(compiled)
+            return graph
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f['lat'], f['lon'], f['indptr'], f['indices'], f['lengths'], f['times'],
+                       f['name_ids'], f['names'].tolist())
+
+    def __len__(self):
+        return len(self.lat)
+
+    @property
+    def times(self):
+        return self.base_times * self.penalties
+
+    def nearest_node(self, lat, lon):
+        query = to_unit_vectors([lat], [lon])[0]
+        if self._tree is not None:
+            chord, node = self._tree.query(query)
+        else:
+            chords = np.linalg.norm(self._points - query, axis=1)
+            node = int(np.argmin(chords))
+            chord = chords[node]
+        return int(node), float(chord_to_km(chord)) * 1000
+
+    def clear_penalties(self):
+        self.penalties[:] = 1.0
+
+    def new_penalties(self):
+        """A fresh per-edge penalty array (all 1.0) for one routing call"""
+        return np.ones(len(self.indices), dtype=np.float32)
+
+    def penalize_area(self, lat, lon, radius_km, factor, penalties=None):
+        """Multiply travel time on edges that start within radius_km of (lat, lon)"""
+        penalties = self.penalties if penalties is None else penalties
+        sources = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        near = haversine_m(self.lat[sources], self.lon[sources], lat, lon) <= radius_km * 1000
+        penalties[near] = np.maximum(penalties[near], factor)
+        return int(near.sum())
+
+    def penalize_roads(self, text, factor, penalties=None):
+        """Penalize named roads mentioned in text, e.g. 'Traffic diverted on Al Wakrah Road'"""
+        penalties = self.penalties if penalties is None else penalties
+        text = text.lower()
+        hit = [i for i, name in enumerate(self.names) if name and name.lower() in text]
+        mask = np.isin(self.name_ids, hit)
+        penalties[mask] = np.maximum(penalties[mask], factor)
+        return int(mask.sum())
+
+    def apply_alerts(self, alerts_df, place_coordinates, radius_km=5.0, penalties=None):
+        """Set penalties from the current alerts, replacing any previous ones"""
+        if penalties is None:
+            self.clear_penalties()
+        else:
+            penalties[:] = 1.0
+        for _, alert in alerts_df.iterrows():
+            coords = place_coordinates.get(alert['location'])
+            factor = ALERT_PENALTIES.get(alert['type'])
+            if coords is None or factor is None:
+                continue
+            scale = SEVERITY_SCALE.get(alert['severity'], 0.5)
+            self.penalize_area(coords[0], coords[1], radius_km, 1 + (factor - 1) * scale, penalties)
+
+    def shortest_path(self, source, target, times=None):
+        """A* over penalized travel times; the straight line at max speed is an admissible heuristic"""
+        indptr, indices = self.indptr, self.indices
+        times = self.times if times is None else times
+        lat, lon = self.lat, self.lon
+        target_lat, target_lon = lat[target], lon[target]
+        max_speed = self.max_speed
+
+        def heuristic(node):
+            return haversine_m(lat[node], lon[node], target_lat, target_lon) / max_speed
+
+        best = {source: 0.0}
+        previous = {source: (-1, -1)}
+        queue = [(heuristic(source), 0.0, source)]
+        closed = set()
+        while queue:
+            _, cost, node = heapq.heappop(queue)
+            if node == target:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = int(indices[edge])
+                new_cost = cost + float(times[edge])
+                if new_cost < best.get(neighbour, np.inf):
+                    best[neighbour] = new_cost
+                    previous[neighbour] = (node, edge)
+                    heapq.heappush(queue, (new_cost + heuristic(neighbour), new_cost, neighbour))
+        else:
+            return None
+
+        nodes, edges = [target], []
+        while previous[nodes[-1]][0] != -1:
+            node, edge = previous[nodes[-1]]
+            nodes.append(node)
+            edges.append(edge)
+        return nodes[::-1], edges[::-1]
+
+    def directions(self, coordinates, profile='driving-car', format='geojson', penalties=None, **options):
+        """
+        Route between (lon, lat) waypoints and return GeoJSON shaped like
+        ors_client.directions, so it can stand in for ORS.
+        """
+        times = self.times if penalties is None else self.base_times * penalties
+        snapped = [self.nearest_node(lat, lon)[0] for lon, lat in coordinates]
+        line, segments = [], []
+        for source, target in zip(snapped, snapped[1:]):
+            path = self.shortest_path(source, target, times)
+            if path is None:
+                raise ValueError("No offline route between waypoints")
+            nodes, edges = path
+            segments.append({
+                'distance': float(self.lengths[edges].sum()) if edges else 0.0,
+                'duration': float(times[edges].sum()) if edges else 0.0
+            })
+            points = [[float(self.lon[n]), float(self.lat[n])] for n in nodes]
+            line.extend(points if not line else points[1:])
+
+        return {
+            'type': 'FeatureCollection',
+            'features': [{
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': line},
+                'properties': {
+                    'segments': segments,
+                    'summary': {
+                        'distance': sum(s['distance'] for s in segments),
+                        'duration': sum(s['duration'] for s in segments)
+                    },
+                    'source': 'offline'
+                }
+            }]
+        }
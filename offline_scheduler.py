@@ -0,0 +1,125 @@
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+
+class QueueFull(Exception):
+    """The scheduler cannot take another request; callers should answer 503"""
+
+
+class Ticket:
+    def __init__(self, device_id, seq):
+        self.device_id = device_id
+        self.seq = seq
+        self.granted = threading.Event()
+        self.done = False
+
+
+class FairScheduler:
+    """
+    Admission control in front of the local Ollama backend.
+
+    At most `parallelism` requests run at once (match OLLAMA_NUM_PARALLEL so
+    Ollama batches them on the GPU); the rest wait in a bounded queue. Waiting
+    requests are dispatched round-robin across devices, so one phone sending
+    many messages cannot starve the others.
+    """
+
+    def __init__(self, parallelism=2, max_queue=64, max_per_device=4):
+        self.parallelism = parallelism
+        self.max_queue = max_queue
+        self.max_per_device = max_per_device
+        self._queues = OrderedDict()  # device_id -> deque of waiting tickets, in round-robin order
+        self._running = set()
+        self._waiting = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {'admitted': 0, 'rejected': 0, 'completed': 0, 'cancelled': 0}
+
+    def submit(self, device_id):
+        """Queue a request for device_id; raises QueueFull when saturated"""
+        device_id = device_id or 'anonymous'
+        with self._lock:
+            queue = self._queues.get(device_id)
+            if self._waiting >= self.max_queue or (queue is not None and len(queue) >= self.max_per_device):
+                self.stats['rejected'] += 1
+                raise QueueFull(f"{self._waiting} requests already waiting")
+            ticket = Ticket(device_id, next(self._seq))
+            self.stats['admitted'] += 1
+            if queue is None:
+                queue = self._queues[device_id] = deque()
+            queue.append(ticket)
+            self._waiting += 1
+            self._dispatch()
+            return ticket
+
+    def _dispatch(self):
+        # Hand free slots to the head of each device queue in turn
+        while self._queues and len(self._running) < self.parallelism:
+            device_id, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            self._waiting -= 1
+            if queue:
+                self._queues.move_to_end(device_id)
+            else:
+                del self._queues[device_id]
+            self._running.add(ticket)
+            ticket.granted.set()
+
+    def resize(self, parallelism):
+        """Change the number of slots; running requests above a lowered limit finish normally"""
+        with self._lock:
+            self.parallelism = max(1, parallelism)
+            self._dispatch()
+
+    def position(self, ticket):
+        """Requests that will be dispatched before this one (0 = running or next)"""
+        with self._lock:
+            if ticket.granted.is_set():
+                return 0
+            queue = self._queues.get(ticket.device_id)
+            if queue is None or ticket not in queue:
+                return 0
+            # Devices ahead in the rotation get one more turn than those behind
+            index = queue.index(ticket)
+            ahead, behind = index, False
+            for device_id, other in self._queues.items():
+                if device_id == ticket.device_id:
+                    behind = True
+                else:
+                    ahead += min(len(other), index if behind else index + 1)
+            return ahead
+
+    def wait(self, ticket, timeout=None):
+        """Block until the ticket may run; False on timeout"""
+        return ticket.granted.wait(timeout)
+
+    def release(self, ticket):
+        """Finish (or abandon) a request, freeing its slot or queue place"""
+        with self._lock:
+            if ticket.done:
+                return
+            ticket.done = True
+            if ticket in self._running:
+                self._running.discard(ticket)
+                self.stats['completed'] += 1
+            else:
+                queue = self._queues.get(ticket.device_id)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    self._waiting -= 1
+                    if not queue:
+                        del self._queues[ticket.device_id]
+                self.stats['cancelled'] += 1
+            self._dispatch()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(
+                self.stats,
+                running=len(self._running),
+                waiting=self._waiting,
+                parallelism=self.parallelism,
+                max_queue=self.max_queue,
+                devices_waiting=len(self._queues)
+            )
@@ -0,0 +1,136 @@
+import threading
+import time
+
+
+class OllamaMonitor:
+    """
+    Background health check for the local Ollama server.
+
+    A daemon thread probes the HTTP API every `interval` seconds (/api/tags for
+    the installed models, /api/ps for the ones loaded in memory) and keeps the
+    result in memory, so request handlers read status without any I/O. When
+    the server is up but the model is cold, the monitor publishes that state
+    first and then loads the model on a second thread with an empty generate
+    call, asking Ollama to keep it resident for `keep_alive`.
+    """
+
+    def __init__(self, session, base_url, model, interval=10.0, keep_alive='30m', timeout=3.0):
+        self.session = session
+        self.base_url = base_url
+        self.model = model
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._state = {
+            'running': False,
+            'models': [],
+            'model_available': False,
+            'warm': False,
+            'warming': False,
+            'last_checked': None,
+            'error': None,
+        }
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ollama-monitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Probe now instead of waiting for the next interval"""
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            return dict(self._state, models=list(self._state['models']))
+
+    @property
+    def running(self):
+        with self._lock:
+            return self._state['running']
+
+    def wait_until_running(self, timeout):
+        """Block until a probe sees the server up (used after starting it); False on timeout"""
+        self.wake()
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while not self._state['running']:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return True
+
+    def _matches(self, name):
+        return name == self.model or name.split(':')[0] == self.model
+
+    def _get_models(self, path):
+        response = self.session.get(f'{self.base_url}{path}', timeout=self.timeout)
+        response.raise_for_status()
+        return [m.get('name') or m.get('model', '') for m in response.json().get('models', [])]
+
+    def _warm_up(self):
+        # A generate call without a prompt just loads the model into memory
+        response = self.session.post(
+            f'{self.base_url}/api/generate',
+            json={'model': self.model, 'keep_alive': self.keep_alive},
+            timeout=(self.timeout, 300)
+        )
+        response.raise_for_status()
+
+    def _start_warm_up(self):
+        with self._lock:
+            if self._state['warming']:
+                return
+            self._state['warming'] = True
+        threading.Thread(target=self._warm_up_in_background, name='ollama-warm-up', daemon=True).start()
+
+    def _warm_up_in_background(self):
+        error = None
+        try:
+            self._warm_up()
+        except Exception as e:
+            error = str(e)
+        with self._changed:
+            self._state['warming'] = False
+            if error is None:
+                self._state['warm'] = True
+            else:
+                self._state['error'] = error
+            self._changed.notify_all()
+
+    def probe(self):
+        state = {'last_checked': time.time(), 'error': None}
+        cold = False
+        try:
+            models = self._get_models('/api/tags')
+            state.update(running=True, models=models,
+                         model_available=any(self._matches(m) for m in models))
+            try:
+                state['warm'] = any(self._matches(m) for m in self._get_models('/api/ps'))
+            except Exception:
+                # Older Ollama builds have no /api/ps; treat the model as cold
+                state['warm'] = False
+            cold = state['model_available'] and not state['warm']
+        except Exception as e:
+            state.update(running=state.get('running', False), error=str(e))
+            if not state['running']:
+                state.update(models=[], model_available=False, warm=False)
+        with self._changed:
+            self._state.update(state)
+            self._changed.notify_all()
+        if cold:
+            # Loading can take minutes; the server is already reported as running meanwhile
+            self._start_warm_up()
+        return self.status()
+
+    def _run(self):
+        while True:
+            self.probe()
+            self._wake.wait(self.interval)
+            self._wake.clear()
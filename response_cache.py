@@ -0,0 +1,95 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from retriever import tokenize
+
+
+def shingles(text):
+    """Query terms plus adjacent-term pairs, so word order still counts a little"""
+    terms = tokenize(text)
+    return frozenset(terms) | frozenset(zip(terms, terms[1:]))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def normalize(query):
+    """Query terms joined by spaces; queries made only of stopwords fall back to the lowercased text"""
+    return ' '.join(tokenize(query)) or ' '.join(query.lower().split())
+
+
+def context_fingerprint(context):
+    return hashlib.sha1(context.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU cache of LLM answers keyed by the normalized query and a fingerprint
+    of the retrieved context.
+
+    A lookup hits when a cached query for the same context is a near-duplicate
+    (shingle Jaccard similarity >= threshold). The context is everything the
+    answer was generated from, so new data only invalidates the answers whose
+    retrieved context it changes: their fingerprint no longer matches.
+    """
+
+    def __init__(self, max_entries=1000, threshold=0.8):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries = OrderedDict()  # (fingerprint, normalized query) -> entry
+        self._by_context = {}  # fingerprint -> set of normalized queries
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'saved_seconds': 0.0}
+
+    def _find(self, fingerprint, query_shingles, normalized):
+        if (fingerprint, normalized) in self._entries:
+            return fingerprint, normalized
+        best, best_score = None, self.threshold
+        for candidate in self._by_context.get(fingerprint, ()):
+            score = jaccard(query_shingles, self._entries[(fingerprint, candidate)]['shingles'])
+            if score >= best_score:
+                best, best_score = (fingerprint, candidate), score
+        return best
+
+    def get(self, query, context):
+        """Return the cached answer for a near-identical query over the same context, or None"""
+        query_shingles = shingles(query)
+        normalized = normalize(query)
+        fingerprint = context_fingerprint(context)
+        with self._lock:
+            key = self._find(fingerprint, query_shingles, normalized)
+            if key is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry = self._entries[key]
+            self.stats['hits'] += 1
+            self.stats['saved_seconds'] += entry['latency']
+            return entry['response']
+
+    def put(self, query, context, response, latency=0.0):
+        normalized = normalize(query)
+        fingerprint = context_fingerprint(context)
+        with self._lock:
+            key = (fingerprint, normalized)
+            self._entries[key] = {'response': response, 'shingles': shingles(query), 'latency': latency}
+            self._entries.move_to_end(key)
+            self._by_context.setdefault(fingerprint, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                (old_fingerprint, old_query), _ = self._entries.popitem(last=False)
+                queries = self._by_context.get(old_fingerprint)
+                if queries is not None:
+                    queries.discard(old_query)
+                    if not queries:
+                        del self._by_context[old_fingerprint]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
@@ -0,0 +1,161 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ENGLISH_STOPWORDS = {
+    'a', 'about', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'can', 'could',
+    'do', 'does', 'for', 'from', 'has', 'have', 'how', 'i', 'if', 'in', 'into', 'is',
+    'it', 'its', 'me', 'my', 'near', 'nearest', 'of', 'on', 'or', 'our', 'should',
+    'so', 'that', 'the', 'their', 'there', 'this', 'to', 'us', 'was', 'we', 'what',
+    'when', 'where', 'which', 'who', 'why', 'will', 'with', 'would', 'you', 'your'
+}
+
+ARABIC_STOPWORDS = {
+    'في', 'من', 'على', 'الى', 'عن', 'مع', 'هذا', 'هذه', 'ذلك', 'تلك', 'ما', 'ماذا',
+    'هل', 'اين', 'كيف', 'متى', 'لماذا', 'هو', 'هي', 'انا', 'نحن', 'او', 'ثم', 'قد',
+    'لا', 'كل', 'التي', 'الذي', 'عند', 'بعد', 'قبل'
+}
+
+STOPWORDS = ENGLISH_STOPWORDS | ARABIC_STOPWORDS
+
+_ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_ARABIC_LETTER_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ة': 'ه', 'ؤ': 'و', 'ئ': 'ي'
+})
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """Fold case, width and Arabic letter variants so queries match the feed"""
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    text = _ARABIC_DIACRITICS.sub('', text)
+    return text.translate(_ARABIC_LETTER_MAP)
+
+
+def _stem(token):
+    # Light English plural stripping; Arabic tokens are left as normalized
+    if token.isascii() and len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Split text into normalized index terms with stopwords removed"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(normalize_text(text)):
+        if token in STOPWORDS:
+            continue
+        # Drop the Arabic definite article so "الوكرة" matches "وكرة"
+        if token.startswith('ال') and len(token) > 4:
+            token = token[2:]
+        tokens.append(_stem(token))
+    return tokens
+
+
+class UpdateRetriever:
+    """
+    Incremental BM25 inverted index over a social updates frame.
+
+    Documents are addressed by row position, so the index stays valid as long as
+    the frame is only appended to. Trust score and timestamp are read from the
+    frame at query time, which keeps them fresh without re-indexing.
+    """
+
+    def __init__(self, text_column='message', k1=1.5, b=0.75,
+                 trust_weight=0.5, recency_half_life_hours=6.0):
+        self.text_column = text_column
+        self.k1 = k1
+        self.b = b
+        self.trust_weight = trust_weight
+        self.recency_half_life_hours = recency_half_life_hours
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.postings = defaultdict(dict)
+        self.doc_lengths = []
+        self.total_length = 0
+        self._first_text = None
+        self._last_text = None
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add_documents(self, texts):
+        """Index new documents after the ones already indexed"""
+        for text in texts:
+            doc_id = len(self.doc_lengths)
+            terms = tokenize(text)
+            for term in terms:
+                postings = self.postings[term]
+                postings[doc_id] = postings.get(doc_id, 0) + 1
+            self.doc_lengths.append(len(terms))
+            self.total_length += len(terms)
+            if self._first_text is None:
+                self._first_text = text
+            self._last_text = text
+
+    def sync(self, df):
+        """Bring the index up to date with df, appending only the new rows"""
+        texts = df[self.text_column].fillna('').astype(str)
+        indexed = len(self)
+        if indexed and (len(texts) < indexed
+                        or texts.iat[0] != self._first_text
+                        or texts.iat[indexed - 1] != self._last_text):
+            # Frame was replaced rather than appended to
+            self.reset()
+            indexed = 0
+        if len(texts) > indexed:
+            self.add_documents(texts.iloc[indexed:].tolist())
+
+    def score(self, query):
+        """Return (doc_ids, bm25 scores) for documents matching any query term"""
+        n_docs = len(self)
+        if not n_docs:
+            return np.array([], dtype=int), np.array([])
+
+        avg_length = self.total_length / n_docs or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        doc_ids = np.fromiter(scores.keys(), dtype=int, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=float, count=len(scores))
+        return doc_ids, values
+
+    def search(self, df, query, k=10, now=None):
+        """Return the top-k rows of df for query, weighted by trust and recency"""
+        # The index is shared between Streamlit sessions
+        with self._lock:
+            self.sync(df)
+            doc_ids, bm25 = self.score(query)
+        if not len(doc_ids):
+            return df.iloc[0:0]
+
+        candidates = df.iloc[doc_ids]
+        weight = np.ones(len(doc_ids))
+        if 'trust_score' in candidates:
+            trust = pd.to_numeric(candidates['trust_score'], errors='coerce').fillna(0).to_numpy()
+            weight *= (1 - self.trust_weight) + self.trust_weight * trust
+        if 'timestamp' in candidates and self.recency_half_life_hours:
+            now = now or datetime.now()
+            timestamps = pd.to_datetime(candidates['timestamp'], errors='coerce')
+            age_hours = ((now - timestamps).dt.total_seconds() / 3600).clip(lower=0).fillna(np.inf)
+            weight *= 0.5 + 0.5 * np.exp2(-age_hours.to_numpy() / self.recency_half_life_hours)
+
+        final = bm25 * weight
+        top = np.argsort(-final, kind='stable')[:k]
+        return candidates.iloc[top]
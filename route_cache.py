@@ -0,0 +1,200 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Closure wording within a few words of a road, either order: "Traffic diverted on Al Wakrah
+# Road", "Corniche blocked", "flooded underpass". Flooding alone ("drains cleared to prevent
+# flooding") is weather, not a closure.
+_CLOSED = r'(?:clos(?:ed|ure|ures)|blocked|diver(?:ted|sion)|flooded|submerged|impassable)'
+_ROAD = r'(?:roads?|rd|streets?|st|highway|expressway|corniche|interchange|roundabout|bridge|tunnel|underpass|lanes?)'
+_GAP = r'[^\w.;:!?]+'  # words between must stay in the same clause
+ROAD_CLOSURE_PATTERN = re.compile(
+    rf'\b{_CLOSED}(?:{_GAP}\w+){{0,4}}?{_GAP}{_ROAD}\b|\b{_ROAD}(?:{_GAP}\w+){{0,4}}?{_GAP}{_CLOSED}\b', re.IGNORECASE
+)
+
+KM_PER_DEGREE = 111.32
+
+
+def geohash_encode(lat, lon, precision=7):
+    """Standard base32 geohash; precision 7 is a cell of roughly 150m"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+class RouteCache:
+    """
+    Two-level cache for ORS directions: an in-memory LRU in front of a SQLite
+    table that survives restarts. Entries expire after ttl seconds and also
+    record the coarse geohash cells their geometry passes through, so a
+    road closure can invalidate just the routes that cross it.
+    """
+
+    def __init__(self, path='route_cache.sqlite', ttl=6 * 3600, max_memory_entries=512,
+                 precision=7, cell_precision=5):
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.precision = precision
+        self.cell_precision = cell_precision
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._closures = None  # closure messages already acted on
+        self.stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'invalidated': 0}
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, created REAL, route TEXT)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS route_cells (key TEXT, cell TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS route_cells_cell ON route_cells (cell)')
+        self._db.commit()
+
+    def make_key(self, coordinates, profile, **options):
+        """Snap (lon, lat) waypoints to geohashes and combine with the profile and options"""
+        cells = [geohash_encode(lat, lon, self.precision) for lon, lat in coordinates]
+        extra = json.dumps(options, sort_keys=True, default=str) if options else ''
+        return f"{profile}|{'>'.join(cells)}|{extra}"
+
+    def _route_cells(self, route):
+        cells = set()
+        for feature in route.get('features', []):
+            for lon, lat, *_ in feature.get('geometry', {}).get('coordinates', []):
+                cells.add(geohash_encode(lat, lon, self.cell_precision))
+        return cells
+
+    def _remember(self, key, created, route):
+        self._memory[key] = (created, route)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            source = 'memory_hits'
+            if entry is None:
+                row = self._db.execute('SELECT created, route FROM routes WHERE key = ?', (key,)).fetchone()
+                entry = (row[0], json.loads(row[1])) if row else None
+                source = 'disk_hits'
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if now - entry[0] > self.ttl:
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                self._delete([key])
+                return None
+            self._remember(key, *entry)
+            self.stats['hits'] += 1
+            self.stats[source] += 1
+            return entry[1]
+
+    def put(self, key, route):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, route)
+            self._db.execute('INSERT OR REPLACE INTO routes VALUES (?, ?, ?)', (key, created, json.dumps(route)))
+            self._db.execute('DELETE FROM route_cells WHERE key = ?', (key,))
+            self._db.executemany('INSERT INTO route_cells VALUES (?, ?)',
+                                 [(key, cell) for cell in self._route_cells(route)])
+            self._db.commit()
+
+    def _delete(self, keys):
+        for key in keys:
+            self._memory.pop(key, None)
+        self._db.executemany('DELETE FROM routes WHERE key = ?', [(k,) for k in keys])
+        self._db.executemany('DELETE FROM route_cells WHERE key = ?', [(k,) for k in keys])
+        self._db.commit()
+        self.stats['invalidated'] += len(keys)
+
+    def _cells_near(self, lat, lon, radius_km):
+        # Sample a grid finer than a cell (~4.9 km at precision 5) over the square around the point
+        steps = int(np.ceil(radius_km / 2.0))
+        lats = lat + np.linspace(-radius_km, radius_km, 2 * steps + 1) / KM_PER_DEGREE
+        lons = lon + np.linspace(-radius_km, radius_km, 2 * steps + 1) / (KM_PER_DEGREE * np.cos(np.radians(lat)))
+        return {geohash_encode(a, b, self.cell_precision) for a in lats for b in lons}
+
+    def invalidate_area(self, lat, lon, radius_km=0.0):
+        """Drop every cached route whose geometry passes within about radius_km of (lat, lon)"""
+        cells = self._cells_near(lat, lon, radius_km) if radius_km else {geohash_encode(lat, lon, self.cell_precision)}
+        with self._lock:
+            keys = sorted({
+                row[0] for cell in cells
+                for row in self._db.execute('SELECT DISTINCT key FROM route_cells WHERE cell = ?', (cell,))
+            })
+            self._delete(keys)
+        return len(keys)
+
+    def invalidate_all(self):
+        with self._lock:
+            keys = [row[0] for row in self._db.execute('SELECT key FROM routes')]
+            self._delete(keys)
+            self._memory.clear()
+        return len(keys)
+
+    def note_road_closures(self, social_updates_df, place_coordinates=None, radius_km=5.0):
+        """
+        Invalidate the routes near closures reported since the last call.
+
+        A closure is placed by the first known place name in its message, else
+        by the update's location; routes passing within radius_km of it are
+        dropped. A closure that cannot be placed clears every route. Closures
+        that merely age out of the feed invalidate nothing. Returns the number
+        of routes dropped.
+        """
+        place_coordinates = place_coordinates or {}
+        messages = social_updates_df['message'].fillna('').astype(str)
+        is_closure = messages.str.contains(ROAD_CLOSURE_PATTERN)
+        locations = social_updates_df['location'] if 'location' in social_updates_df else [None] * len(messages)
+        closures = dict(zip(messages[is_closure], pd.Series(locations, index=messages.index)[is_closure]))
+        first_call, seen = self._closures is None, self._closures or set()
+        self._closures = set(closures)
+        if first_call:
+            return 0
+        dropped = 0
+        for message, location in closures.items():
+            if message in seen:
+                continue
+            text = message.lower()
+            place = next((name for name in place_coordinates if name.lower() in text), location)
+            coords = place_coordinates.get(place)
+            if coords is None:
+                return dropped + self.invalidate_all()
+            dropped += self.invalidate_area(coords[0], coords[1], radius_km)
+        return dropped
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+
+def cached_directions(client, route_cache, coordinates, profile='driving-car', **options):
+    """Drop-in replacement for client.directions(coordinates=..., profile=..., **options)"""
+    key = route_cache.make_key(coordinates, profile, **options)
+    route = route_cache.get(key)
+    if route is None:
+        route = client.directions(coordinates=coordinates, profile=profile, **options)
+        route_cache.put(key, route)
+    return route
@@ -0,0 +1,331 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from route_cache import cached_directions
+
+# Public ORS matrix limits: sources x destinations per request, and locations per request
+MAX_MATRIX_ELEMENTS = 3500
+MAX_MATRIX_LOCATIONS = 50
+
+
+def simplify_polyline(points, tolerance=1e-4):
+    """Douglas-Peucker simplification of an (N, 2) array; tolerance is in degrees (~11m)"""
+    points = np.asarray(points, dtype=float)
+    if len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        length = np.hypot(*segment) or 1e-12
+        offsets = points[start + 1:end] - points[start]
+        distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    return points[keep]
+
+
+def encode_polyline(points, precision=5):
+    """Encode (lat, lon) pairs with the Google polyline algorithm"""
+    factor = 10 ** precision
+    result, previous = [], (0, 0)
+    for lat, lon in points:
+        current = (int(round(lat * factor)), int(round(lon * factor)))
+        for value, last in zip(current, previous):
+            delta = value - last
+            delta = ~(delta << 1) if delta < 0 else delta << 1
+            while delta >= 0x20:
+                result.append(chr((0x20 | (delta & 0x1f)) + 63))
+                delta >>= 5
+            result.append(chr(delta + 63))
+        previous = current
+    return ''.join(result)
+
+
+def decode_polyline(encoded, precision=5):
+    """Decode a Google polyline string into a list of [lat, lon]"""
+    factor = 10 ** precision
+    points, index, lat, lon = [], 0, 0, 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift, value = 0, 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append([lat / factor, lon / factor])
+    return points
+
+
+def _batches(n_origins, n_destinations):
+    # Split the origin x destination grid into blocks that fit the ORS matrix limits
+    dest_step = min(n_destinations, max(MAX_MATRIX_LOCATIONS - n_origins, MAX_MATRIX_LOCATIONS // 2))
+    origin_step = min(n_origins, MAX_MATRIX_LOCATIONS - dest_step, MAX_MATRIX_ELEMENTS // dest_step)
+    for o in range(0, n_origins, origin_step):
+        for d in range(0, n_destinations, dest_step):
+            yield slice(o, min(o + origin_step, n_origins)), slice(d, min(d + dest_step, n_destinations))
+
+
+class ThrottledClient:
+    """
+    Wraps an ORS client so directions() and distance_matrix() requests start
+    at least `interval` seconds apart. Thread-safe: one instance shared by
+    every session and the matrix job keeps them inside one quota.
+    """
+
+    def __init__(self, client, interval=1.6):
+        self.client = client
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_turn(self):
+        # Reserve the next start time, so failed requests count against the limit too
+        with self._lock:
+            start = max(time.monotonic(), self._next)
+            self._next = start + self.interval
+        wait = start - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def directions(self, **kwargs):
+        self._wait_turn()
+        return self.client.directions(**kwargs)
+
+    def distance_matrix(self, **kwargs):
+        self._wait_turn()
+        return self.client.distance_matrix(**kwargs)
+
+
+class RouteMatrix:
+    """
+    Precomputed travel durations (s), distances (m) and simplified route
+    polylines between every named origin and every shelter, stored as a
+    compressed .npz file so it can be used with no network.
+    """
+
+    def __init__(self, origin_names, origin_coords, destination_names, destination_coords,
+                 durations, distances, polylines, created=None):
+        self.origin_names = list(origin_names)
+        self.origin_coords = np.asarray(origin_coords, dtype=float)
+        self.destination_names = list(destination_names)
+        self.destination_coords = np.asarray(destination_coords, dtype=float)
+        self.durations = np.asarray(durations, dtype=np.float32)
+        self.distances = np.asarray(distances, dtype=np.float32)
+        self.polylines = np.asarray(polylines, dtype=str)
+        self.created = created or time.time()
+
+    @classmethod
+    def compute(cls, client, origins, shelters_df, profile='driving-car', with_geometry=True,
+                route_cache=None, request_interval=1.6):
+        """
+        Fill the matrix from the ORS matrix endpoint, then fetch geometries pair
+        by pair. Requests are spaced `request_interval` apart unless client is
+        already a ThrottledClient, whose own limit then applies.
+        """
+        if not isinstance(client, ThrottledClient):
+            client = ThrottledClient(client, request_interval)
+        origin_names = list(origins)
+        origin_coords = np.array([origins[name] for name in origin_names], dtype=float)
+        destination_names = shelters_df['name'].tolist()
+        destination_coords = shelters_df[['lat', 'lon']].to_numpy(dtype=float)
+        n_o, n_d = len(origin_names), len(destination_names)
+        durations = np.full((n_o, n_d), np.nan, dtype=np.float32)
+        distances = np.full((n_o, n_d), np.nan, dtype=np.float32)
+
+        for o_slice, d_slice in _batches(n_o, n_d):
+            block_origins = origin_coords[o_slice][:, ::-1].tolist()
+            block_destinations = destination_coords[d_slice][:, ::-1].tolist()
+            result = client.distance_matrix(
+                locations=block_origins + block_destinations,
+                profile=profile,
+                sources=list(range(len(block_origins))),
+                destinations=list(range(len(block_origins), len(block_origins) + len(block_destinations))),
+                metrics=['duration', 'distance']
+            )
+            durations[o_slice, d_slice] = np.array(result['durations'], dtype=float)
+            distances[o_slice, d_slice] = np.array(result['distances'], dtype=float)
+
+        polylines = np.full((n_o, n_d), '', dtype=object)
+        if with_geometry:
+            # Only requests that reach ORS are spaced out; cache hits go straight through
+            for i in range(n_o):
+                for j in range(n_d):
+                    coordinates = [origin_coords[i][::-1].tolist(), destination_coords[j][::-1].tolist()]
+                    try:
+                        if route_cache is not None:
+                            route = cached_directions(client, route_cache, coordinates, profile, format='geojson')
+                        else:
+                            route = client.directions(coordinates=coordinates, profile=profile, format='geojson')
+                    except Exception as e:
+                        print(f"Error fetching route {origin_names[i]} -> {destination_names[j]}: {e}")
+                        continue
+                    line = np.array(route['features'][0]['geometry']['coordinates'])[:, 1::-1]
+                    polylines[i, j] = encode_polyline(simplify_polyline(line))
+
+        return cls(origin_names, origin_coords, destination_names, destination_coords,
+                   durations, distances, polylines.astype(str))
+
+    def save(self, path):
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            origin_names=np.array(self.origin_names, dtype=str),
+            origin_coords=self.origin_coords,
+            destination_names=np.array(self.destination_names, dtype=str),
+            destination_coords=self.destination_coords,
+            durations=self.durations,
+            distances=self.distances,
+            polylines=self.polylines,
+            created=np.array(self.created)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f['origin_names'].tolist(), f['origin_coords'], f['destination_names'].tolist(),
+                       f['destination_coords'], f['durations'], f['distances'], f['polylines'],
+                       float(f['created']))
+
+    def covers(self, origins, shelters_df):
+        """True if the matrix has every origin and exactly these shelters, at these coordinates"""
+        if not set(origins) <= set(self.origin_names) or set(shelters_df['name']) != set(self.destination_names):
+            return False
+        rows = [self.destination_names.index(name) for name in shelters_df['name']]
+        return np.allclose(self.destination_coords[rows], shelters_df[['lat', 'lon']].to_numpy(dtype=float))
+
+    def origin_index(self, location, max_offset_deg=0.01):
+        """Index of the precomputed origin at (or within ~1km of) location, else None"""
+        if isinstance(location, str):
+            return self.origin_names.index(location) if location in self.origin_names else None
+        offsets = np.abs(self.origin_coords - np.asarray(location, dtype=float)).max(axis=1)
+        i = int(np.argmin(offsets))
+        return i if offsets[i] <= max_offset_deg else None
+
+    def travel_times(self, location):
+        """Durations in seconds from location to every shelter, keyed by shelter name"""
+        i = self.origin_index(location)
+        if i is None:
+            return {}
+        return {name: float(d) for name, d in zip(self.destination_names, self.durations[i]) if np.isfinite(d)}
+
+    def directions(self, origin, destination_name):
+        """Return the stored route in the same GeoJSON shape as ors_client.directions"""
+        i = self.origin_index(origin)
+        if i is None or destination_name not in self.destination_names:
+            return None
+        j = self.destination_names.index(destination_name)
+        if not np.isfinite(self.durations[i, j]):
+            return None
+        points = decode_polyline(self.polylines[i, j]) if self.polylines[i, j] else [
+            self.origin_coords[i].tolist(), self.destination_coords[j].tolist()
+        ]
+        return {
+            'type': 'FeatureCollection',
+            'features': [{
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': [[lon, lat] for lat, lon in points]},
+                'properties': {
+                    'segments': [{'duration': float(self.durations[i, j]), 'distance': float(self.distances[i, j])}],
+                    'summary': {'duration': float(self.durations[i, j]), 'distance': float(self.distances[i, j])},
+                    'source': 'precomputed'
+                }
+            }]
+        }
+
+
+class RouteMatrixJob:
+    """
+    Loads the stored matrix and refreshes it on a background thread when
+    missing, stale or out of date with the shelters passed to sync().
+    """
+
+    def __init__(self, client, origins, shelters_df, path='route_matrix.npz', max_age=24 * 3600,
+                 route_cache=None):
+        self.client = client
+        self.origins = origins
+        self.shelters_df = shelters_df
+        self.path = path
+        self.max_age = max_age
+        self.route_cache = route_cache
+        self.matrix = None
+        self.error = None
+        self._thread = None
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                self.matrix = RouteMatrix.load(path)
+            except Exception as e:
+                self.error = e
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def needs_refresh(self):
+        return (self.matrix is None
+                or time.time() - self.matrix.created > self.max_age
+                or not self.matrix.covers(self.origins, self.shelters_df))
+
+    def start(self):
+        with self._lock:
+            if self.running or not self.needs_refresh():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def sync(self, shelters_df):
+        """
+        Use these shelters from now on, recomputing in the background if the
+        matrix does not match them. The old matrix keeps serving until the new
+        one is ready, so an offline hub is never left without a fallback.
+        """
+        self.shelters_df = shelters_df
+        self.start()
+
+    def _run(self):
+        while True:
+            shelters_df = self.shelters_df
+            try:
+                matrix = RouteMatrix.compute(self.client, self.origins, shelters_df, route_cache=self.route_cache)
+                matrix.save(self.path)
+                self.error = None
+            except Exception as e:
+                self.error = e
+                print(f"Route matrix precompute failed: {e}")
+                return
+            if self.shelters_df is shelters_df:
+                self.matrix = matrix
+                return
+            # Shelters changed while computing; go again with the new ones
+
+
+if __name__ == '__main__':
+    import openrouteservice
+    from dotenv import load_dotenv
+    from data import generate_data, DOHA_LOCATIONS
+
+    load_dotenv()
+    _, shelters_df, _, _ = generate_data()
+    client = openrouteservice.Client(key=os.environ['ORS_API_KEY'])
+    matrix = RouteMatrix.compute(client, DOHA_LOCATIONS, shelters_df)
+    matrix.save('route_matrix.npz')
+    print(f"Saved {len(matrix.origin_names)}x{len(matrix.destination_names)} route matrix to route_matrix.npz")
@@ -0,0 +1,191 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Arrow persistence is optional
+    pa = None
+
+ARROW_AVAILABLE = pa is not None
+
+# Column dtypes per frame. Free text (descriptions, messages, names) stays as
+# plain object strings; low-cardinality labels become categoricals so filters
+# compare small integer codes instead of Python strings.
+SCHEMAS = {
+    'alerts': {
+        'type': 'category',
+        'severity': 'category',
+        'location': 'category',
+        'time': 'datetime64[ns]',
+    },
+    'derived_alerts': {
+        'type': 'category',
+        'severity': 'category',
+        'location': 'category',
+        'time': 'datetime64[ns]',
+    },
+    'shelters': {
+        'capacity': 'int32',
+        'current': 'int32',
+        'type': 'category',
+    },
+    'resources': {
+        'water_supply': 'int32',
+        'food_supply': 'int32',
+        'medical_kits': 'int32',
+        'generators': 'int32',
+        'beds': 'int32',
+        'last_updated': 'datetime64[ns]',
+    },
+    'updates': {
+        'timestamp': 'datetime64[ns]',
+        'source': 'category',
+        'account_type': 'category',
+        'location': 'category',
+        # float64: trust is compared against decimal thresholds (0.9, 0.7), which float32 rounds below
+        'trust_score': 'float64',
+        'verified': 'bool',
+        'engagement': 'int32',
+        'emergency_type': 'category',
+    },
+}
+
+TRUE_STRINGS = ('true', '1', 'yes')
+
+# Every frame keeps datetimes as naive local time (what pd.Timestamp.now() returns)
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+
+def _local_naive(value):
+    if pd.isna(value) or value.tzinfo is None:
+        return value
+    return value.tz_convert(LOCAL_TZ).tz_localize(None)
+
+
+def to_local_datetime(series):
+    """
+    Parse a column of timestamps into naive local datetimes. Values with an
+    offset ('...Z', '+03:00') are converted to local time first, so feeds
+    that send UTC compare correctly with naive clocks.
+    """
+    try:
+        parsed = pd.to_datetime(series, errors='coerce', format='mixed')
+    except ValueError:
+        # Different offsets, or offsets next to naive values, in one column
+        return pd.Series([_local_naive(pd.to_datetime(v, errors='coerce')) for v in series],
+                         index=series.index, dtype='datetime64[ns]')
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_convert(LOCAL_TZ).dt.tz_localize(None)
+    return parsed
+
+
+def _convert(series, dtype):
+    if dtype == 'category':
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    if dtype == 'datetime64[ns]':
+        return to_local_datetime(series)
+    if dtype == 'bool':
+        if pd.api.types.is_bool_dtype(series):
+            return series
+        return series.astype(str).str.lower().isin(TRUE_STRINGS)
+    numeric = pd.to_numeric(series, errors='coerce')
+    if np.dtype(dtype).kind == 'i' and numeric.isna().any():
+        # Integer columns with gaps (e.g. a partial admin publish) keep NaN as float32
+        return numeric.astype('float32')
+    return numeric.astype(dtype)
+
+
+def apply_schema(name, df):
+    """Copy of `df` with the columns listed in SCHEMAS[name] converted; other columns are left as they are"""
+    schema = SCHEMAS.get(name, {})
+    typed = df.copy()
+    for column, dtype in schema.items():
+        if column in typed:
+            typed[column] = _convert(typed[column], dtype)
+    return typed
+
+
+def format_timestamp(value, fmt='%Y-%m-%d %H:%M'):
+    """Display string for a datetime cell; empty for missing values"""
+    return '' if pd.isna(value) else pd.Timestamp(value).strftime(fmt)
+
+
+def memory_report(before, after):
+    """
+    Per-frame memory use (deep, including string payloads) of two
+    {name: DataFrame} dicts, e.g. the raw and the typed frames.
+    """
+    rows = []
+    for name, df in before.items():
+        old = int(df.memory_usage(deep=True).sum())
+        new = int(after[name].memory_usage(deep=True).sum()) if name in after else None
+        rows.append({
+            'frame': name,
+            'rows': len(df),
+            'before_bytes': old,
+            'after_bytes': new,
+            'saved_pct': None if new is None or not old else round(100 * (old - new) / old, 1),
+        })
+    return pd.DataFrame(rows)
+
+
+def save_arrow(frames, directory):
+    """
+    Write {name: DataFrame} as uncompressed Arrow IPC files (<name>.arrow).
+    Uncompressed files can be memory-mapped by load_arrow() without a decode step.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Arrow persistence")
+    os.makedirs(directory, exist_ok=True)
+    for name, df in frames.items():
+        path = os.path.join(directory, f'{name}.arrow')
+        # Write then rename, so readers never map a half-written file
+        feather.write_feather(df.reset_index(drop=True), path + '.tmp', compression='uncompressed')
+        os.replace(path + '.tmp', path)
+
+
+def load_arrow(directory, names=None):
+    """
+    Memory-map the Arrow files written by save_arrow() and return
+    {name: DataFrame}. Numeric and datetime columns without nulls are
+    handed to pandas as views of the mapped pages (zero-copy); strings
+    and categoricals are materialized.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Arrow persistence")
+    if names is None:
+        names = [f[:-len('.arrow')] for f in sorted(os.listdir(directory)) if f.endswith('.arrow')]
+    frames = {}
+    for name in names:
+        path = os.path.join(directory, f'{name}.arrow')
+        if not os.path.exists(path):
+            continue
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        frames[name] = table.to_pandas(split_blocks=True)
+    return frames
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from data import generate_data
+
+    parser = argparse.ArgumentParser(description="Memory use of the core frames before and after the typed schema")
+    parser.add_argument('--repeat', type=int, default=10000,
+                        help="Tile the sample social updates this many times to simulate a large feed")
+    args = parser.parse_args()
+
+    alerts_df, shelters_df, resources_df, social_updates_df = generate_data()
+    raw = {
+        'alerts': alerts_df,
+        'shelters': shelters_df,
+        'resources': resources_df,
+        'updates': pd.concat([social_updates_df] * args.repeat, ignore_index=True),
+    }
+    typed = {name: apply_schema(name, df) for name, df in raw.items()}
+    print(memory_report(raw, typed).to_string(index=False))
@@ -0,0 +1,157 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Fall back to vectorized brute force
+    cKDTree = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Resource columns a shelter must have in stock for each kind of request
+QUERY_REQUIREMENTS = {
+    'medical supplies': ['medical_kits'],
+    'medical': ['medical_kits'],
+    'water': ['water_supply'],
+    'food': ['food_supply'],
+    'power': ['generators'],
+    'beds': ['beds'],
+    'shelter': [],
+}
+
+
+def to_unit_vectors(lat, lon):
+    """Convert degrees to 3D unit vectors, where chord length is monotone in great-circle distance"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(np.asarray(km) / (2 * EARTH_RADIUS_KM))
+
+
+class ShelterIndex:
+    """
+    Haversine-aware nearest-shelter index.
+
+    The tree is built over shelter coordinates and only rebuilt when the
+    coordinates change; capacity and resource levels are refreshed as plain
+    arrays on every sync so they can be filtered without touching the tree.
+    The instance is shared between sessions: sync and queries hold a lock, so
+    a query never sees a new tree with the old attributes.
+    """
+
+    def __init__(self, shelters_df=None, resources_df=None):
+        self.shelters = pd.DataFrame()
+        self.points = np.empty((0, 3))
+        self.tree = None
+        self._coords = None
+        self._arrays = {}
+        self._lock = threading.Lock()
+        if shelters_df is not None:
+            self.sync(shelters_df, resources_df)
+
+    def __len__(self):
+        return len(self.shelters)
+
+    def sync(self, shelters_df, resources_df=None):
+        """Refresh attributes from the frames, rebuilding the tree only if locations changed"""
+        with self._lock:
+            self._sync(shelters_df, resources_df)
+
+    def _sync(self, shelters_df, resources_df):
+        coords = shelters_df[['lat', 'lon']].to_numpy(dtype=float)
+        if self._coords is None or not np.array_equal(coords, self._coords):
+            self._coords = coords
+            self.points = to_unit_vectors(coords[:, 0], coords[:, 1])
+            self.tree = cKDTree(self.points) if cKDTree is not None and len(coords) else None
+
+        shelters = shelters_df.reset_index(drop=True)
+        if resources_df is not None and not resources_df.empty:
+            resource_columns = resources_df.drop_duplicates('location', keep='last').set_index('location')
+            resource_columns = resource_columns.drop(columns=[c for c in resource_columns if c in shelters])
+            shelters = shelters.join(resource_columns, on='name')
+        shelters['remaining_capacity'] = shelters['capacity'] - shelters['current']
+        self.shelters = shelters
+        # Plain arrays for the filters, so queries never go through pandas
+        self._arrays = {
+            column: shelters[column].to_numpy()
+            for column in shelters.columns
+            if column in ('remaining_capacity', 'type') or pd.api.types.is_numeric_dtype(shelters[column])
+        }
+
+    def _mask(self, min_capacity=1, require=None, shelter_type=None):
+        mask = np.ones(len(self.shelters), dtype=bool)
+        if min_capacity:
+            mask &= self._arrays['remaining_capacity'] >= min_capacity
+        for column in require or []:
+            if column in self._arrays:
+                mask &= self._arrays[column] > 0
+            else:
+                mask[:] = False
+        if shelter_type and shelter_type != 'All':
+            mask &= self._arrays['type'] == shelter_type
+        return mask
+
+    def _result(self, ids, chords):
+        result = self.shelters.iloc[ids].copy()
+        result['distance_km'] = chord_to_km(chords)
+        return result
+
+    def nearest(self, location, k=1, min_capacity=1, require=None, shelter_type=None):
+        """Return up to k shelters closest to location that pass the filters, nearest first"""
+        with self._lock:
+            return self._nearest(location, k, min_capacity, require, shelter_type)
+
+    def _nearest(self, location, k, min_capacity, require, shelter_type):
+        mask = self._mask(min_capacity, require, shelter_type)
+        n_valid = int(mask.sum())
+        if not n_valid:
+            return self._result([], [])
+        query = to_unit_vectors([location[0]], [location[1]])[0]
+        k = min(k, n_valid)
+
+        if self.tree is None:
+            ids = np.flatnonzero(mask)
+            chords = np.linalg.norm(self.points[ids] - query, axis=1)
+            order = np.argsort(chords)[:k]
+            return self._result(ids[order], chords[order])
+
+        # Over-fetch from the tree until enough candidates survive the filters
+        fetch = k
+        while True:
+            fetch = min(len(self), fetch * 4)
+            chords, ids = self.tree.query(query, k=fetch)
+            chords, ids = np.atleast_1d(chords), np.atleast_1d(ids)
+            keep = mask[ids]
+            if keep.sum() >= k or fetch == len(self):
+                return self._result(ids[keep][:k], chords[keep][:k])
+
+    def within_radius(self, location, radius_km, min_capacity=1, require=None, shelter_type=None):
+        """Return all shelters within radius_km of location that pass the filters, nearest first"""
+        with self._lock:
+            return self._within_radius(location, radius_km, min_capacity, require, shelter_type)
+
+    def _within_radius(self, location, radius_km, min_capacity, require, shelter_type):
+        mask = self._mask(min_capacity, require, shelter_type)
+        query = to_unit_vectors([location[0]], [location[1]])[0]
+        max_chord = km_to_chord(radius_km)
+
+        if self.tree is None:
+            ids = np.flatnonzero(mask)
+            chords = np.linalg.norm(self.points[ids] - query, axis=1)
+            ids, chords = ids[chords <= max_chord], chords[chords <= max_chord]
+        else:
+            ids = np.asarray(self.tree.query_ball_point(query, max_chord), dtype=int)
+            ids = ids[mask[ids]]
+            chords = np.linalg.norm(self.points[ids] - query, axis=1)
+        order = np.argsort(chords)
+        return self._result(ids[order], chords[order])
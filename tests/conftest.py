@@ -0,0 +1,24 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_ollama import FakeOllamaHandler
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """Base URL of a fake_ollama server on a free local port, answering 5 tokens quickly"""
+    monkeypatch.setattr(FakeOllamaHandler, 'token_delay', 0.01)
+    monkeypatch.setattr(FakeOllamaHandler, 'tokens', 5)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
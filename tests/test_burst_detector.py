@@ -0,0 +1,54 @@
+import pandas as pd
+
+from burst_detector import BurstDetector
+
+START = 1_790_000_000.0  # epoch seconds
+
+
+def test_spike_raises_one_alert_then_cools_down():
+    detector = BurstDetector(min_count=5, ratio=4, cooldown_minutes=30)
+    alerts = [detector.observe('Corniche', 'Flash Flood', 1.0, f'water rising {i}', now=START + i * 10)
+              for i in range(12)]
+    raised = [alert for alert in alerts if alert is not None]
+    assert len(raised) == 1
+    assert raised[0]['location'] == 'Corniche' and raised[0]['type'] == 'Flash Flood'
+    assert 'water rising' in raised[0]['description']
+    assert len(detector.alerts_frame()) == 1
+
+
+def test_steady_rate_is_not_a_burst():
+    detector = BurstDetector(min_count=5, ratio=4)
+    # One report every 3 minutes for ten hours
+    alerts = [detector.observe('Lusail', 'Heat Wave', 1.0, now=START + i * 180) for i in range(200)]
+    assert not any(alerts)
+
+
+def test_low_trust_reports_need_more_volume():
+    detector = BurstDetector(min_count=5, ratio=4)
+    alerts = [detector.observe('Lusail', 'Sandstorm', 0.4, now=START + i) for i in range(15)]
+    # Twelve reports weigh 4.8, under min_count; the thirteenth crosses it
+    assert [i for i, alert in enumerate(alerts) if alert] == [12]
+
+
+def test_frame_uses_record_timestamps():
+    detector = BurstDetector(min_count=5, ratio=4)
+    # Twelve reports spread over two hours but fed in one go, as a replay would
+    timestamps = pd.date_range('2026-10-18 08:00', periods=12, freq='10min')
+    df = pd.DataFrame({
+        'timestamp': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+        'location': 'Corniche', 'emergency_type': 'Flash Flood', 'message': 'water', 'trust_score': 1.0,
+    })
+    assert detector.observe_frame(df) == []
+
+    burst = df.assign(timestamp=pd.date_range('2026-10-18 10:00', periods=12, freq='10s').strftime('%Y-%m-%d %H:%M:%S'))
+    alerts = detector.observe_frame(burst)
+    assert [alert['severity'] for alert in alerts] == ['Medium', 'High']
+    assert alerts[0]['time'] == '2026-10-18 10:00'
+
+
+def test_pairs_beyond_max_keys_are_evicted():
+    detector = BurstDetector(max_keys=2)
+    for i, location in enumerate(['A', 'B', 'C']):
+        detector.observe(location, 'Flood', now=START + i)
+    assert detector.stats['evicted'] == 1
+    assert list(detector._pairs) == [('B', 'Flood'), ('C', 'Flood')]
@@ -0,0 +1,134 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data_store import DataStore, FeedReader
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DataStore(str(tmp_path / 'store.sqlite'))
+
+
+def alerts(*types):
+    return pd.DataFrame({
+        'type': list(types),
+        'severity': ['High'] * len(types),
+        'location': ['Doha'] * len(types),
+        'time': ['2026-10-18 10:00'] * len(types),
+        'description': ['test'] * len(types),
+    })
+
+
+def test_write_frames_round_trip(store):
+    updates = pd.DataFrame({
+        'message': ['a', 'b'],
+        'verified': [True, False],
+        'trust_score': [0.9, float('nan')],
+        'engagement': [10, 20],
+        'timestamp': pd.to_datetime(['2026-10-18 10:00', '2026-10-18 10:05']),
+    })
+    version = store.write_frames(alerts=alerts('Heat Wave'), updates=updates)
+    frames = store.read_frames(version)
+    assert frames['alerts']['type'].tolist() == ['Heat Wave']
+    assert frames['updates']['verified'].tolist() == [1, 0]
+    assert frames['updates']['engagement'].tolist() == [10, 20]
+    assert pd.isna(frames['updates']['trust_score'].iat[1])
+    assert frames['updates']['timestamp'].iat[0].startswith('2026-10-18 10:00')
+
+
+def test_failed_publish_rolls_back_and_later_publishes_succeed(store):
+    version = store.write_frames(alerts=alerts('Heat Wave'))
+    bad_updates = pd.DataFrame({'message': ['a'], 'extra': [{'not': 'storable'}]})
+    with pytest.raises(sqlite3.Error):
+        store.write_frames(alerts=alerts('Sandstorm'), updates=bad_updates)
+
+    assert store.version() == version
+    assert store.read_frames()['alerts']['type'].tolist() == ['Heat Wave']
+    tables = {row[0] for row in store._connect().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert f'alerts_v{version + 1}' not in tables
+
+    new_version = store.write_frames(alerts=alerts('Flash Flood'))
+    assert new_version == version + 1
+    assert store.read_frames()['alerts']['type'].tolist() == ['Flash Flood']
+
+
+def test_publish_replaces_table_left_by_an_older_failed_publish(store):
+    store._connect().execute('CREATE TABLE alerts_v1 (junk TEXT)')
+    store._connect().commit()
+    store.write_frames(alerts=alerts('Heat Wave'))
+    assert store.read_frames()['alerts']['type'].tolist() == ['Heat Wave']
+
+
+def updates(*messages):
+    return pd.DataFrame({'message': list(messages), 'location': ['Doha'] * len(messages)})
+
+
+def test_append_moves_the_feed_cursor_not_the_version(store):
+    version = store.write_frames(alerts=alerts('Heat Wave'))
+    assert store.append_frame('updates', updates('a', 'b')) == 2
+    assert store.append_frame('updates', updates('c')) == 3
+    assert store.version() == version
+    assert store.feed_cursor('updates') == 3
+    assert store.feed_cursor('derived_alerts') == 0
+
+    rows, cursor = store.read_feed('updates', after=2)
+    assert rows['message'].tolist() == ['c'] and cursor == 3
+    rows, _ = store.read_feed('updates')
+    assert rows['message'].tolist() == ['a', 'b', 'c']
+
+
+def test_failed_append_rolls_back(store):
+    store.append_frame('updates', updates('a'))
+    bad = pd.DataFrame({'message': ['b', 'c'], 'location': ['Doha', {'not': 'storable'}]})
+    with pytest.raises(sqlite3.Error):
+        store.append_frame('updates', bad)
+    assert store.feed_cursor('updates') == 1
+    assert store.read_feed('updates')[0]['message'].tolist() == ['a']
+
+    with pytest.raises(sqlite3.Error):
+        store.append_frame('derived_alerts', bad)
+    tables = {row[0] for row in store._connect().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'feed_derived_alerts' not in tables
+
+
+def test_feed_keeps_its_newest_rows(tmp_path):
+    store = DataStore(str(tmp_path / 'store.sqlite'), feed_rows=3)
+    for message in 'abcde':
+        store.append_frame('updates', updates(message))
+    rows, cursor = store.read_feed('updates')
+    assert rows['message'].tolist() == ['c', 'd', 'e'] and cursor == 5
+
+
+def test_feed_reader_only_appends(store):
+    reader = FeedReader(store, 'updates', max_rows=2)
+    assert reader.poll().empty
+    store.append_frame('updates', updates('a', 'b'))
+    first = reader.poll()
+    assert reader.poll() is first
+    store.append_frame('updates', updates('c'))
+    assert reader.poll()['message'].tolist() == ['a', 'b', 'c']
+    store.append_frame('updates', updates('d', 'e'))
+    assert reader.poll()['message'].tolist() == ['d', 'e']
+
+
+def test_publish_carries_frames_beyond_the_admin_ones(store):
+    store.write_frames(derived_alerts=alerts('Flash Flood'))
+    store.write_frames(alerts=alerts('Heat Wave'))
+    frames = store.read_frames()
+    assert frames['derived_alerts']['type'].tolist() == ['Flash Flood']
+    assert frames['alerts']['type'].tolist() == ['Heat Wave']
+
+
+def test_publishes_to_a_store_with_extra_frames_columns(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE frames (version INTEGER, name TEXT, table_name TEXT, row_limit INTEGER, '
+               'PRIMARY KEY (version, name))')
+    db.commit()
+    db.close()
+    store = DataStore(path)
+    store.write_frames(alerts=alerts('Heat Wave'))
+    store.write_frames(resources=pd.DataFrame({'location': ['Lusail'], 'beds': [40]}))
+    assert store.read_frames()['alerts']['type'].tolist() == ['Heat Wave']
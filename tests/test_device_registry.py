@@ -0,0 +1,59 @@
+import threading
+import time
+
+from device_registry import DeviceRegistry
+
+
+def test_heartbeats_keep_devices_and_silent_ones_expire():
+    devices = DeviceRegistry(ttl=0.1)
+    devices.register('phone-a', address='10.0.0.2')
+    devices.register('phone-b')
+    time.sleep(0.06)
+    assert devices.heartbeat('phone-a')
+    time.sleep(0.06)
+
+    assert devices.device_ids() == ['phone-a']
+    assert not devices.heartbeat('phone-b')
+    assert devices.count() == 1
+
+
+def test_unregister():
+    devices = DeviceRegistry()
+    devices.register('phone-a')
+    assert devices.unregister('phone-a')
+    assert not devices.unregister('phone-a')
+    assert devices.count() == 0
+
+
+def test_request_stats_and_snapshot_order():
+    devices = DeviceRegistry()
+    devices.register('phone-a')
+    devices.record_request('phone-b', 0.5)
+    devices.record_request('phone-b', 1.5, error=True)
+    devices.record_request(None, 9.0)
+
+    snapshot = devices.snapshot()
+    assert [device['device_id'] for device in snapshot] == ['phone-b', 'phone-a']
+    assert (snapshot[0]['requests'], snapshot[0]['errors']) == (2, 1)
+    assert snapshot[0]['avg_latency'] == 1.0
+    assert snapshot[0]['max_latency'] == 1.5
+    assert snapshot[1]['avg_latency'] is None
+
+
+def test_concurrent_registrations():
+    devices = DeviceRegistry()
+
+    def phone(i):
+        for _ in range(50):
+            devices.register(f'phone-{i}')
+            devices.record_request(f'phone-{i}', 0.01)
+
+    threads = [threading.Thread(target=phone, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    snapshot = devices.snapshot()
+    assert len(snapshot) == 8
+    assert all(device['requests'] == 50 for device in snapshot)
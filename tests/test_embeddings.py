@@ -0,0 +1,26 @@
+from embeddings import EmbeddingIndex
+
+
+def test_sync_appends_only_new_texts():
+    index = EmbeddingIndex()
+    index.sync('update', ['flooding in Al Khor', 'heat warning in Doha'])
+    index.sync('update', ['flooding in Al Khor', 'heat warning in Doha', 'sandstorm in Al Wakrah'])
+    assert [m['text'] for m in index.meta] == [
+        'flooding in Al Khor', 'heat warning in Doha', 'sandstorm in Al Wakrah'
+    ]
+
+
+def test_sync_reembeds_replaced_source_only():
+    index = EmbeddingIndex()
+    index.sync('guidance', ['stay indoors'])
+    index.sync('update', ['flooding in Al Khor', 'heat warning in Doha'])
+    # Rows put in front of the list, then the list shrinks
+    index.sync('update', ['sandstorm in Al Wakrah', 'flooding in Al Khor', 'heat warning in Doha'])
+    assert [m['text'] for m in index.meta if m['source'] == 'update'] == [
+        'sandstorm in Al Wakrah', 'flooding in Al Khor', 'heat warning in Doha'
+    ]
+    index.sync('update', ['heat warning in Doha'])
+    assert [m['text'] for m in index.meta] == ['stay indoors', 'heat warning in Doha']
+
+    score, meta = index.search('sandstorm Al Wakrah', k=1)[0]
+    assert meta['text'] != 'sandstorm in Al Wakrah'
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from burst_detector import BurstDetector
+from data_store import DataStore
+from ingest import IngestPipeline, simhashes
+
+MESSAGES = [
+    "Water over the road at the Corniche underpass",
+    "Cars stuck near Museum of Islamic Art, flooding",
+    "Drains overflowing by the Sheraton roundabout",
+    "Police closing West Bay lanes because of rain",
+    "Knee deep puddles outside City Center mall",
+    "Ambulance struggling through the flooded intersection",
+    "Sandbags being handed out at the fish market",
+    "Tram stop flooded, walking to Al Bidda instead",
+]
+
+
+class ListSource:
+    def __init__(self, records):
+        self.records = records
+
+    def read(self, stop_event):
+        yield from self.records
+
+
+def records(messages, start='2026-10-18 10:00'):
+    times = pd.date_range(start, periods=len(messages), freq='15s')
+    return [{'timestamp': f'{t:%Y-%m-%dT%H:%M:%S}', 'account_type': 'Official', 'location': 'Corniche',
+             'emergency_type': 'Flash Flood', 'message': m} for t, m in zip(times, messages)]
+
+
+def run(records, tmp_path):
+    store = DataStore(str(tmp_path / 'store.sqlite'))
+    pipeline = IngestPipeline(ListSource(records), store=store, detector=BurstDetector(min_count=5, ratio=4))
+    stats = pipeline.run()
+    return stats, store
+
+
+def test_reposts_do_not_make_a_burst(tmp_path):
+    stats, store = run(records([MESSAGES[0]] * 8), tmp_path)
+    assert (stats['published'], stats['duplicates'], stats['alerts']) == (1, 7, 0)
+    assert store.feed_cursor('derived_alerts') == 0
+    assert store.version() == 0
+
+
+def test_distinct_reports_raise_a_derived_alert(tmp_path):
+    stats, store = run(records(MESSAGES), tmp_path)
+    assert stats['published'] == 8
+    assert stats['alerts'] >= 1
+    alerts, _ = store.read_feed('derived_alerts')
+    assert alerts['location'].iat[0] == 'Corniche'
+    assert alerts['time'].iat[0].startswith('2026-10-18 10:01')
+
+
+def test_replayed_history_keeps_its_pacing(tmp_path):
+    history = records(MESSAGES)
+    for i, record in enumerate(history):
+        record['timestamp'] = f"{pd.Timestamp('2026-10-18 06:00') + pd.Timedelta(minutes=30 * i):%Y-%m-%dT%H:%M:%S}"
+    stats, _ = run(history, tmp_path)
+    assert (stats['published'], stats['alerts']) == (8, 0)
+
+
+def test_simhashes_ignore_trailing_messages_without_words():
+    batch = simhashes(MESSAGES[:2] + ['', '!!!', '...'])
+    assert batch[:2].tolist() == [simhashes([m])[0] for m in MESSAGES[:2]]
+    assert batch[2:].tolist() == [0, 0, 0]
+    assert simhashes(['', '?']).tolist() == [0, 0]
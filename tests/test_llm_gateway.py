@@ -0,0 +1,79 @@
+import io
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from llm_gateway import PRIORITY_ALERT, LLMGateway
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeClient:
+    """Chat calls echo the last message; streams block until `release` is set"""
+
+    def __init__(self, transcribe_failures=0):
+        self.release = threading.Event()
+        self.uploads = []
+        self.transcribe_failures = transcribe_failures
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe))
+
+    def _chat(self, messages, stream=False, **params):
+        text = messages[-1]['content']
+        if not stream:
+            return text
+        return self._stream(text)
+
+    def _stream(self, text):
+        yield chunk(text)
+        self.release.wait(5)
+        yield chunk(' done')
+
+    def _transcribe(self, file, **params):
+        self.uploads.append(file.read())
+        if len(self.uploads) <= self.transcribe_failures:
+            raise ServerError("upstream unavailable")
+        return SimpleNamespace(text=self.uploads[-1].decode())
+
+
+def ask(text):
+    return {'model': 'test', 'messages': [{'role': 'user', 'content': text}]}
+
+
+def test_chat_is_admitted_and_counted():
+    gateway = LLMGateway(FakeClient())
+    assert gateway.chat(**ask('hello')) == 'hello'
+    metrics = gateway.metrics()
+    assert metrics['requests'] == 1
+    assert metrics['in_flight'] == 0
+
+
+def test_open_stream_holds_its_concurrency_slot():
+    client = FakeClient()
+    gateway = LLMGateway(client, max_concurrency=1)
+    tokens = gateway.chat_stream(**ask('first'))
+    assert next(tokens) == 'first'
+    assert gateway.metrics()['in_flight'] == 1
+    with pytest.raises(TimeoutError):
+        gateway.chat(timeout=0.2, **ask('second'))
+
+    client.release.set()
+    assert ''.join(tokens) == ' done'
+    assert gateway.chat(timeout=5, priority=PRIORITY_ALERT, **ask('second')) == 'second'
+    assert gateway.metrics()['in_flight'] == 0
+
+
+def test_transcribe_retry_resends_the_whole_file():
+    client = FakeClient(transcribe_failures=1)
+    gateway = LLMGateway(client, backoff=0)
+    response = gateway.transcribe(file=io.BytesIO(b'flooding on corniche'), model='whisper')
+    assert response.text == 'flooding on corniche'
+    assert client.uploads == [b'flooding on corniche'] * 2
+    assert gateway.metrics()['retries'] == 1
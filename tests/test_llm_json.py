@@ -0,0 +1,20 @@
+import pytest
+
+from llm_json import coerce_number
+
+
+@pytest.mark.parametrize('value, expected', [
+    (5, 5),
+    ("1,200 units", 1200),
+    ("0.0 to 1.0", 0.5),
+    ("1000-10000", 5500),
+    ("1000 - 10000 people", 5500),
+    ("-5", -5),
+    ("between -10 and 10", 0),
+])
+def test_coerce_number(value, expected):
+    assert coerce_number(value) == pytest.approx(expected)
+
+
+def test_hyphen_range_is_not_clamped_to_minimum():
+    assert coerce_number("1000-10000", minimum=0, integer=True) == 5500
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from data_store import DataStore
+from offline_context import OfflineKnowledge
+
+
+def test_picks_up_a_store_created_later_and_keeps_it(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    knowledge = OfflineKnowledge(store_path=path, refresh_interval=0)
+    assert knowledge.version == 0
+
+    alerts = pd.DataFrame({'type': ['Flood'], 'severity': ['High'], 'location': ['Corniche'],
+                           'time': ['2026-10-18 10:00'], 'description': ['Road closed']})
+    DataStore(path).write_frames(alerts=alerts)
+    knowledge.refresh()
+    store = knowledge._store
+    assert knowledge.version == 1
+    assert "Flood, Corniche" in knowledge.system_prompt
+
+    knowledge.refresh()
+    assert knowledge._store is store
+
+
+def test_ingested_updates_are_picked_up_without_a_publish(tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    store = DataStore(path)
+    knowledge = OfflineKnowledge(store_path=path, refresh_interval=0)
+    store.append_frame('updates', pd.DataFrame({
+        'message': ['Water rising near the Corniche underpass'], 'location': ['Corniche'],
+        'account_type': ['Citizen'], 'verified': [False]}))
+    knowledge.refresh()
+    assert knowledge.version == 0
+    assert knowledge.updates_df['message'].tolist() == ['Water rising near the Corniche underpass']
+    assert "Corniche underpass" in knowledge.build_prompt("is the corniche flooded?")[1]
+
+    store.append_frame('updates', pd.DataFrame({'message': ['Underpass reopened'], 'location': ['Corniche']}))
+    knowledge.refresh()
+    assert knowledge._feed.cursor == 2
+    assert knowledge.updates_df['message'].tolist() == ['Water rising near the Corniche underpass',
+                                                        'Underpass reopened']
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from offline_router import RoadGraph
+
+
+def square_graph():
+    # 0 -> 1 -> 3 along "North Road", 0 -> 2 -> 3 along "South Road"
+    lat = [25.30, 25.31, 25.29, 25.30]
+    lon = [51.50, 51.51, 51.51, 51.52]
+    indptr = [0, 2, 3, 4, 4]
+    indices = [1, 2, 3, 3]
+    lengths = [1500.0] * 4
+    times = [100.0, 110.0, 100.0, 110.0]
+    name_ids = [0, 1, 0, 1]
+    return RoadGraph(lat, lon, indptr, indices, lengths, times, name_ids, ['North Road', 'South Road'])
+
+
+def route_nodes(graph, route):
+    coordinates = route['features'][0]['geometry']['coordinates']
+    return [graph.nearest_node(lat, lon)[0] for lon, lat in coordinates]
+
+
+def test_per_call_penalties_leave_shared_graph_untouched():
+    graph = square_graph()
+    waypoints = [[51.50, 25.30], [51.52, 25.30]]
+    assert route_nodes(graph, graph.directions(waypoints)) == [0, 1, 3]
+
+    penalties = graph.new_penalties()
+    graph.penalize_roads("Traffic diverted on North Road", 10.0, penalties)
+    assert route_nodes(graph, graph.directions(waypoints, penalties=penalties)) == [0, 2, 3]
+
+    assert np.all(graph.penalties == 1.0)
+    assert route_nodes(graph, graph.directions(waypoints)) == [0, 1, 3]
+
+
+def test_apply_alerts_into_per_call_array():
+    graph = square_graph()
+    alerts = pd.DataFrame({'type': ['Flash Flood'], 'severity': ['High'], 'location': ['Here']})
+    penalties = graph.new_penalties()
+    graph.apply_alerts(alerts, {'Here': [25.30, 51.50]}, radius_km=50, penalties=penalties)
+    assert penalties.max() > 1.0
+    assert np.all(graph.penalties == 1.0)
@@ -0,0 +1,92 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from offline_scheduler import FairScheduler, QueueFull
+
+
+def generate(base_url, prompt):
+    """Stream one answer from the Ollama API the way the hub does (NDJSON lines)"""
+    request = urllib.request.Request(
+        f'{base_url}/api/generate',
+        data=json.dumps({'model': 'mistral', 'prompt': prompt, 'stream': True}).encode(),
+        headers={'Content-Type': 'application/json'})
+    words = []
+    with urllib.request.urlopen(request, timeout=10) as response:
+        for line in response:
+            chunk = json.loads(line)
+            words.append(chunk['response'])
+            if chunk['done']:
+                break
+    return ''.join(words)
+
+
+def test_round_robin_across_devices():
+    scheduler = FairScheduler(parallelism=1)
+    running = scheduler.submit('busy-phone')
+    busy = [scheduler.submit('busy-phone') for _ in range(3)]
+    other = scheduler.submit('other-phone')
+    assert scheduler.position(other) == 1
+
+    scheduler.release(running)
+    assert busy[0].granted.is_set()
+    scheduler.release(busy[0])
+    assert other.granted.is_set()
+
+
+def test_queue_limits_shed_load():
+    scheduler = FairScheduler(parallelism=1, max_queue=10, max_per_device=2)
+    scheduler.submit('phone')
+    scheduler.submit('phone')
+    scheduler.submit('phone')
+    with pytest.raises(QueueFull):
+        scheduler.submit('phone')
+    assert scheduler.snapshot()['rejected'] == 1
+
+
+def test_resize_opens_and_closes_slots():
+    scheduler = FairScheduler(parallelism=1)
+    first = scheduler.submit('phone-a')
+    second = scheduler.submit('phone-b')
+    assert not second.granted.is_set()
+
+    scheduler.resize(2)
+    assert second.granted.is_set()
+
+    scheduler.resize(0)
+    assert scheduler.snapshot()['parallelism'] == 1
+    third = scheduler.submit('phone-c')
+    scheduler.release(first)
+    assert not third.granted.is_set()
+    scheduler.release(second)
+    assert third.granted.is_set()
+
+
+def test_parallelism_holds_against_the_fake_server(fake_ollama):
+    scheduler = FairScheduler(parallelism=2)
+    peak, answers, lock = [0], [], threading.Lock()
+
+    def client(device_id):
+        ticket = scheduler.submit(device_id)
+        try:
+            assert scheduler.wait(ticket, timeout=10)
+            with lock:
+                peak[0] = max(peak[0], scheduler.snapshot()['running'])
+            answer = generate(fake_ollama, 'is the corniche flooded?')
+            with lock:
+                answers.append(answer)
+        finally:
+            scheduler.release(ticket)
+
+    threads = [threading.Thread(target=client, args=(f'phone-{i % 3}',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(15)
+
+    assert answers == ['echo0 echo1 echo2 echo3 echo4 '] * 8
+    assert peak[0] <= 2
+    snapshot = scheduler.snapshot()
+    assert (snapshot['completed'], snapshot['running'], snapshot['waiting']) == (8, 0, 0)
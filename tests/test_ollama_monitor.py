@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from ollama_monitor import OllamaMonitor
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class ColdOllamaSession:
+    """Ollama with the model installed but not loaded; loading blocks until `loaded` is set"""
+
+    def __init__(self):
+        self.loaded = threading.Event()
+        self.warm_ups = 0
+
+    def get(self, url, timeout=None):
+        loaded = [{'name': 'mistral:latest'}] if self.loaded.is_set() else []
+        return FakeResponse({'models': [{'name': 'mistral:latest'}] if url.endswith('/api/tags') else loaded})
+
+    def post(self, url, json=None, timeout=None):
+        self.warm_ups += 1
+        self.loaded.wait(5)
+        return FakeResponse({'done': True})
+
+
+def test_running_is_published_before_the_model_is_loaded():
+    session = ColdOllamaSession()
+    monitor = OllamaMonitor(session, 'http://ollama', 'mistral')
+
+    status = monitor.probe()
+    assert status['running'] and status['model_available']
+    assert not status['warm']
+    assert monitor.status()['warming']
+    assert monitor.wait_until_running(0.1)
+
+    monitor.probe()
+    assert session.warm_ups == 1
+
+    session.loaded.set()
+    with monitor._changed:
+        monitor._changed.wait_for(lambda: not monitor._state['warming'], 5)
+    assert monitor.status()['warm']
+
+
+def test_probe_against_fake_ollama(fake_ollama):
+    requests = pytest.importorskip('requests')
+    monitor = OllamaMonitor(requests.Session(), fake_ollama, 'mistral')
+    status = monitor.probe()
+    assert status['running'] and status['model_available'] and status['warm']
+    assert status['models'] == ['mistral:latest']
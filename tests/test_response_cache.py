@@ -0,0 +1,38 @@
+from response_cache import ResponseCache, normalize
+
+
+def test_stopword_only_queries_do_not_collide():
+    assert normalize("nearest") == "nearest"
+    assert normalize("Where is it?") != normalize("nearest")
+    cache = ResponseCache()
+    cache.put("nearest", "ctx", "first")
+    assert cache.get("where is it", "ctx") is None
+    assert cache.get("Nearest", "ctx") == "first"
+
+
+def test_near_duplicate_query_hits_for_same_context_only():
+    cache = ResponseCache()
+    cache.put("where is the nearest shelter", "ctx", "Al Thumama Stadium", latency=1.5)
+    assert cache.get("nearest shelter?", "ctx") == "Al Thumama Stadium"
+    assert cache.get("nearest shelter?", "ctx after new updates") is None
+    assert cache.stats['saved_seconds'] == 1.5
+
+
+def test_answers_for_unchanged_context_survive_new_data():
+    cache = ResponseCache()
+    cache.put("flood warnings", "ctx a", "a")
+    cache.put("heat warnings", "ctx b", "b")
+    # New updates change the retrieved context of one query only
+    assert cache.get("flood warnings", "ctx a2") is None
+    assert cache.get("heat warnings", "ctx b") == "b"
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("flood", "ctx", "1")
+    cache.put("heat", "ctx", "2")
+    cache.get("flood", "ctx")
+    cache.put("sandstorm", "ctx", "3")
+    assert len(cache) == 2
+    assert cache.get("heat", "ctx") is None
+    assert cache.get("flood", "ctx") == "1"
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from retriever import UpdateRetriever, tokenize
+
+NOW = pd.Timestamp('2026-10-18 12:00')
+
+
+def updates(messages, trust=0.5, timestamp='2026-10-18 11:00'):
+    return pd.DataFrame({'message': messages, 'trust_score': trust, 'timestamp': timestamp})
+
+
+def test_tokenize_normalizes_english_and_arabic():
+    assert tokenize("Where are the nearest Shelters?") == ['shelter']
+    assert tokenize("الوكرة") == tokenize("وكرة")
+    assert tokenize("أمطار") == tokenize("امطار")
+
+
+def test_appended_rows_are_indexed_incrementally():
+    retriever = UpdateRetriever()
+    df = updates(["Flooding on Corniche", "Sandstorm in Lusail"])
+    retriever.sync(df)
+    postings = retriever.postings
+    df = pd.concat([df, updates(["Corniche flooding worsens"])], ignore_index=True)
+    retriever.sync(df)
+    assert retriever.postings is postings
+    assert len(retriever) == 3
+    assert retriever.postings['corniche'] == {0: 1, 2: 1}
+
+
+def test_replaced_frame_is_rebuilt():
+    retriever = UpdateRetriever()
+    retriever.sync(updates(["Flooding on Corniche", "Sandstorm in Lusail"]))
+    retriever.sync(updates(["Heat wave in Al Wakrah"]))
+    assert len(retriever) == 1
+    assert 'corniche' not in retriever.postings
+    rebuilt = UpdateRetriever()
+    rebuilt.sync(updates(["Heat wave in Al Wakrah"]))
+    assert dict(retriever.postings) == dict(rebuilt.postings)
+
+
+def test_ranking_by_bm25_trust_and_recency():
+    df = pd.concat([
+        updates(["Road closed by flooding on the Corniche"]),
+        updates(["Flooding flooding flooding Corniche"]),
+        updates(["Sandstorm warning for Lusail"]),
+    ], ignore_index=True)
+    retriever = UpdateRetriever(trust_weight=0, recency_half_life_hours=0)
+    assert retriever.search(df, "corniche flooding", now=NOW)['message'].tolist() == [
+        "Flooding flooding flooding Corniche", "Road closed by flooding on the Corniche"]
+
+    weighted = UpdateRetriever()
+    df['trust_score'] = [0.9, 0.1, 0.5]
+    assert weighted.search(df, "corniche flooding", k=1, now=NOW)['message'].iat[0] == \
+        "Road closed by flooding on the Corniche"
+
+    df['trust_score'] = 0.5
+    df['timestamp'] = ['2026-10-18 11:50', '2026-10-17 12:00', '2026-10-18 11:00']
+    assert weighted.search(df, "corniche", now=NOW)['message'].iat[0] == "Road closed by flooding on the Corniche"
+    assert weighted.search(df, "no such words", now=NOW).empty
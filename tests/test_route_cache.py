@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from route_cache import ROAD_CLOSURE_PATTERN, RouteCache, cached_directions, geohash_encode
+
+PLACES = {'Al Wakrah': [25.1659, 51.5976], 'Al Khor': [25.6839, 51.4969]}
+
+
+def route(*points):
+    return {'features': [{'geometry': {'coordinates': [[lon, lat] for lat, lon in points]}}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RouteCache(path=str(tmp_path / 'routes.sqlite'))
+
+
+@pytest.mark.parametrize('message, closure', [
+    ("Traffic diverted on Al Wakrah Road due to poor visibility.", True),
+    ("Corniche blocked near the museum", True),
+    ("Salwa Rd closed after an accident", True),
+    ("Storm drains being cleared in Al Khor to prevent flooding.", False),
+    ("Heavy sand in Al Wakrah area. Roads barely visible.", False),
+    ("Schools closed today; streets are quiet", False),
+])
+def test_closure_pattern(message, closure):
+    assert bool(ROAD_CLOSURE_PATTERN.search(message)) == closure
+
+
+def test_geohash():
+    assert geohash_encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+
+def test_memory_disk_and_expiry(cache, tmp_path):
+    key = cache.make_key([[51.53, 25.28], [51.50, 25.30]], 'driving-car')
+    assert cache.make_key([[51.53001, 25.28001], [51.50, 25.30]], 'driving-car') == key
+    assert cache.get(key) is None
+    cache.put(key, route((25.28, 51.53), (25.30, 51.50)))
+    assert cache.get(key) is not None
+
+    reopened = RouteCache(path=str(tmp_path / 'routes.sqlite'))
+    assert reopened.get(key) is not None
+    assert reopened.stats['disk_hits'] == 1
+
+    expiring = RouteCache(path=str(tmp_path / 'routes.sqlite'), ttl=-1)
+    assert expiring.get(key) is None
+    assert expiring.stats['expired'] == 1
+
+
+def test_only_routes_near_a_new_closure_are_invalidated(cache):
+    south = cache.make_key([[51.53, 25.28], [51.59, 25.17]], 'driving-car')
+    north = cache.make_key([[51.53, 25.28], [51.49, 25.68]], 'driving-car')
+    cache.put(south, route((25.28, 51.53), (25.17, 51.59)))
+    cache.put(north, route((25.28, 51.53), (25.45, 51.50), (25.68, 51.49)))
+
+    updates = pd.DataFrame({'message': ["Storm drains being cleared in Al Khor to prevent flooding."],
+                            'location': ['Al Khor']})
+    assert cache.note_road_closures(updates, PLACES) == 0
+    closure = pd.DataFrame({'message': ["Traffic diverted on Al Wakrah Road"], 'location': ['Qatar']})
+    assert cache.note_road_closures(pd.concat([updates, closure]), PLACES) == 1
+    assert cache.get(south) is None
+    assert cache.get(north) is not None
+
+    # The closure ageing out of the feed invalidates nothing
+    assert cache.note_road_closures(updates, PLACES) == 0
+    assert cache.get(north) is not None
+
+
+def test_unplaceable_closure_clears_everything(cache):
+    key = cache.make_key([[51.53, 25.28], [51.50, 25.30]], 'driving-car')
+    cache.put(key, route((25.28, 51.53), (25.30, 51.50)))
+    cache.note_road_closures(pd.DataFrame({'message': [], 'location': []}), PLACES)
+    closure = pd.DataFrame({'message': ["Underpass flooded, avoid the area"], 'location': ['Qatar']})
+    assert cache.note_road_closures(closure, PLACES) == 1
+    assert len(cache._memory) == 0
+
+
+def test_cached_directions_calls_the_client_once(cache):
+    class Client:
+        calls = 0
+
+        def directions(self, coordinates, profile, **options):
+            Client.calls += 1
+            return route(*[(lat, lon) for lon, lat in coordinates])
+
+    coordinates = [[51.53, 25.28], [51.50, 25.30]]
+    first = cached_directions(Client(), cache, coordinates, format='geojson')
+    assert cached_directions(Client(), cache, coordinates, format='geojson') == first
+    assert Client.calls == 1
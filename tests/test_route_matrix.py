@@ -0,0 +1,74 @@
+import time
+
+import pandas as pd
+
+from route_cache import RouteCache
+from route_matrix import RouteMatrix, RouteMatrixJob, ThrottledClient
+
+
+class FakeORS:
+    def __init__(self):
+        self.directions_calls = []
+        self.matrix_calls = []
+
+    def distance_matrix(self, locations, sources, destinations, **kwargs):
+        self.matrix_calls.append(time.monotonic())
+        return {
+            'durations': [[60.0] * len(destinations) for _ in sources],
+            'distances': [[1000.0] * len(destinations) for _ in sources],
+        }
+
+    def directions(self, coordinates, **kwargs):
+        self.directions_calls.append(time.monotonic())
+        return {'features': [{'geometry': {'coordinates': coordinates}}]}
+
+
+SHELTERS = pd.DataFrame({'name': ['A', 'B'], 'lat': [25.30, 25.40], 'lon': [51.50, 51.45]})
+ORIGINS = {'X': [25.28, 51.53], 'Y': [25.32, 51.44]}
+
+
+def test_cache_misses_are_throttled_and_hits_are_not(tmp_path):
+    client = FakeORS()
+    cache = RouteCache(path=str(tmp_path / 'routes.sqlite'))
+    RouteMatrix.compute(client, ORIGINS, SHELTERS, route_cache=cache, request_interval=0.05)
+    gaps = [b - a for a, b in zip(client.directions_calls, client.directions_calls[1:])]
+    assert len(client.directions_calls) == 4
+    assert min(gaps) >= 0.045
+
+    started = time.monotonic()
+    matrix = RouteMatrix.compute(client, ORIGINS, SHELTERS, route_cache=cache, request_interval=0.05)
+    assert len(client.directions_calls) == 4
+    assert time.monotonic() - started < 0.05
+    assert all(matrix.polylines.ravel())
+
+
+def test_matrix_and_directions_share_one_rate_limit():
+    client = FakeORS()
+    throttled = ThrottledClient(client, interval=0.05)
+    RouteMatrix.compute(throttled, ORIGINS, SHELTERS, with_geometry=False)
+    throttled.directions(coordinates=[[51.53, 25.28], [51.50, 25.30]])
+    assert client.matrix_calls[0] < client.directions_calls[0]
+    assert client.directions_calls[0] - client.matrix_calls[0] >= 0.045
+
+
+def test_job_recomputes_when_shelters_change(tmp_path):
+    client = FakeORS()
+    job = RouteMatrixJob(ThrottledClient(client, 0), ORIGINS, SHELTERS, path=str(tmp_path / 'matrix.npz'))
+    job.start()
+    job._thread.join(5)
+    assert job.matrix.destination_names == ['A', 'B']
+
+    job.sync(SHELTERS)
+    assert not job.running
+
+    moved = SHELTERS.assign(lat=[25.30, 25.41])
+    job.sync(moved)
+    job._thread.join(5)
+    assert job.matrix.covers(ORIGINS, moved)
+
+    fewer = SHELTERS.iloc[:1]
+    assert not job.matrix.covers(ORIGINS, fewer)
+    job.sync(fewer)
+    job._thread.join(5)
+    assert job.matrix.destination_names == ['A']
+    assert 'B' not in job.matrix.travel_times('X')
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from schema import LOCAL_TZ, apply_schema, format_timestamp, to_local_datetime
+from update_feed import render_update_html
+
+
+def raw_updates():
+    return pd.DataFrame({
+        'timestamp': ['2026-10-18 10:00', 'not a time'],
+        'username': ['@moi', '@qrcs'],
+        'message': ['Shelter open', 'Water distribution at noon'],
+        'source': ['Twitter', 'Twitter'],
+        'account_type': ['Official', 'Healthcare'],
+        'location': ['Lusail', 'Doha'],
+        'trust_score': ['0.9', '0.7'],
+        'verified': ['True', 'no'],
+        'engagement': ['120', None],
+        'emergency_type': ['Flash Flood', 'Heat Wave'],
+    })
+
+
+def test_apply_schema_types_columns_and_keeps_gaps():
+    typed = apply_schema('updates', raw_updates())
+    assert isinstance(typed['account_type'].dtype, pd.CategoricalDtype)
+    assert typed['verified'].tolist() == [True, False]
+    assert typed['timestamp'].iat[0] == pd.Timestamp('2026-10-18 10:00')
+    assert pd.isna(typed['timestamp'].iat[1])
+    assert typed['engagement'].iat[0] == 120 and pd.isna(typed['engagement'].iat[1])
+    assert typed['message'].tolist() == ['Shelter open', 'Water distribution at noon']
+    assert format_timestamp(typed['timestamp'].iat[1]) == ''
+
+
+def test_trust_thresholds_hold_after_the_schema():
+    typed = apply_schema('updates', raw_updates())
+    assert (typed['trust_score'] >= 0.9).tolist() == [True, False]
+    assert (typed['trust_score'] >= 0.7).tolist() == [True, True]
+    high, medium = typed.to_dict('records')
+    assert 'social-update trust-high' in render_update_html(high)
+    assert 'social-update trust-medium' in render_update_html(medium)
+
+
+def test_offsets_are_converted_to_naive_local_time():
+    utc = pd.Timestamp('2026-10-18 07:00', tz='UTC')
+    expected = utc.tz_convert(LOCAL_TZ).tz_localize(None)
+    parsed = to_local_datetime(pd.Series(['2026-10-18T07:00:00Z', '2026-10-18T10:00:00+03:00']))
+    assert parsed.dt.tz is None
+    assert parsed.tolist() == [expected, expected]
+
+    mixed = to_local_datetime(pd.Series(['2026-10-18T07:00:00Z', '2026-10-18 09:30']))
+    assert mixed.tolist() == [expected, pd.Timestamp('2026-10-18 09:30')]
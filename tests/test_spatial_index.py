@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+import spatial_index
+from spatial_index import ShelterIndex
+
+SHELTERS = pd.DataFrame({
+    'name': ['Corniche Hall', 'Lusail Arena', 'Wakrah Center', 'Khor School'],
+    'lat': [25.300, 25.420, 25.170, 25.680],
+    'lon': [51.530, 51.490, 51.600, 51.500],
+    'capacity': [100, 200, 150, 80],
+    'current': [100, 50, 20, 10],
+    'type': ['Hall', 'Stadium', 'Hall', 'School'],
+})
+RESOURCES = pd.DataFrame({
+    'location': ['Corniche Hall', 'Lusail Arena', 'Wakrah Center', 'Khor School'],
+    'medical_kits': [10, 0, 5, 3],
+})
+DOHA = (25.2854, 51.5310)
+
+
+def test_nearest_with_capacity_and_resource_filters():
+    index = ShelterIndex(SHELTERS, RESOURCES)
+    # Corniche Hall is closest but full
+    assert index.nearest(DOHA, k=2)['name'].tolist() == ['Wakrah Center', 'Lusail Arena']
+    assert index.nearest(DOHA, require=['medical_kits'], k=2)['name'].tolist() == ['Wakrah Center', 'Khor School']
+    assert index.nearest(DOHA, min_capacity=0, shelter_type='Hall')['name'].tolist() == ['Corniche Hall']
+    nearest = index.nearest(DOHA, min_capacity=0)
+    assert nearest['distance_km'].iat[0] < 2
+    assert 'distance_km' not in SHELTERS
+
+
+def test_within_radius_matches_brute_force(monkeypatch):
+    with_tree = ShelterIndex(SHELTERS, RESOURCES).within_radius(DOHA, 20, min_capacity=0)
+    monkeypatch.setattr(spatial_index, 'cKDTree', None)
+    brute = ShelterIndex(SHELTERS, RESOURCES).within_radius(DOHA, 20, min_capacity=0)
+    assert with_tree['name'].tolist() == brute['name'].tolist() == ['Corniche Hall', 'Wakrah Center', 'Lusail Arena']
+    assert np.allclose(with_tree['distance_km'], brute['distance_km'])
+
+
+def test_sync_rebuilds_the_tree_only_when_locations_move():
+    index = ShelterIndex(SHELTERS, RESOURCES)
+    tree = index.tree
+    index.sync(SHELTERS.assign(current=0), RESOURCES)
+    assert index.tree is tree
+    assert index.nearest(DOHA)['name'].iat[0] == 'Corniche Hall'
+    index.sync(SHELTERS.assign(lat=SHELTERS['lat'] + 0.01), RESOURCES)
+    assert index.tree is not tree
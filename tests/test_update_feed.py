@@ -0,0 +1,76 @@
+import pandas as pd
+
+from update_feed import MAX_PAGE_SIZE, UpdateFeed, render_update_html
+
+
+def updates(n, start='2026-10-18 12:00', trust=0.8, account_type='Citizen'):
+    timestamps = pd.date_range(end=start, periods=n, freq='min')
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'username': [f'@user{i}' for i in range(n)],
+        'message': [f'update at {t:%H:%M}' for t in timestamps],
+        'location': 'Corniche',
+        'trust_score': trust,
+        'verified': True,
+        'account_type': account_type,
+        'engagement': 10,
+    })
+
+
+def messages(records):
+    return [record['message'] for record in records]
+
+
+def test_pages_are_newest_first_and_follow_the_cursor():
+    feed = UpdateFeed()
+    feed.sync(updates(5))
+    first, cursor = feed.page(limit=2)
+    assert messages(first) == ['update at 12:00', 'update at 11:59']
+    second, cursor = feed.page(cursor, limit=2)
+    assert messages(second) == ['update at 11:58', 'update at 11:57']
+    last, cursor = feed.page(cursor, limit=2)
+    assert messages(last) == ['update at 11:56']
+    assert cursor is None
+    assert len(feed.page(limit=MAX_PAGE_SIZE + 50)[0]) == 5
+
+
+def test_appended_rows_are_merged_and_anchor_pins_the_view():
+    feed = UpdateFeed()
+    df = updates(3, start='2026-10-18 11:00')
+    feed.sync(df)
+    anchor = feed.head()
+
+    newer = updates(2, start='2026-10-18 12:00', trust=0.95, account_type='Official')
+    feed.sync(pd.concat([df, newer], ignore_index=True))
+    assert feed.newer_count(anchor) == 2
+    assert feed.newer_count(anchor, account_types={'Citizen'}) == 0
+    assert messages(feed.page(anchor=anchor, limit=1)[0]) == ['update at 11:00']
+    assert messages(feed.page(limit=1, min_trust=0.9)[0]) == ['update at 12:00']
+
+
+def test_replaced_frame_is_reindexed():
+    feed = UpdateFeed()
+    feed.sync(updates(4, start='2026-10-18 09:00'))
+    feed.sync(updates(2, start='2026-10-18 12:00'))
+    records, _ = feed.page(limit=10)
+    assert messages(records) == ['update at 12:00', 'update at 11:59']
+
+
+def test_cards_escape_fields_and_reuse_the_cache():
+    update = updates(1).iloc[0].to_dict()
+    update['message'] = '<script>alert(1)</script> roads closed'
+    card = render_update_html(update)
+    assert '<script>' not in card
+    assert '&lt;script&gt;' in card
+
+    feed = UpdateFeed(max_cached_html=1)
+    assert feed.render([update]) == feed.render([update])
+    other = dict(update, message='shelter open')
+    feed.render([other])
+    assert len(feed._html) == 1
+
+
+def test_trust_classes():
+    update = updates(1).iloc[0].to_dict()
+    for trust, trust_class in [(0.95, 'trust-high'), (0.8, 'trust-medium'), (0.5, 'trust-low')]:
+        assert f'social-update {trust_class}' in render_update_html(dict(update, trust_score=trust))
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from schema import LOCAL_TZ
+from update_windows import UpdateWindowStore
+
+NOW = pd.Timestamp('2026-10-18 12:00')
+
+
+def updates(rows):
+    return pd.DataFrame([
+        {'timestamp': timestamp, 'message': f'update {i}', 'location': location, 'emergency_type': emergency_type,
+         'trust_score': 0.5, 'engagement': 10}
+        for i, (timestamp, location, emergency_type) in enumerate(rows)
+    ])
+
+
+def test_summaries_over_retention_and_velocity_windows():
+    store = UpdateWindowStore(hot_hours=2, retention_hours=24, velocity_minutes=60)
+    df = updates([
+        ('2026-10-18 11:50', 'Corniche', 'Flash Flood'),
+        ('2026-10-18 11:40', 'Corniche', 'Flash Flood'),
+        ('2026-10-18 06:00', 'Corniche', 'Flash Flood'),
+        ('2026-10-18 11:30', 'Lusail', 'Sandstorm'),
+        ('2026-10-16 11:30', 'Lusail', 'Sandstorm'),
+    ])
+    hot = store.sync(df, now=NOW)
+    assert sorted(hot['message']) == ['update 0', 'update 1', 'update 3']
+    assert store.stats['late_dropped'] == 1
+
+    flood = store.summary(location='Corniche', emergency_type='Flash Flood')
+    assert (flood['count'], flood['recent_count']) == (3, 2)
+    assert flood['engagement_velocity'] == 20
+    assert store.summary()['count'] == 4
+    assert store.summaries(by='location')['location'].tolist() == ['Corniche', 'Lusail']
+
+
+def test_sync_is_incremental_and_ages_rows_out():
+    store = UpdateWindowStore(hot_hours=1, retention_hours=3)
+    df = updates([('2026-10-18 11:55', 'Corniche', 'Flash Flood')])
+    store.sync(df, now=NOW)
+    df = pd.concat([df, updates([('2026-10-18 11:58', 'Lusail', 'Sandstorm')])], ignore_index=True)
+    store.sync(df, now=NOW)
+    assert store.summary()['count'] == 2
+
+    later = NOW + pd.Timedelta(hours=2)
+    assert store.sync(df, now=later).empty
+    assert store.summary()['count'] == 2
+    store.advance(now=NOW + pd.Timedelta(hours=4))
+    assert store.summary()['count'] == 0
+
+
+def test_timezone_aware_timestamps():
+    store = UpdateWindowStore(clock=lambda: NOW)
+    local = NOW.tz_localize(LOCAL_TZ)
+    df = updates([
+        ((local - pd.Timedelta(minutes=5)).tz_convert('UTC').strftime('%Y-%m-%dT%H:%M:%SZ'), 'Corniche', 'Flash Flood'),
+        ((local - pd.Timedelta(minutes=10)).tz_convert('Asia/Qatar').isoformat(), 'Corniche', 'Flash Flood'),
+        ('2026-10-18 11:45', 'Corniche', 'Flash Flood'),
+    ])
+    hot = store.sync(df)
+    assert len(hot) == 3
+    assert store.summary()['recent_count'] == 3
+    assert store.summary()['last_seen'] == NOW - pd.Timedelta(minutes=5)
+
+
+def test_utc_feed():
+    store = UpdateWindowStore(clock=lambda: NOW)
+    utc = NOW.tz_localize(LOCAL_TZ).tz_convert('UTC')
+    df = updates([(f"{(utc - pd.Timedelta(minutes=m)):%Y-%m-%dT%H:%M:%S}Z", 'Lusail', 'Sandstorm') for m in (1, 2)])
+    assert len(store.sync(df)) == 2
+    assert store.summary(location='Lusail')['last_seen'] == NOW - pd.Timedelta(minutes=1)
@@ -0,0 +1,161 @@
+import bisect
+import html
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+BADGE_COLORS = {
+    'Official': '#00ff9d',
+    'Healthcare': '#00ff9d',
+    'Emergency': '#00ff9d',
+    'Media': '#ffbe0b',
+    'Citizen': '#888888'
+}
+
+MAX_PAGE_SIZE = 100
+
+
+def render_update_html(update):
+    """HTML card for one social update"""
+    trust = float(update['trust_score'])
+    # Determine trust class and verification status
+    trust_class = ("trust-high" if trust >= 0.9 else "trust-medium") if trust >= 0.7 else "trust-low"
+    verification_badge = "verified" if update['verified'] else "unverified"
+    # Select badge color based on account type
+    badge_color = BADGE_COLORS.get(update['account_type'], '#888888')
+    return f"""
+        <div class='social-update {trust_class}'>
+            <div class="update-header">
+                <div class="account-info">
+                    <strong style="color: {badge_color}">{html.escape(str(update['account_type']))}</strong>
+                    <span class="username">{html.escape(str(update['username']))}</span>
+                    <span class="badge {verification_badge}">
+                        {' ✓' if update['verified'] else '✕'}
+                    </span>
+                </div>
+            </div>
+            <div class="update-content">
+                {html.escape(str(update['message']))}
+            </div>
+            <div class="update-meta">
+                <span class="meta-item">📍 {html.escape(str(update['location']))}</span>
+                <span class="meta-separator">|</span>
+                <span class="meta-item">💯 Trust: {trust:.2f}</span>
+                <span class="meta-separator">|</span>
+                <span class="meta-item">👥 {update['engagement']}</span>
+            </div>
+        </div>
+    """
+
+
+class UpdateFeed:
+    """
+    Newest-first view of the social updates feed with keyset pagination.
+
+    Rows are kept in a pre-sorted index on (timestamp desc, trust desc); a
+    cursor is the sort key of the last row shown, so fetching the next page
+    is a binary search plus a scan of at most a few pages, regardless of how
+    deep the reader has scrolled. New rows appended to the feed are merged
+    into the index without re-sorting the rest, and rendered HTML is cached
+    per update.
+    """
+
+    def __init__(self, max_cached_html=5000):
+        self.max_cached_html = max_cached_html
+        self._keys = []  # sorted ascending: (-timestamp ns, -trust, row position)
+        self._df = None
+        self._first = self._last = None
+        self._html = OrderedDict()
+        self._lock = threading.Lock()
+        self._html_lock = threading.Lock()
+
+    def _row_keys(self, df, offset):
+        timestamps = pd.to_datetime(df['timestamp'], errors='coerce')
+        # Missing timestamps (NaT, the smallest int64) sort as the oldest rows
+        ns = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64).tolist()
+        trust = pd.to_numeric(df['trust_score'], errors='coerce').fillna(0).tolist()
+        return [(-n, -t, position) for position, (n, t) in enumerate(zip(ns, trust), start=offset)]
+
+    def sync(self, df):
+        """Index rows appended since the last call; re-index if the frame was replaced"""
+        with self._lock:
+            indexed = len(self._keys)
+            replaced = (indexed and (len(df) < indexed
+                                     or df['message'].iat[0] != self._first
+                                     or df['message'].iat[indexed - 1] != self._last))
+            if replaced or not indexed:
+                self._keys = sorted(self._row_keys(df, 0))
+            elif len(df) > indexed:
+                for key in self._row_keys(df.iloc[indexed:], indexed):
+                    bisect.insort(self._keys, key)
+            self._df = df
+            if len(df):
+                self._first, self._last = df['message'].iat[0], df['message'].iat[-1]
+
+    def _matching(self, start, stop, limit, min_trust, account_types):
+        df = self._df
+        trust = df['trust_score'].to_numpy()
+        accounts = df['account_type'].to_numpy()
+        rows = []
+        # Scan in page-sized chunks so filters that match few rows stay cheap
+        chunk = max(limit, 1) * 4
+        while start < stop and len(rows) < limit:
+            keys = self._keys[start:min(start + chunk, stop)]
+            positions = np.fromiter((key[2] for key in keys), dtype=np.int64, count=len(keys))
+            mask = trust[positions] >= min_trust
+            if account_types is not None:
+                mask &= np.isin(accounts[positions], list(account_types))
+            rows.extend(key for key, keep in zip(keys, mask) if keep)
+            start += len(keys)
+        return rows[:limit]
+
+    def head(self):
+        """Sort key of the newest update, used to pin a reader's view of the feed"""
+        with self._lock:
+            return self._keys[0] if self._keys else None
+
+    def page(self, cursor=None, limit=20, min_trust=0.0, account_types=None, anchor=None):
+        """
+        Up to `limit` matching updates older than `cursor` (or starting at
+        `anchor`, inclusive, when there is no cursor). Returns (records, next cursor).
+        """
+        limit = min(limit, MAX_PAGE_SIZE)
+        with self._lock:
+            if cursor is not None:
+                start = bisect.bisect_right(self._keys, tuple(cursor))
+            elif anchor is not None:
+                start = bisect.bisect_left(self._keys, tuple(anchor))
+            else:
+                start = 0
+            keys = self._matching(start, len(self._keys), limit, min_trust, account_types)
+            records = self._df.iloc[[key[2] for key in keys]].to_dict('records') if keys else []
+        return records, (keys[-1] if len(keys) == limit else None)
+
+    def newer_count(self, anchor, min_trust=0.0, account_types=None):
+        """Matching updates that arrived ahead of `anchor`"""
+        if anchor is None:
+            return 0
+        with self._lock:
+            stop = bisect.bisect_left(self._keys, tuple(anchor))
+            return len(self._matching(0, stop, stop, min_trust, account_types))
+
+    def render(self, records):
+        """Concatenated HTML for the records, reusing cached cards"""
+        parts = []
+        for update in records:
+            key = (update['username'], str(update['timestamp']), update['message'],
+                   float(update['trust_score']), bool(update['verified']), update['engagement'])
+            with self._html_lock:
+                card = self._html.get(key)
+                if card is not None:
+                    self._html.move_to_end(key)
+            if card is None:
+                card = render_update_html(update)
+                with self._html_lock:
+                    self._html[key] = card
+                    if len(self._html) > self.max_cached_html:
+                        self._html.popitem(last=False)
+            parts.append(card)
+        return "".join(parts)
@@ -0,0 +1,226 @@
+import bisect
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+from schema import to_local_datetime
+
+# Dimensions the rolling aggregates are kept for; None in a key means "all"
+KEY_COLUMNS = ('location', 'emergency_type')
+
+SUMMARY_COLUMNS = [*KEY_COLUMNS, 'count', 'recent_count', 'mean_trust', 'engagement', 'engagement_velocity', 'last_seen']
+
+
+def _empty_totals():
+    return [0, 0.0, 0]  # count, trust sum, engagement sum
+
+
+class UpdateWindowStore:
+    """
+    Social updates partitioned by hour of their timestamp, with retention.
+
+    Partitions younger than `hot_hours` keep their rows and make up frame();
+    older ones are compacted to per-bucket aggregates, which are kept until
+    `retention_hours` and then dropped. Rows are aggregated once, when they
+    arrive, into `bucket_minutes` buckets per (location, emergency_type) and
+    per location / per type / overall; running totals over the retention
+    window and over the last `velocity_minutes` are adjusted as buckets arrive
+    and age out, so summary() is a dict lookup rather than a scan.
+    """
+
+    def __init__(self, hot_hours=6, retention_hours=48, velocity_minutes=60, bucket_minutes=5,
+                 clock=pd.Timestamp.now):
+        self.hot = pd.Timedelta(hours=hot_hours)
+        self.retention = pd.Timedelta(hours=max(retention_hours, hot_hours))
+        self.velocity = pd.Timedelta(minutes=velocity_minutes)
+        self.bucket = pd.Timedelta(minutes=bucket_minutes)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.stats = {'rows': 0, 'late_dropped': 0, 'partitions_compacted': 0, 'buckets_expired': 0}
+        self.reset()
+
+    def reset(self):
+        self._partitions = {}  # hour start -> list of row frames
+        self._frame = None
+        self._buckets = []  # sorted bucket starts
+        self._bucket_totals = {}  # bucket start -> {key: totals}
+        self._retained = defaultdict(_empty_totals)
+        self._recent = defaultdict(_empty_totals)
+        self._last_seen = {}
+        self._recent_from = None
+        self._source_len = 0
+        self._first = self._last = None
+
+    # Ingestion
+
+    def _keys(self, location, emergency_type):
+        return ((location, emergency_type), (location, None), (None, emergency_type), (None, None))
+
+    def add(self, df, now=None):
+        """Aggregate new update rows and keep the ones still inside the hot window"""
+        with self._lock:
+            self._add(df, now or self.clock())
+
+    def _add(self, df, now):
+        self._advance(now)
+        if not len(df):
+            return
+        timestamps = to_local_datetime(df['timestamp']).fillna(now)
+        keep = timestamps >= now - self.retention
+        self.stats['late_dropped'] += int((~keep).sum())
+        df, timestamps = df[keep.to_numpy()], timestamps[keep]
+        if not len(df):
+            return
+
+        grouped = pd.DataFrame({
+            'bucket': timestamps.dt.floor(self.bucket).to_numpy(),
+            'location': df['location'].astype(str).to_numpy(),
+            'emergency_type': df['emergency_type'].astype(str).to_numpy(),
+            'trust': pd.to_numeric(df['trust_score'], errors='coerce').fillna(0).to_numpy(dtype=float),
+            'engagement': pd.to_numeric(df['engagement'], errors='coerce').fillna(0).to_numpy(dtype='int64'),
+            'timestamp': timestamps.to_numpy(),
+        }).groupby(['bucket', *KEY_COLUMNS], observed=True).agg(
+            count=('trust', 'size'), trust=('trust', 'sum'),
+            engagement=('engagement', 'sum'), last_seen=('timestamp', 'max')
+        )
+        for (bucket, location, emergency_type), row in zip(grouped.index, grouped.itertuples(index=False)):
+            self._add_bucket(pd.Timestamp(bucket), self._keys(location, emergency_type),
+                             int(row.count), float(row.trust), int(row.engagement), pd.Timestamp(row.last_seen))
+
+        partitions = timestamps.dt.floor('h')
+        hot = (partitions >= (now - self.hot).floor('h')).to_numpy()
+        for partition, rows in df[hot].groupby(partitions[hot].to_numpy(), sort=False):
+            self._partitions.setdefault(pd.Timestamp(partition), []).append(rows)
+            self._frame = None
+        self.stats['rows'] += len(df)
+
+    def _add_bucket(self, bucket, keys, count, trust, engagement, last_seen):
+        if bucket not in self._bucket_totals:
+            bisect.insort(self._buckets, bucket)
+            self._bucket_totals[bucket] = defaultdict(_empty_totals)
+        windows = [self._bucket_totals[bucket], self._retained]
+        if bucket >= self._recent_from:
+            windows.append(self._recent)
+        for key in keys:
+            for totals in windows:
+                entry = totals[key]
+                entry[0] += count
+                entry[1] += trust
+                entry[2] += engagement
+            if key not in self._last_seen or last_seen > self._last_seen[key]:
+                self._last_seen[key] = last_seen
+
+    def _subtract(self, window, bucket_totals):
+        for key, (count, trust, engagement) in bucket_totals.items():
+            entry = window[key]
+            entry[0] -= count
+            entry[1] -= trust
+            entry[2] -= engagement
+            if entry[0] <= 0:
+                del window[key]
+
+    def _advance(self, now):
+        """Age buckets out of the velocity and retention windows and compact old partitions"""
+        recent_from = (now - self.velocity).floor(self.bucket)
+        if self._recent_from is None or recent_from > self._recent_from:
+            start = 0 if self._recent_from is None else bisect.bisect_left(self._buckets, self._recent_from)
+            stop = bisect.bisect_left(self._buckets, recent_from)
+            for bucket in self._buckets[start:stop]:
+                self._subtract(self._recent, self._bucket_totals[bucket])
+            self._recent_from = recent_from
+
+        expired = bisect.bisect_left(self._buckets, now - self.retention)
+        for bucket in self._buckets[:expired]:
+            self._subtract(self._retained, self._bucket_totals.pop(bucket))
+        del self._buckets[:expired]
+        if expired:
+            self.stats['buckets_expired'] += expired
+            for key in [key for key in self._last_seen if key not in self._retained]:
+                del self._last_seen[key]
+
+        hot_from = (now - self.hot).floor('h')
+        for partition in [p for p in self._partitions if p < hot_from]:
+            # Rows leave the hot tier; their counts live on in the bucket aggregates
+            del self._partitions[partition]
+            self._frame = None
+            self.stats['partitions_compacted'] += 1
+
+    def advance(self, now=None):
+        with self._lock:
+            self._advance(now or self.clock())
+
+    # Source frame tracking
+
+    def sync(self, df, now=None):
+        """
+        Ingest rows appended to `df` since the last call (everything again if the
+        frame was replaced) and return the hot frame. Compacting a partition
+        drops rows from the front of that frame; the indexes synced from it
+        (retriever, embeddings, feed) see their first row change and rebuild.
+        """
+        now = now or self.clock()
+        messages = df['message']
+        with self._lock:
+            indexed = self._source_len
+            if indexed and (len(df) < indexed
+                            or messages.iat[0] != self._first
+                            or messages.iat[indexed - 1] != self._last):
+                # Frame was replaced rather than appended to
+                self.reset()
+                indexed = 0
+            self._add(df.iloc[indexed:], now)
+            if len(df):
+                self._source_len = len(df)
+                self._first, self._last = messages.iat[0], messages.iat[-1]
+            return self._hot_frame(df)
+
+    def _hot_frame(self, like=None):
+        if self._frame is None:
+            parts = [rows for partition in sorted(self._partitions) for rows in self._partitions[partition]]
+            if parts:
+                self._frame = pd.concat(parts, ignore_index=True)
+            else:
+                self._frame = like.iloc[:0] if like is not None else pd.DataFrame()
+        return self._frame
+
+    def frame(self):
+        """Rows of the hot partitions, oldest partition first"""
+        with self._lock:
+            return self._hot_frame()
+
+    # Summaries
+
+    def _summary(self, key):
+        count, trust, engagement = self._retained.get(key, (0, 0.0, 0))
+        recent_count, _, recent_engagement = self._recent.get(key, (0, 0.0, 0))
+        return {
+            'location': key[0],
+            'emergency_type': key[1],
+            'count': count,
+            'recent_count': recent_count,
+            'mean_trust': trust / count if count else None,
+            'engagement': engagement,
+            'engagement_velocity': recent_engagement / (self.velocity.total_seconds() / 3600),
+            'last_seen': self._last_seen.get(key),
+        }
+
+    def summary(self, location=None, emergency_type=None):
+        """
+        Rolling aggregates for one location and/or emergency type (None = all):
+        count and mean trust over the retention window, plus update count and
+        engagement per hour over the last `velocity_minutes`.
+        """
+        with self._lock:
+            return self._summary((location, emergency_type))
+
+    def summaries(self, by=KEY_COLUMNS, sort='recent_count'):
+        """Summaries of every location (by='location'), type (by='emergency_type') or pair, as a frame"""
+        by = (by,) if isinstance(by, str) else tuple(by)
+        with self._lock:
+            rows = [
+                self._summary(key) for key in self._retained
+                if all((key[i] is not None) == (column in by) for i, column in enumerate(KEY_COLUMNS))
+            ]
+        result = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+        return result.sort_values(sort, ascending=False, ignore_index=True) if len(result) else result